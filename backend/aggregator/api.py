@@ -2,36 +2,83 @@ from __future__ import annotations
 
 import json
 import logging
+import asyncio
 import os
-import subprocess
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 import sys
 from threading import Lock
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 
-import requests
-from fastapi import FastAPI, HTTPException, Query
+import httpx
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
-import uvicorn
-
 if __name__ == "__main__" and __package__ is None:
     package_root = Path(__file__).resolve().parent
     if str(package_root) not in sys.path:
         sys.path.append(str(package_root))
-    from insights import generate_insights  # type: ignore
+    from execution import CPU_EXECUTOR, ExecutorOverloaded, run_blocking  # type: ignore
+    from http_client import close_client, get_client  # type: ignore
+    from insight_store import INSIGHT_STORE  # type: ignore
+    from insights import POLLUTANT_PARAMS  # type: ignore
+    from interpolation import INTERPOLATOR  # type: ignore
+    import http_cache  # type: ignore
+    import metrics  # type: ignore
+    import profiling  # type: ignore
     from openaq import router as openaq_router  # type: ignore
+    from openaq import ingest as openaq_ingest  # type: ignore
     from openmeteo import router as openmeteo_router  # type: ignore
+    from openmeteo.batching import fetch_batched  # type: ignore
     from openmeteo.data_access import LOCATION_CATALOG  # type: ignore
+    from series import router as series_router  # type: ignore
+    from series.shared import SHARED_STORE  # type: ignore
+    from series.storage import STORAGE  # type: ignore
+    from warmup import WARMUP  # type: ignore
+    from watcher import WATCHER  # type: ignore
 else:
-    from .insights import generate_insights
+    from .execution import CPU_EXECUTOR, ExecutorOverloaded, run_blocking
+    from .http_client import close_client, get_client
+    from .insight_store import INSIGHT_STORE
+    from .insights import POLLUTANT_PARAMS
+    from .interpolation import INTERPOLATOR
+    from . import http_cache, metrics, profiling
     from .openaq import router as openaq_router
+    from .openaq import ingest as openaq_ingest
     from .openmeteo import router as openmeteo_router
+    from .openmeteo.batching import fetch_batched
     from .openmeteo.data_access import LOCATION_CATALOG
+    from .series import router as series_router
+    from .series.shared import SHARED_STORE
+    from .series.storage import STORAGE
+    from .warmup import WARMUP
+    from .watcher import WATCHER
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    WATCHER.start()
+    WARMUP.start()
+    INSIGHT_STORE.start()
+    if openaq_ingest.ENABLED:
+        # Rebuild insights as soon as new readings land instead of on the next refresh tick.
+        openaq_ingest.OPENAQ_INGEST.on_update.append(INSIGHT_STORE.refresh)
+        openaq_ingest.OPENAQ_INGEST.start()
+    try:
+        yield
+    finally:
+        await openaq_ingest.OPENAQ_INGEST.stop()
+        INSIGHT_STORE.stop()
+        WATCHER.stop()
+        await close_client()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 logger = logging.getLogger(__name__)
 
 app.add_middleware(
@@ -41,21 +88,152 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Dataset routes send cached, already-compressed bodies that this passes through;
+# it compresses everything else (series, insights, AQI) on the fly.
+app.add_middleware(GZipMiddleware, minimum_size=http_cache.COMPRESS_MIN_BYTES, compresslevel=6)
 
 app.include_router(openaq_router)
 app.include_router(openmeteo_router)
+app.include_router(series_router)
+
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):  # type: ignore[no-untyped-def]
+    # The debug endpoints authenticate with the same header; never profile them.
+    if request.url.path.startswith("/debug/"):
+        return await call_next(request)
+    trigger = profiling.trigger_for(request.headers.get(profiling.PROFILE_HEADER))
+    if trigger is None:
+        return await call_next(request)
+
+    profile = profiling.begin(request.method, request.url.path, trigger)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers[profiling.PROFILE_ID_HEADER] = str(profile.id)
+        return response
+    finally:
+        route = request.scope.get("route")
+        profiling.finish(profile, route=getattr(route, "path", None), status=status, duration=time.perf_counter() - started)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):  # type: ignore[no-untyped-def]
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so /openaq/locations/{location_id} stays one series.
+        route = request.scope.get("route")
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status),
+        )
+
+
+def _executor_samples() -> Dict[Tuple[str, ...], float]:
+    stats = CPU_EXECUTOR.stats()
+    return {(field,): float(stats[field]) for field in ("in_flight", "queue_depth", "completed", "rejected")}
+
+
+metrics.gauge(
+    "aggregator_executor_jobs",
+    "Bounded executor job counts (in_flight, queue_depth, completed, rejected).",
+    ("state",),
+    collect=_executor_samples,
+)
+
+
+@app.get("/metrics")
+async def get_metrics() -> Response:
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/ready")
+async def get_readiness() -> JSONResponse:
+    """503 until the startup warmup has preloaded every configured dataset."""
+
+    content = WARMUP.status()
+    if SHARED_STORE is not None:
+        SHARED_STORE.current()
+        content["shared_store"] = SHARED_STORE.status()
+    if WATCHER.running:
+        content["watcher"] = WATCHER.status()
+    if STORAGE.name != "csv":
+        content["storage"] = STORAGE.status()
+    if openaq_ingest.ENABLED:
+        content["openaq_ingest"] = openaq_ingest.OPENAQ_INGEST.status()
+    return JSONResponse(status_code=200 if WARMUP.ready else 503, content=content)
+
+
+def _require_profile_access(request: Request) -> None:
+    if not profiling.authorized(request.headers.get(profiling.PROFILE_HEADER)):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.get("/debug/profiles")
+async def list_profiles(request: Request) -> List[Dict[str, Any]]:
+    _require_profile_access(request)
+    return [profile.summary() for profile in profiling.PROFILE_STORE.list()]
+
+
+@app.get("/debug/profiles/{profile_id}")
+async def get_profile(
+    request: Request,
+    profile_id: int,
+    sort: str = Query("cumulative", description="cumulative, tottime or ncalls"),
+    limit: int = Query(40, ge=1, le=500),
+    format: str = Query("text", description="text report or pstats dump"),
+) -> Response:
+    _require_profile_access(request)
+    profile = profiling.PROFILE_STORE.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if sort not in profiling.SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(profiling.SORT_KEYS)}")
+    if format == "pstats":
+        return Response(
+            content=await run_blocking(profile.dump),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.pstats"'},
+        )
+    header = json.dumps(profile.summary())
+    report = await run_blocking(profile.report, sort, limit)
+    return PlainTextResponse(f"{header}\n\n{report}")
+
+
+@app.exception_handler(ExecutorOverloaded)
+async def handle_executor_overloaded(_: Request, exc: ExecutorOverloaded) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, retry shortly", "executor": exc.stats},
+        headers={"Retry-After": "1", "X-Queue-Depth": str(exc.stats["queue_depth"])},
+    )
 
 
-AQI_ENDPOINTS: Tuple[str, ...] = (
-    "https://air-quality-api.open-meteo.com/v1/air-quality",
-    "https://api.open-meteo.com/v1/air-quality",
+# Upstreams, the Twilio CLI and the data dir can be overridden (e.g. to point load tests at local stand-ins).
+AQI_ENDPOINTS: Tuple[str, ...] = tuple(
+    endpoint.strip()
+    for endpoint in os.environ.get(
+        "AGGREGATOR_AQI_ENDPOINTS",
+        "https://air-quality-api.open-meteo.com/v1/air-quality,https://api.open-meteo.com/v1/air-quality",
+    ).split(",")
+    if endpoint.strip()
 )
-GEOCODING_ENDPOINT = "https://geocoding-api.open-meteo.com/v1/search"
+GEOCODING_ENDPOINT = os.environ.get("AGGREGATOR_GEOCODING_ENDPOINT", "https://geocoding-api.open-meteo.com/v1/search")
 AQI_PARAMS = {"current": "us_aqi", "timezone": "auto"}
-QUIZ_DATA_PATH = Path(__file__).resolve().parent / "data" / "quiz_responses.json"
-TWILIO_COUNT_PATH = Path(__file__).resolve().parent / "data" / "twilio_send_count.json"
+DATA_DIR = Path(os.environ.get("AGGREGATOR_DATA_DIR", Path(__file__).resolve().parent / "data"))
+QUIZ_DATA_PATH = DATA_DIR / "quiz_responses.json"
+TWILIO_COUNT_PATH = DATA_DIR / "twilio_send_count.json"
 TWILIO_ENV_PATH = Path(__file__).resolve().parents[1] / "twilio" / ".env"
-TWILIO_CLI_PATH = Path(__file__).resolve().parents[1] / "twilio" / "main.py"
+TWILIO_CLI_PATH = Path(os.environ.get("AGGREGATOR_TWILIO_CLI", Path(__file__).resolve().parents[1] / "twilio" / "main.py"))
 
 
 def _ensure_twilio_env_loaded() -> None:
@@ -98,52 +276,87 @@ def _format_catalog_entry(slug: str, catalog: Dict[str, Dict[str, Any]]) -> Dict
     return entry
 
 
-def fetch_current_aqi(latitude: float, longitude: float) -> Dict[str, Any]:
-    """Fetch a US AQI snapshot for a coordinate pair."""
+def _parse_aqi_snapshot(payload: Dict[str, Any]) -> Dict[str, Any]:
+    current = payload.get("current") or {}
+    value = current.get("us_aqi")
+    timestamp = current.get("time")
+    units = (payload.get("current_units") or {}).get("us_aqi")
+
+    if value is None:
+        raise AQIFetchError("Service returned no us_aqi value")
+
+    return {
+        "us_aqi": value,
+        "timestamp": timestamp,
+        "units": units or "US AQI",
+        "source": "Open-Meteo",
+    }
+
+
+async def fetch_current_aqi_batch(
+    coordinates: List[Tuple[float, float]],
+) -> List[Union[Dict[str, Any], AQIFetchError]]:
+    """Fetch US AQI snapshots for many coordinates with one request per endpoint.
 
-    params = {**AQI_PARAMS, "latitude": latitude, "longitude": longitude}
-    last_error: Optional[str] = None
+    Coordinates that fail on the primary endpoint are retried together on the
+    next one. Each slot of the result holds either a snapshot or the
+    ``AQIFetchError`` describing why that coordinate could not be resolved.
+    """
+
+    snapshots: List[Optional[Dict[str, Any]]] = [None] * len(coordinates)
+    errors: Dict[int, str] = {}
+    pending = list(range(len(coordinates)))
 
     for endpoint in AQI_ENDPOINTS:
-        try:
-            response = requests.get(endpoint, params=params, timeout=10)
-        except requests.RequestException as exc:  # network hiccups
-            last_error = str(exc)
-            continue
+        if not pending:
+            break
+        batch = await fetch_batched(get_client(), endpoint, [coordinates[index] for index in pending], AQI_PARAMS)
+        unresolved: List[int] = []
+        for index, result in zip(pending, batch):
+            if result.payload is None:
+                errors[index] = result.error or "Unable to reach AQI provider"
+                unresolved.append(index)
+                continue
+            try:
+                snapshots[index] = _parse_aqi_snapshot(result.payload)
+            except AQIFetchError as exc:
+                errors[index] = str(exc)
+                unresolved.append(index)
+        pending = unresolved
 
-        if not response.ok:
-            last_error = f"HTTP {response.status_code}: {response.reason}"
-            continue
+    return [
+        snapshot if snapshot is not None else AQIFetchError(errors.get(index) or "Unable to reach AQI provider")
+        for index, snapshot in enumerate(snapshots)
+    ]
 
-        payload = response.json()
-        current = payload.get("current") or {}
-        value = current.get("us_aqi")
-        timestamp = current.get("time")
-        units = (payload.get("current_units") or {}).get("us_aqi")
-
-        if value is None:
-            last_error = "Service returned no us_aqi value"
-            continue
-
-        return {
-            "us_aqi": value,
-            "timestamp": timestamp,
-            "units": units or "US AQI",
-            "source": "Open-Meteo",
-        }
 
-    raise AQIFetchError(last_error or "Unable to reach AQI provider")
+async def fetch_current_aqi(latitude: float, longitude: float) -> Dict[str, Any]:
+    """Fetch a US AQI snapshot for a coordinate pair."""
+
+    outcome = (await fetch_current_aqi_batch([(latitude, longitude)]))[0]
+    if isinstance(outcome, AQIFetchError):
+        raise outcome
+    return outcome
 
 
-def geocode_query(query: str) -> Optional[Dict[str, Any]]:
+async def geocode_query(query: str) -> Optional[Dict[str, Any]]:
     params = {"name": query, "count": 1, "language": "en"}
+    started = time.perf_counter()
+    outcome = "ok"
     try:
-        response = requests.get(GEOCODING_ENDPOINT, params=params, timeout=10)
-        if not response.ok:
+        response = await get_client().get(GEOCODING_ENDPOINT, params=params)
+        if not response.is_success:
+            outcome = f"http_{response.status_code}"
             return None
         payload = response.json()
-    except requests.RequestException:
+    except httpx.HTTPError:
+        outcome = "network_error"
         return None
+    except ValueError:
+        outcome = "invalid_json"
+        return None
+    finally:
+        metrics.UPSTREAM_SECONDS.observe(time.perf_counter() - started, endpoint=GEOCODING_ENDPOINT, outcome=outcome)
 
     results = payload.get("results")
     if not results:
@@ -176,24 +389,33 @@ def resolve_display_name(resolution: Dict[str, Any]) -> Optional[str]:
 
 
 @app.get("/aqi/current/preset")
-def get_preset_aqi() -> List[Dict[str, Any]]:
+async def get_preset_aqi() -> List[Dict[str, Any]]:
+    entries = [
+        _format_catalog_entry(slug, LOCATION_CATALOG)
+        for slug in ("ajax", "north_york", "oshawa", "scarborough", "toronto")
+    ]
+    resolvable = [
+        index
+        for index, entry in enumerate(entries)
+        if entry.get("latitude") is not None and entry.get("longitude") is not None
+    ]
+    outcomes = await fetch_current_aqi_batch(
+        [(float(entries[index]["latitude"]), float(entries[index]["longitude"])) for index in resolvable]
+    )
+    snapshots: Dict[int, Union[Dict[str, Any], AQIFetchError]] = dict(zip(resolvable, outcomes))
+
     results: List[Dict[str, Any]] = []
-    for slug in ("ajax", "north_york", "oshawa", "scarborough", "toronto"):
-        entry = _format_catalog_entry(slug, LOCATION_CATALOG)
-        latitude = entry.get("latitude")
-        longitude = entry.get("longitude")
-        try:
-            if latitude is None or longitude is None:
-                raise AQIFetchError("Missing coordinates")
-            snapshot = fetch_current_aqi(float(latitude), float(longitude))
-            results.append({**entry, **snapshot})
-        except AQIFetchError as exc:
-            results.append({**entry, "error": str(exc)})
+    for index, entry in enumerate(entries):
+        outcome = snapshots.get(index, AQIFetchError("Missing coordinates"))
+        if isinstance(outcome, AQIFetchError):
+            results.append({**entry, "error": str(outcome)})
+        else:
+            results.append({**entry, **outcome})
     return results
 
 
 @app.get("/aqi/current")
-def get_current_aqi(
+async def get_current_aqi(
     query: Optional[str] = Query(None, description="Location search term"),
     latitude: Optional[float] = Query(None, description="Latitude in decimal degrees"),
     longitude: Optional[float] = Query(None, description="Longitude in decimal degrees"),
@@ -203,7 +425,7 @@ def get_current_aqi(
     resolved_lon: Optional[float] = longitude
 
     if query:
-        resolution = geocode_query(query)
+        resolution = await geocode_query(query)
         if not resolution or resolution.get("latitude") is None or resolution.get("longitude") is None:
             raise HTTPException(status_code=404, detail="Location not found")
         resolved_lat = float(resolution["latitude"])
@@ -214,7 +436,7 @@ def get_current_aqi(
         raise HTTPException(status_code=400, detail="Provide either a query or both latitude and longitude")
 
     try:
-        snapshot = fetch_current_aqi(float(resolved_lat), float(resolved_lon))
+        snapshot = await fetch_current_aqi(float(resolved_lat), float(resolved_lon))
     except AQIFetchError as exc:
         raise HTTPException(status_code=502, detail=str(exc)) from exc
 
@@ -300,7 +522,7 @@ def _increment_twilio_count() -> None:
     _save_twilio_send_count(current + 1)
 
 
-def _twilio_cli_send(body: str, phone_number: str) -> Optional[str]:
+async def _twilio_cli_send(body: str, phone_number: str) -> Optional[str]:
     script = TWILIO_CLI_PATH
     if not script.exists():
         logger.error("Twilio CLI script missing at %s", script)
@@ -312,27 +534,26 @@ def _twilio_cli_send(body: str, phone_number: str) -> Optional[str]:
     env = os.environ.copy()
 
     try:
-        completed = subprocess.run(
-            command,
-            check=True,
-            capture_output=True,
-            text=True,
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
             env=env,
         )
+        raw_stdout, raw_stderr = await process.communicate()
     except FileNotFoundError as exc:
         logger.error("Failed to execute Twilio CLI: %s", exc)
         return str(exc)
-    except subprocess.CalledProcessError as exc:
-        stdout = (exc.stdout or "").strip()
-        stderr = (exc.stderr or "").strip()
+
+    stdout = raw_stdout.decode("utf-8", errors="replace").strip()
+    stderr = raw_stderr.decode("utf-8", errors="replace").strip()
+    if process.returncode != 0:
         if stdout:
             logger.error("Twilio CLI stdout (error): %s", stdout)
         if stderr:
             logger.error("Twilio CLI stderr (error): %s", stderr)
-        return stderr or stdout or f"CLI exited with code {exc.returncode}"
+        return stderr or stdout or f"CLI exited with code {process.returncode}"
 
-    stdout = (completed.stdout or "").strip()
-    stderr = (completed.stderr or "").strip()
     if stdout:
         logger.info("Twilio CLI stdout: %s", stdout)
     if stderr:
@@ -341,10 +562,11 @@ def _twilio_cli_send(body: str, phone_number: str) -> Optional[str]:
     return None
 
 
-def send_quiz_confirmation_sms(phone_number: str, region: str) -> Optional[str]:
+async def send_quiz_confirmation_sms(phone_number: str, region: str) -> Optional[str]:
     if not phone_number.strip():
         return "Missing phone number"
-    if not _should_send_twilio_sms():
+    if not await run_blocking(_should_send_twilio_sms):
+        metrics.SMS_SENDS.inc(outcome="limited")
         logger.warning("Twilio send limit reached; not sending SMS")
         return "Send limit reached"
 
@@ -354,9 +576,11 @@ def send_quiz_confirmation_sms(phone_number: str, region: str) -> Optional[str]:
     )
 
     _ensure_twilio_env_loaded()
-    send_error = _twilio_cli_send(body=body, phone_number=phone_number)
+    with metrics.SMS_IN_FLIGHT.track_inprogress(), metrics.stage_timer("twilio.send"):
+        send_error = await _twilio_cli_send(body=body, phone_number=phone_number)
+    metrics.SMS_SENDS.inc(outcome="sent" if send_error is None else "failed")
     if send_error is None:
-        _increment_twilio_count()
+        await run_blocking(_increment_twilio_count)
         logger.info("Sent Twilio confirmation to %s for region %s via CLI", phone_number, region)
         return None
 
@@ -365,7 +589,7 @@ def send_quiz_confirmation_sms(phone_number: str, region: str) -> Optional[str]:
 
 
 @app.post("/quiz/responses")
-def submit_quiz_response(payload: QuizSubmission) -> Dict[str, Any]:
+async def submit_quiz_response(payload: QuizSubmission) -> Dict[str, Any]:
     timestamp = datetime.utcnow().isoformat() + "Z"
     cleaned = {
         "health_sensitivities": payload.health_sensitivities,
@@ -381,12 +605,12 @@ def submit_quiz_response(payload: QuizSubmission) -> Dict[str, Any]:
     }
 
     logger.info("Quiz submission received: %s", cleaned)
-    _append_quiz_response(cleaned)
+    await run_blocking(_append_quiz_response, cleaned)
 
     response: Dict[str, Any] = {"status": "ok", "submitted_at": timestamp}
 
     if payload.phone_number:
-        send_error = send_quiz_confirmation_sms(payload.phone_number, payload.region)
+        send_error = await send_quiz_confirmation_sms(payload.phone_number, payload.region)
         if send_error is None:
             response["sms"] = {"status": "sent"}
         else:
@@ -396,9 +620,10 @@ def submit_quiz_response(payload: QuizSubmission) -> Dict[str, Any]:
 
     try:
         if payload.latitude is not None and payload.longitude is not None:
-            response["insights"] = generate_insights(
-                latitude=float(payload.latitude),
-                longitude=float(payload.longitude),
+            response["insights"] = await run_blocking(
+                INSIGHT_STORE.insights_for,
+                float(payload.latitude),
+                float(payload.longitude),
                 user_profile={
                     "health_sensitivity": payload.health_sensitivities,
                     "activity_type": payload.activity_type,
@@ -407,6 +632,8 @@ def submit_quiz_response(payload: QuizSubmission) -> Dict[str, Any]:
                 },
                 rain_mm=None,
             )
+    except ExecutorOverloaded:
+        response["insights"] = {"status": "error", "message": "Insights are temporarily unavailable."}
     except Exception as exc:  # pragma: no cover - defensive logging
         logger.exception("Failed to generate insights: %s", exc)
         response["insights"] = {"status": "error", "message": "Could not generate insights."}
@@ -414,7 +641,132 @@ def submit_quiz_response(payload: QuizSubmission) -> Dict[str, Any]:
     return response
 
 
+@app.get("/insights")
+async def get_insights(
+    latitude: float = Query(..., description="Latitude in decimal degrees"),
+    longitude: float = Query(..., description="Longitude in decimal degrees"),
+    health_sensitivities: List[str] = Query([], description="e.g. asthma, heart_condition"),
+    activity_type: Optional[str] = Query(None),
+    audience: Optional[str] = Query(None),
+    interests: List[str] = Query([]),
+    rain_mm: Optional[float] = Query(None, description="Expected rain in millimetres"),
+) -> Dict[str, Any]:
+    """Serve insights from the precomputed per-sensor snapshot."""
+
+    return await run_blocking(
+        INSIGHT_STORE.insights_for,
+        latitude,
+        longitude,
+        user_profile={
+            "health_sensitivity": health_sensitivities,
+            "activity_type": activity_type,
+            "audience": audience,
+            "interest": interests,
+        },
+        rain_mm=rain_mm,
+    )
+
+
+@app.get("/interpolate")
+async def get_interpolated(
+    latitude: float = Query(..., description="Latitude in decimal degrees"),
+    longitude: float = Query(..., description="Longitude in decimal degrees"),
+) -> Dict[str, Any]:
+    """Pollutant estimates at a point from the nearest sensors, blended with the Open-Meteo model."""
+
+    values = await run_blocking(INTERPOLATOR.at, latitude, longitude)
+    return {"latitude": latitude, "longitude": longitude, "pollutants": values}
+
+
+@app.get("/interpolate/grid")
+async def get_interpolated_grid(
+    request: Request,
+    pollutant: str = Query("PM25", description="PM25, O3, NO2 or SO2"),
+) -> Response:
+    """The precomputed GTA raster of one pollutant for map overlays."""
+
+    key = next((name for name in POLLUTANT_PARAMS if pollutant.lower() in (name.lower(), POLLUTANT_PARAMS[name])), None)
+    if key is None:
+        raise HTTPException(status_code=400, detail=f"Unknown pollutant '{pollutant}'; use {', '.join(POLLUTANT_PARAMS)}")
+    if not INTERPOLATOR.ready:
+        await run_blocking(INSIGHT_STORE.refresh)
+    return await http_cache.cached_json(
+        request,
+        (INTERPOLATOR.signature,),
+        INTERPOLATOR.grid_payload,
+        key,
+        cache_control=http_cache.INDEX_CACHE_CONTROL,
+    )
+
+
+MAX_INSIGHT_BATCH = 10_000
+
+
+class InsightRequest(BaseModel):
+    id: Optional[str] = None
+    latitude: float
+    longitude: float
+    health_sensitivities: List[str] = Field(default_factory=list, alias="healthSensitivities")
+    activity_type: Optional[str] = Field(default=None, alias="activityType")
+    audience: Optional[str] = None
+    interests: List[str] = Field(default_factory=list)
+
+    class Config:
+        allow_population_by_field_name = True
+
+
+class InsightBatch(BaseModel):
+    requests: List[InsightRequest] = Field(default_factory=list)
+    rain_mm: Optional[float] = Field(default=None, alias="rainMm")
+
+    class Config:
+        allow_population_by_field_name = True
+
+
+INSIGHT_BATCH_CHUNK = 500
+
+
+@app.post("/insights/batch")
+async def post_insights_batch(payload: InsightBatch) -> StreamingResponse:
+    """Stream one NDJSON line of insights per profile+coordinate pair, in request order."""
+
+    if len(payload.requests) > MAX_INSIGHT_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_INSIGHT_BATCH} requests per batch")
+
+    items = [
+        {
+            "id": item.id,
+            "latitude": item.latitude,
+            "longitude": item.longitude,
+            "user_profile": {
+                "health_sensitivity": item.health_sensitivities,
+                "activity_type": item.activity_type,
+                "audience": item.audience,
+                "interest": item.interests,
+            },
+        }
+        for item in payload.requests
+    ]
+
+    def _render(start: int) -> str:
+        chunk = items[start : start + INSIGHT_BATCH_CHUNK]
+        results = INSIGHT_STORE.iter_batch(chunk, rain_mm=payload.rain_mm, start_index=start)
+        return "".join(json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+
+    # Render the first chunk eagerly so an overloaded executor still yields a 503.
+    first = await run_blocking(_render, 0)
+
+    async def _lines() -> AsyncIterator[str]:
+        yield first
+        for start in range(INSIGHT_BATCH_CHUNK, len(items), INSIGHT_BATCH_CHUNK):
+            yield await run_blocking(_render, start)
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
+
 def main() -> None:
+    import uvicorn  # only the script entry point needs the server
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
 
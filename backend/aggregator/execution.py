@@ -0,0 +1,111 @@
+"""Bounded execution of blocking work for the async FastAPI handlers.
+
+Upstream HTTP calls are awaited natively; CSV parsing, pandas transforms and
+file writes run on a dedicated thread pool instead of Starlette's shared one.
+The pool admits at most ``workers + max_queue`` jobs. Beyond that
+:class:`ExecutorOverloaded` is raised and the app answers ``503`` immediately
+rather than letting latency grow with an unbounded queue.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, TypeVar
+
+try:
+    from .profiling import profiled
+except ImportError:  # pragma: no cover - support script execution
+    from profiling import profiled  # type: ignore
+
+T = TypeVar("T")
+
+CPU_WORKERS = int(os.environ.get("AGGREGATOR_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_QUEUE_DEPTH = int(os.environ.get("AGGREGATOR_MAX_QUEUE_DEPTH", "64"))
+
+
+class ExecutorOverloaded(Exception):
+    """Raised when the executor already holds its maximum number of jobs."""
+
+    def __init__(self, stats: Dict[str, int]) -> None:
+        super().__init__("Executor queue is full")
+        self.stats = stats
+
+
+class BoundedExecutor:
+    def __init__(self, workers: int = CPU_WORKERS, max_queue: int = MAX_QUEUE_DEPTH, name: str = "aggregator-cpu") -> None:
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._name = name
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=name)
+        self._lock = Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorOverloaded(self._stats_locked())
+            self._pending += 1
+        # Copy the caller's context so request-scoped state (e.g. profiling) follows the job.
+        context = contextvars.copy_context()
+        try:
+            future = self._executor.submit(context.run, functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _stats_locked(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "in_flight": min(self._pending, self.workers),
+            "queue_depth": max(0, self._pending - self.workers),
+            "max_queue_depth": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return self._stats_locked()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+CPU_EXECUTOR = BoundedExecutor()
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``fn`` on the shared bounded executor and await its result.
+
+    When the calling request is being profiled the job records into its profile.
+    """
+
+    return await CPU_EXECUTOR.run(profiled(fn), *args, **kwargs)
+
+
+__all__ = [
+    "BoundedExecutor",
+    "CPU_EXECUTOR",
+    "CPU_WORKERS",
+    "ExecutorOverloaded",
+    "MAX_QUEUE_DEPTH",
+    "run_blocking",
+]
@@ -0,0 +1,177 @@
+"""Column-selective, mtime-invalidated cache of parsed CSV files."""
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Callable, DefaultDict, Dict, Hashable, List, Optional, Sequence
+
+try:
+    from .lazy import lazy_import
+    from .metrics import CACHE_REQUESTS, stage_timer
+    from .watcher import WATCHER, FileSignature
+except ImportError:  # pragma: no cover - support script execution
+    from lazy import lazy_import  # type: ignore
+    from metrics import CACHE_REQUESTS, stage_timer  # type: ignore
+    from watcher import WATCHER, FileSignature  # type: ignore
+
+pd = lazy_import("pandas")
+
+
+def file_signature(path: Path, fresh: bool = False) -> Optional[FileSignature]:
+    """Return ``(mtime_ns, size)`` for ``path`` or ``None`` if it does not exist.
+
+    While :data:`watcher.WATCHER` runs, files in watched directories are
+    answered from memory. ``fresh`` stats anyway and updates the watcher, for
+    callers that just wrote the file.
+    """
+
+    return WATCHER.refresh(path) if fresh else WATCHER.signature(path)
+
+
+@dataclass
+class _CachedFile:
+    signature: FileSignature
+    header: List[str]
+    columns: Dict[str, pd.Series] = field(default_factory=dict)
+    derived: Dict[str, pd.DataFrame] = field(default_factory=dict)
+
+
+class ColumnCache:
+    """Cache CSV columns per key, parsing only the columns a caller asks for.
+
+    Each entry remembers the file signature it was parsed from; a changed
+    mtime or size drops every cached column for that key on the next access.
+    Lookups are reported to ``/metrics`` under ``name``.
+    """
+
+    def __init__(self, name: str = "default") -> None:
+        self.name = name
+        self._entries: Dict[Hashable, _CachedFile] = {}
+        self._locks: DefaultDict[Hashable, Lock] = defaultdict(Lock)
+        self.hits = 0
+        self.misses = 0
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        CACHE_REQUESTS.inc(cache=self.name, result="hit" if hit else "miss")
+
+    def _entry(self, key: Hashable, path: Path) -> _CachedFile:
+        signature = file_signature(path)
+        if signature is None:
+            self._entries.pop(key, None)
+            raise FileNotFoundError(path)
+        entry = self._entries.get(key)
+        if entry is None or entry.signature != signature:
+            with stage_timer(f"{self.name}.csv_header"):
+                header = [str(column) for column in pd.read_csv(path, nrows=0).columns]
+            entry = _CachedFile(signature=signature, header=header)
+            self._entries[key] = entry
+        return entry
+
+    def header(self, key: Hashable, path: Path) -> List[str]:
+        with self._locks[key]:
+            return list(self._entry(key, path).header)
+
+    def load(self, key: Hashable, path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Return ``columns`` (all when ``None``) of ``path``; unknown columns are skipped."""
+
+        with self._locks[key]:
+            entry = self._entry(key, path)
+            wanted = list(entry.header) if columns is None else [c for c in columns if c in entry.header]
+            missing = [column for column in wanted if column not in entry.columns]
+            if missing:
+                self._record(hit=False)
+                with stage_timer(f"{self.name}.csv_parse"):
+                    parsed = pd.read_csv(path, usecols=missing)
+                for column in missing:
+                    entry.columns[column] = parsed[column]
+            else:
+                self._record(hit=True)
+            return pd.DataFrame({column: entry.columns[column] for column in wanted}, columns=wanted)
+
+    def derived(
+        self,
+        key: Hashable,
+        path: Path,
+        name: str,
+        columns: Optional[Sequence[str]],
+        compute: Callable[[pd.DataFrame], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """Return ``compute(load(columns))``, computed once per file version and cached as ``name``."""
+
+        with self._locks[key]:
+            entry = self._entry(key, path)
+            cached = entry.derived.get(name)
+            if cached is not None:
+                self._record(hit=True)
+                return cached
+
+        frame = self.load(key, path, columns)
+        with stage_timer(f"{self.name}.derive.{name}"):
+            result = compute(frame)
+        with self._locks[key]:
+            if self._entries.get(key) is entry:
+                entry.derived[name] = result
+        return result
+
+    def prepend(self, key: Hashable, path: Path, rows: pd.DataFrame, previous: Optional[FileSignature]) -> bool:
+        """Splice ``rows`` in front of the cached columns after ``path`` was rewritten with them on top.
+
+        This only applies when the entry was parsed from ``previous``, the file
+        version before the rewrite. Otherwise the entry is dropped and the next
+        access reparses. Derived frames are dropped and recomputed from the
+        spliced columns.
+        """
+
+        with self._locks[key]:
+            entry = self._entries.get(key)
+            signature = file_signature(path, fresh=True)
+            if (
+                entry is None
+                or signature is None
+                or previous is None
+                or entry.signature != previous
+                or list(rows.columns) != entry.header
+            ):
+                self._entries.pop(key, None)
+                return False
+            for column, cached in list(entry.columns.items()):
+                entry.columns[column] = pd.concat([rows[column], cached], ignore_index=True)
+            entry.derived.clear()
+            entry.signature = signature
+            return True
+
+    def apply_change(self, key: Hashable, path: Path, signature: Optional[FileSignature]) -> bool:
+        """Handle a watcher event for ``path``: reparse the columns cached for ``key`` at ``signature``.
+
+        An entry already at ``signature`` (spliced by :meth:`prepend`) is kept.
+        A removed file just drops its entry. Returns whether columns were reloaded.
+        """
+
+        with self._locks[key]:
+            entry = self._entries.get(key)
+            if entry is None or entry.signature == signature:
+                return False
+            self._entries.pop(key, None)
+        columns = list(entry.columns)
+        if signature is None or not columns:
+            return False
+        try:
+            self.load(key, path, columns)
+        except (OSError, ValueError):
+            return False  # parsed again, and reported, on the next request
+        return True
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+__all__ = ["ColumnCache", "FileSignature", "file_signature"]
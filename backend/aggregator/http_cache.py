@@ -0,0 +1,272 @@
+"""Conditional GET and pre-serialized bodies for dataset endpoints.
+
+Dataset responses only change when their source files change. The data access
+layers expose the file signatures behind each response
+(``resource_signatures``). :func:`cached_json` derives the ``ETag`` and
+``Last-Modified`` headers from those signatures and answers ``304 Not
+Modified`` when the client already has them. Otherwise it serves the body from
+an LRU of serialized bytes, so a repeat request skips the records build and
+JSON encoding as well.
+
+Bodies are compressed per ``Accept-Encoding`` (brotli when the optional
+``brotli`` package is installed, otherwise gzip), and the compressed bytes are
+cached under a per-encoding ETag. A historical series is therefore compressed
+once per file version rather than on every hit.
+
+Signatures are computed on the event loop: a few ``stat`` calls and, for
+OpenAQ, the small ``locations.json`` are cheaper than an executor hop. It also
+means conditional requests still succeed while the executor is saturated.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+
+try:
+    from .execution import run_blocking
+    from .frame_cache import FileSignature
+    from .metrics import CACHE_REQUESTS, stage_timer
+    from .serialization import dumps
+except ImportError:  # pragma: no cover - support script execution
+    from execution import run_blocking  # type: ignore
+    from frame_cache import FileSignature  # type: ignore
+    from metrics import CACHE_REQUESTS, stage_timer  # type: ignore
+    from serialization import dumps  # type: ignore
+
+try:
+    import brotli
+except ImportError:  # optional: ``pip install brotli`` enables ``Content-Encoding: br``
+    brotli = None
+
+MAX_AGE = int(os.environ.get("AGGREGATOR_HTTP_MAX_AGE", "300"))
+MAX_CACHE_BYTES = int(float(os.environ.get("AGGREGATOR_RESPONSE_CACHE_MB", "64")) * 1024 * 1024)
+
+# Record payloads change only at ingest; indexes (locations, parameters) are
+# kept shorter so new stations show up quickly.
+RECORDS_CACHE_CONTROL = f"public, max-age={MAX_AGE}, stale-while-revalidate=60"
+INDEX_CACHE_CONTROL = f"public, max-age={min(MAX_AGE, 60)}"
+# ``{"error": ...}`` answers (e.g. a location not ingested yet) must not outlive the lookup.
+ERROR_CACHE_CONTROL = "no-store"
+
+JSON_MEDIA_TYPE = "application/json"
+
+# Smaller bodies are sent as-is; compressing them saves less than the headers cost.
+COMPRESS_MIN_BYTES = int(os.environ.get("AGGREGATOR_COMPRESS_MIN_BYTES", "1024"))
+# Cached bodies are compressed once per file version, so favour ratio over speed.
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+CachedBody = Tuple[bytes, Optional[str]]  # body, Content-Encoding
+
+
+def render_json(content: Any) -> bytes:
+    """Return ``content`` encoded, or unchanged when a builder already produced JSON bytes."""
+
+    return content if isinstance(content, bytes) else dumps(content)
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an ``Accept-Encoding`` header; ``None`` means identity."""
+
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    candidates = [(weights.get(name, wildcard), name) for name in supported_encodings()]
+    weight, name = max(candidates, key=lambda item: item[0])  # ties keep the preferred (earlier) encoding
+    return name if weight > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    with stage_timer(f"http.compress.{encoding}"):
+        if encoding == "br":
+            return brotli.compress(body, quality=BROTLI_QUALITY)
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def make_etag(target: str, signatures: Sequence[Optional[FileSignature]]) -> str:
+    digest = hashlib.sha1(repr((target, tuple(signatures))).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def representation_etag(etag: str, encoding: Optional[str]) -> str:
+    """ETag of the ``encoding`` representation; each encoding needs its own strong validator."""
+
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+
+def last_modified(signatures: Sequence[Optional[FileSignature]]) -> Optional[str]:
+    mtimes = [signature[0] for signature in signatures if signature is not None]
+    return formatdate(max(mtimes) / 1e9, usegmt=True) if mtimes else None
+
+
+def not_modified(request: Request, etag: str, modified: Optional[str]) -> bool:
+    """Evaluate ``If-None-Match`` (or, without it, ``If-Modified-Since``) per RFC 9110."""
+
+    match = request.headers.get("if-none-match")
+    if match is not None:
+        candidates = {candidate.strip().removeprefix("W/") for candidate in match.split(",")}
+        return "*" in candidates or etag in candidates
+    since = request.headers.get("if-modified-since")
+    if since is None or modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(modified) <= parsedate_to_datetime(since)
+    except (TypeError, ValueError):
+        return False
+
+
+class ResponseCache:
+    """LRU of serialized (and possibly compressed) bodies keyed by ETag and bounded by total size."""
+
+    def __init__(self, max_bytes: int = MAX_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    def get(self, etag: str) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None:
+                self._entries.move_to_end(etag)
+            return entry
+
+    def put(self, etag: str, body: bytes, content_encoding: Optional[str] = None) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(etag, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[etag] = (body, content_encoding)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+
+RESPONSE_CACHE = ResponseCache()
+
+
+def is_error_payload(content: Any) -> bool:
+    """Whether a builder answered with an ``{"error": ...}`` payload instead of data."""
+
+    return isinstance(content, dict) and "error" in content
+
+
+def _build_body(
+    etag: str,
+    encoding: Optional[str],
+    build: Callable[..., Any],
+    args: Sequence[Any],
+) -> Tuple[bytes, Optional[str], bool]:
+    """Serialize (or reuse the identity body) and compress for ``encoding``, caching both.
+
+    Returns the body, its ``Content-Encoding`` and whether it may be cached;
+    error payloads are neither cached nor compressed.
+    """
+
+    cached = RESPONSE_CACHE.get(etag)
+    if cached is not None:
+        plain = cached[0]
+    else:
+        content = build(*args)
+        plain = render_json(content)
+        if is_error_payload(content):
+            return plain, None, False
+        RESPONSE_CACHE.put(etag, plain)
+    if encoding is None:
+        return plain, None, True
+    # Small bodies are cached as-is under the encoded ETag so later hits skip this check.
+    entry: CachedBody = (compress(plain, encoding), encoding) if len(plain) >= COMPRESS_MIN_BYTES else (plain, None)
+    RESPONSE_CACHE.put(representation_etag(etag, encoding), *entry)
+    return entry[0], entry[1], True
+
+
+async def cached_json(
+    request: Request,
+    signatures: Sequence[Optional[FileSignature]],
+    build: Callable[..., Any],
+    *args: Any,
+    cache_control: str = RECORDS_CACHE_CONTROL,
+) -> Response:
+    """Answer with ``304``, a cached body, or ``build(*args)`` serialized on the executor."""
+
+    target = f"{request.url.path}?{request.url.query}" if request.url.query else request.url.path
+    etag = make_etag(target, signatures)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    representation = representation_etag(etag, encoding)
+    modified = last_modified(signatures)
+    headers = {"ETag": representation, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if modified is not None:
+        headers["Last-Modified"] = modified
+
+    if not_modified(request, representation, modified):
+        CACHE_REQUESTS.inc(cache="response", result="not_modified")
+        return Response(status_code=304, headers=headers)
+
+    entry = RESPONSE_CACHE.get(representation)
+    CACHE_REQUESTS.inc(cache="response", result="hit" if entry is not None else "miss")
+    if entry is None:
+        body, content_encoding, cacheable = await run_blocking(_build_body, etag, encoding, build, args)
+        if not cacheable:
+            return Response(content=body, media_type=JSON_MEDIA_TYPE, headers={"Cache-Control": ERROR_CACHE_CONTROL})
+    else:
+        body, content_encoding = entry
+    if content_encoding is not None:
+        headers["Content-Encoding"] = content_encoding
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+__all__ = [
+    "COMPRESS_MIN_BYTES",
+    "ERROR_CACHE_CONTROL",
+    "INDEX_CACHE_CONTROL",
+    "RECORDS_CACHE_CONTROL",
+    "RESPONSE_CACHE",
+    "ResponseCache",
+    "cached_json",
+    "compress",
+    "is_error_payload",
+    "last_modified",
+    "make_etag",
+    "negotiate_encoding",
+    "not_modified",
+    "render_json",
+    "representation_etag",
+    "supported_encodings",
+]
@@ -0,0 +1,34 @@
+"""Shared async HTTP client for upstream APIs (Open-Meteo AQI and geocoding)."""
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+import httpx
+
+UPSTREAM_TIMEOUT = float(os.environ.get("AGGREGATOR_UPSTREAM_TIMEOUT", "10"))
+MAX_CONNECTIONS = int(os.environ.get("AGGREGATOR_UPSTREAM_MAX_CONNECTIONS", "20"))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the process-wide client, creating it on first use so pooled connections are reused."""
+
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=UPSTREAM_TIMEOUT,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+__all__ = ["UPSTREAM_TIMEOUT", "close_client", "get_client"]
@@ -0,0 +1,221 @@
+"""Precomputed per-sensor insights kept fresh by a background refresher.
+
+Sensor data changes at most hourly, so the expensive part of an insight
+(loading every pollutant file, ranking and tiering readings) is computed once
+per OpenAQ location whenever the dataset changes, together with the
+interpolated pollutant surfaces of :mod:`interpolation`. Requests only locate
+the nearest sensor, apply the quiz profile and read the raster cell under the
+requested point.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from threading import Event, Lock, Thread
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from .insights import SensorInsights, build_sensor_insights, load_sensor_context, personalize_insights
+    from .interpolation import INTERPOLATOR, haversine_km
+    from .lazy import lazy_import
+    from .metrics import stage_timer
+    from .openaq import catalog as openaq_catalog
+    from .openaq import data_access as openaq_dao
+    from .openmeteo import data_access as openmeteo_dao
+    from .watcher import WATCHER
+except ImportError:  # pragma: no cover - support script execution
+    from insights import SensorInsights, build_sensor_insights, load_sensor_context, personalize_insights  # type: ignore
+    from interpolation import INTERPOLATOR, haversine_km  # type: ignore
+    from lazy import lazy_import  # type: ignore
+    from metrics import stage_timer  # type: ignore
+    from openaq import catalog as openaq_catalog  # type: ignore
+    from openaq import data_access as openaq_dao  # type: ignore
+    from openmeteo import data_access as openmeteo_dao  # type: ignore
+    from watcher import WATCHER  # type: ignore
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL_SECONDS = float(os.environ.get("AGGREGATOR_INSIGHTS_REFRESH_SECONDS", "300"))
+# Bound the (points x sensors) distance matrix built per chunk during batch lookups.
+MAX_DISTANCE_CELLS = 1_000_000
+
+
+class InsightStore:
+    """Holds one :class:`SensorInsights` per OpenAQ location."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._refresh_lock = Lock()
+        self._state: Optional[Tuple[Any, ...]] = None
+        self._entries: Dict[str, SensorInsights] = {}
+        self._ids: List[str] = []
+        # Filled by refresh(); lookups check ``_ids`` first, so numpy loads lazily.
+        self._latitudes: Any = None
+        self._longitudes: Any = None
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self.last_refresh: Optional[float] = None
+        self.last_duration: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._state is not None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuild every sensor's insights if the OpenAQ dataset changed; return whether it did."""
+
+        with self._refresh_lock:
+            state = openaq_dao.dataset_state()
+            if not force and state == self._state:
+                return False
+
+            started = time.perf_counter()
+            entries: Dict[str, SensorInsights] = {}
+            with stage_timer("insights.refresh"):
+                catalog = openaq_catalog.load_catalog()
+                for location_id, location in openaq_dao.load_locations().items():
+                    latitude, longitude = location.get("latitude"), location.get("longitude")
+                    if not isinstance(latitude, (int, float)) or not isinstance(longitude, (int, float)):
+                        continue
+                    try:
+                        series = catalog.get(str(location_id), {}).get("series", {})
+                        context = load_sensor_context(str(location_id), location, series)
+                        entries[str(location_id)] = build_sensor_insights(context)
+                    except Exception:
+                        # One unreadable location must not keep the rest of the snapshot from publishing.
+                        logger.exception("Skipping insights for location %s", location_id)
+            INTERPOLATOR.rebuild([entry.sensor for entry in entries.values()])
+
+            ids = list(entries)
+            with self._lock:
+                self._entries = entries
+                self._ids = ids
+                self._latitudes = np.array([entries[sensor_id].sensor.latitude for sensor_id in ids], dtype=float)
+                self._longitudes = np.array([entries[sensor_id].sensor.longitude for sensor_id in ids], dtype=float)
+                self._state = state
+            self.last_refresh = time.time()
+            self.last_duration = time.perf_counter() - started
+            logger.info("Precomputed insights for %d sensors in %.3fs", len(ids), self.last_duration)
+            return True
+
+    def _ensure_loaded(self) -> None:
+        if self._state is None:
+            self.refresh()
+
+    def get(self, sensor_id: str) -> Optional[SensorInsights]:
+        self._ensure_loaded()
+        return self._entries.get(str(sensor_id))
+
+    def nearest(self, latitude: float, longitude: float) -> Optional[SensorInsights]:
+        self._ensure_loaded()
+        with self._lock:
+            if not self._ids:
+                return None
+            distances = haversine_km(latitude, longitude, self._latitudes, self._longitudes)
+            return self._entries[self._ids[int(np.argmin(distances))]]
+
+    def nearest_many(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> List[Optional[SensorInsights]]:
+        """Assign every coordinate to its nearest sensor with chunked, vectorised haversine."""
+
+        self._ensure_loaded()
+        with self._lock:
+            ids, entries = self._ids, self._entries
+            sensor_lats, sensor_lons = self._latitudes, self._longitudes
+        if not ids:
+            return [None] * len(latitudes)
+
+        point_lats = np.asarray(latitudes, dtype=float)
+        point_lons = np.asarray(longitudes, dtype=float)
+        assigned = np.empty(len(point_lats), dtype=np.int64)
+        step = max(1, MAX_DISTANCE_CELLS // len(ids))
+        for start in range(0, len(point_lats), step):
+            stop = start + step
+            distances = haversine_km(
+                point_lats[start:stop, None],
+                point_lons[start:stop, None],
+                sensor_lats[None, :],
+                sensor_lons[None, :],
+            )
+            assigned[start:stop] = np.argmin(distances, axis=1)
+        return [entries[ids[index]] for index in assigned.tolist()]
+
+    def iter_batch(
+        self,
+        items: Sequence[Dict[str, Any]],
+        rain_mm: Optional[float] = None,
+        start_index: int = 0,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield ``{"index", "id", "insights"}`` for each item, sharing work across the batch.
+
+        Each item holds ``latitude``, ``longitude``, ``user_profile`` and an
+        optional caller ``id``. Identical (sensor, profile) pairs are
+        personalised once.
+        """
+
+        latitudes = [item["latitude"] for item in items]
+        longitudes = [item["longitude"] for item in items]
+        sensors = self.nearest_many(latitudes, longitudes)
+        interpolated = INTERPOLATOR.at_many(latitudes, longitudes)
+        personalised: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for index, (item, base, point) in enumerate(zip(items, sensors, interpolated), start=start_index):
+            if base is None:
+                insights: Dict[str, Any] = {"status": "error", "message": "No nearby sensors available."}
+            else:
+                profile = item.get("user_profile") or {}
+                cache_key = (base.sensor.sensor_id, json.dumps(profile, sort_keys=True, default=list))
+                if cache_key not in personalised:
+                    personalised[cache_key] = personalize_insights(base, profile, rain_mm)
+                insights = {**personalised[cache_key], "interpolated": point}
+            yield {"index": index, "id": item.get("id"), "insights": insights}
+
+    def insights_for(
+        self,
+        latitude: float,
+        longitude: float,
+        user_profile: Dict[str, Any],
+        rain_mm: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        base = self.nearest(latitude, longitude)
+        if base is None:
+            return {"status": "error", "message": "No nearby sensors available."}
+        insights = personalize_insights(base, user_profile, rain_mm)
+        insights["interpolated"] = INTERPOLATOR.at(latitude, longitude)
+        return insights
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:  # pragma: no cover - keep serving the last good snapshot
+                logger.exception("Insight refresh failed; keeping previous snapshot")
+            self._stop.wait(interval)
+
+    def start(self, interval: float = REFRESH_INTERVAL_SECONDS) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, args=(interval,), name="insight-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+INSIGHT_STORE = InsightStore()
+# Rebuild as soon as the watcher reports new OpenAQ files rather than on the next tick.
+WATCHER.watch(openaq_dao.TRANSFORMED_DIR, lambda _: INSIGHT_STORE.refresh() if INSIGHT_STORE.ready else None)
+# New model hours only move the blended surfaces; the sensor snapshot is reused.
+WATCHER.watch(openmeteo_dao.DATA_DIR, lambda _: INTERPOLATOR.rebuild() if INTERPOLATOR.ready else None)
+INTERPOLATOR.loader = INSIGHT_STORE._ensure_loaded
+
+__all__ = ["INSIGHT_STORE", "InsightStore", "haversine_km"]
@@ -7,17 +7,27 @@ from math import atan2, cos, radians, sin, sqrt
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 try:
+    from .lazy import lazy_import
+    from .metrics import timed
+    from .openaq import catalog as openaq_catalog
     from .openaq import data_access as openaq_dao
+    from .openmeteo import data_access as openmeteo_dao
+    from .openmeteo import windows as forecast_windows
+    from .openmeteo.windows import WINDOW_THRESHOLDS
+    from .trends import FORECAST_HOURS
+    from .units import canonical_unit
 except ImportError:  # pragma: no cover - support script execution
-    import importlib.util
-    from pathlib import Path
+    from lazy import lazy_import  # type: ignore
+    from metrics import timed  # type: ignore
+    from openaq import catalog as openaq_catalog  # type: ignore
+    from openaq import data_access as openaq_dao  # type: ignore
+    from openmeteo import data_access as openmeteo_dao  # type: ignore
+    from openmeteo import windows as forecast_windows  # type: ignore
+    from openmeteo.windows import WINDOW_THRESHOLDS  # type: ignore
+    from trends import FORECAST_HOURS  # type: ignore
+    from units import canonical_unit  # type: ignore
 
-    module_path = Path(__file__).resolve().parent / "openaq" / "data_access.py"
-    spec = importlib.util.spec_from_file_location("_openaq_data_access", module_path)
-    if spec is None or spec.loader is None:
-        raise
-    openaq_dao = importlib.util.module_from_spec(spec)  # type: ignore
-    spec.loader.exec_module(openaq_dao)  # type: ignore
+np = lazy_import("numpy")
 
 
 SEVERITY_ORDER = [
@@ -57,6 +67,7 @@ class Measurement:
     unit: Optional[str]
     timestamp: Optional[str]
     previous: Optional[float]
+    trend: Optional[Dict[str, Any]] = None  # from the catalog; see trends.compute_trend
 
 
 @dataclass
@@ -78,32 +89,76 @@ def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return radius * c
 
 
+def _nearest_forecast_location(latitude: float, longitude: float) -> Optional[str]:
+    distances = {
+        slug: _haversine_km(latitude, longitude, entry["latitude"], entry["longitude"])
+        for slug, entry in openmeteo_dao.LOCATION_CATALOG.items()
+    }
+    return min(distances, key=distances.get) if distances else None
+
+
 def _latest_measurement(file_name: str) -> Measurement:
-    records = openaq_dao.load_parameter_records(file_name)
-    if not records:
+    frame = openaq_dao.load_measurement_frame(file_name)
+    if frame.empty:
         return Measurement(None, None, None, None)
 
-    records_sorted = sorted(
-        (record for record in records if record.get("value") is not None),
-        key=lambda rec: (rec.get("datetimeLocal") or rec.get("datetimeUtc") or ""),
-    )
-    if not records_sorted:
+    values = frame["value_canonical"].to_numpy(dtype=float)
+    valid = np.flatnonzero(np.isfinite(values))
+    if not len(valid):
         return Measurement(None, None, None, None)
 
-    latest = records_sorted[-1]
-    previous = records_sorted[-2] if len(records_sorted) > 1 else None
+    # ISO-8601 UTC strings sort chronologically; local offsets shift across DST.
+    order_keys = frame["datetimeUtc"].fillna("").astype(str).to_numpy()[valid]
+    ordered = valid[np.argsort(order_keys, kind="stable")]
+    latest = ordered[-1]
+    previous = ordered[-2] if len(ordered) > 1 else None
+
+    row = frame.iloc[latest]
+    timestamp = row.get("datetimeLocal") if isinstance(row.get("datetimeLocal"), str) else None
+    timestamp = timestamp or (row.get("datetimeUtc") if isinstance(row.get("datetimeUtc"), str) else None)
+    unit = row.get("unit_canonical")
+    return Measurement(
+        float(values[latest]),
+        unit if isinstance(unit, str) else None,
+        timestamp,
+        float(values[previous]) if previous is not None else None,
+    )
 
-    def _to_float(value: Any) -> Optional[float]:
-        try:
-            return float(value)
-        except (TypeError, ValueError):
-            return None
 
-    latest_value = _to_float(latest.get("value"))
-    previous_value = _to_float(previous.get("value")) if previous else None
-    timestamp = latest.get("datetimeLocal") or latest.get("datetimeUtc")
-    unit = latest.get("unit")
-    return Measurement(latest_value, unit if isinstance(unit, str) else None, timestamp, previous_value)
+@timed("insights.load_sensor_context")
+def load_sensor_context(
+    location_id: str,
+    location: Dict[str, Any],
+    series: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> SensorContext:
+    """Collect the latest canonical reading of every tracked pollutant for one sensor.
+
+    ``series`` is the location's catalog ``series`` block; callers building many
+    sensors pass it so the catalog is loaded once rather than per location.
+    """
+
+    location_name = openaq_dao.get_location_name(location)
+    if series is None:
+        series = openaq_catalog.load_catalog().get(str(location_id), {}).get("series", {})
+    measurements: Dict[str, Measurement] = {}
+    all_params = {**POLLUTANT_PARAMS, **CONTEXT_PARAMS}
+    for pollutant, parameter in all_params.items():
+        file_name = openaq_dao.resolve_parameter_file(location, parameter)
+        if not file_name:
+            measurements[pollutant] = Measurement(None, None, None, None)
+            continue
+        measurements[pollutant] = _latest_measurement(file_name)
+        entry = series.get(parameter) or {}
+        if entry.get("file") == file_name:
+            measurements[pollutant].trend = entry.get("trend")
+
+    return SensorContext(
+        sensor_id=str(location_id),
+        location_name=location_name,
+        latitude=float(location.get("latitude")),
+        longitude=float(location.get("longitude")),
+        measurements=measurements,
+    )
 
 
 def _nearest_openaq_sensor(latitude: float, longitude: float) -> Optional[SensorContext]:
@@ -126,23 +181,7 @@ def _nearest_openaq_sensor(latitude: float, longitude: float) -> Optional[Sensor
     if nearest_id is None or nearest_location is None:
         return None
 
-    location_name = openaq_dao.get_location_name(nearest_location)
-    measurements: Dict[str, Measurement] = {}
-    all_params = {**POLLUTANT_PARAMS, **CONTEXT_PARAMS}
-    for pollutant, parameter in all_params.items():
-        file_name = openaq_dao.resolve_parameter_file(nearest_location, parameter)
-        if not file_name:
-            measurements[pollutant] = Measurement(None, None, None, None)
-            continue
-        measurements[pollutant] = _latest_measurement(file_name)
-
-    return SensorContext(
-        sensor_id=str(nearest_id),
-        location_name=location_name,
-        latitude=float(nearest_location.get("latitude")),
-        longitude=float(nearest_location.get("longitude")),
-        measurements=measurements,
-    )
+    return load_sensor_context(str(nearest_id), nearest_location)
 
 
 def _tier(value: Optional[float], bins: Iterable[float], labels: Iterable[str]) -> str:
@@ -156,6 +195,13 @@ def _tier(value: Optional[float], bins: Iterable[float], labels: Iterable[str])
     return labels_list[-1]
 
 
+def pollutant_severity(pollutant: str, value: Optional[float]) -> str:
+    """WHO/EPA band of a canonical reading for one of :data:`POLLUTANT_BINS`."""
+
+    bins, labels = POLLUTANT_BINS[pollutant]
+    return _tier(value, bins, labels)
+
+
 def _severity_rank(label: str) -> int:
     try:
         return SEVERITY_ORDER.index(label)
@@ -166,6 +212,8 @@ def _severity_rank(label: str) -> int:
 def _direction(measurement: Measurement) -> str:
     if measurement.value is None:
         return "—"
+    if measurement.trend and measurement.trend.get("direction"):
+        return measurement.trend["direction"]
     if measurement.previous is None:
         return "at current levels"
     delta = measurement.value - measurement.previous
@@ -183,23 +231,75 @@ def _top_pollutants(severities: Dict[str, str], measurements: Dict[str, Measurem
     return [pollutant for pollutant, _ in ranked[:limit]]
 
 
-def _best_window(no2: Optional[float], o3: Optional[float], pm25: Optional[float], rain: Optional[float]) -> str:
-    if o3 is not None and o3 >= 70:
-        return "early morning (before 9am) or evening (after 7pm)"
-    if no2 is not None and no2 >= 10:
-        return "outside of rush hours; late morning or mid-afternoon away from major roads"
-    if pm25 is not None and pm25 >= 15 and (rain or 0) == 0:
+def _forecast(measurement: Optional[Measurement]) -> Optional[float]:
+    if measurement is None or not measurement.trend:
+        return None
+    return measurement.trend.get(f"forecast_{FORECAST_HOURS}h")
+
+
+def _best_window(
+    measurements: Dict[str, Measurement],
+    rain: Optional[float],
+    forecast_window: Optional[Dict[str, Any]] = None,
+    forecast_location: Optional[str] = None,
+) -> str:
+    """Pick when to head out: the cleanest forecast window when there is one, else from current levels and trends."""
+
+    if forecast_window is not None:
+        place = openmeteo_dao.LOCATION_CATALOG.get(forecast_location or "", {}).get("location_name")
+        where = f" in the {place} forecast" if place else " in the forecast"
+        return f"{forecast_window['label']}, the cleanest {forecast_window['hours']}-hour stretch{where}"
+
+    def value(pollutant: str) -> Optional[float]:
+        measurement = measurements.get(pollutant)
+        return measurement.value if measurement else None
+
+    for pollutant, threshold in WINDOW_THRESHOLDS.items():
+        current = value(pollutant)
+        if current is None or current < threshold:
+            continue
+        if pollutant == "PM25" and (rain or 0) != 0:
+            continue
+        forecast = _forecast(measurements.get(pollutant))
+        if forecast is not None and forecast < threshold:
+            return f"in about {FORECAST_HOURS} hours, once {_pollutant_display_name(pollutant)} eases"
+        if pollutant == "O3":
+            return "early morning (before 9am) or evening (after 7pm)"
+        if pollutant == "NO2":
+            return "outside of rush hours; late morning or mid-afternoon away from major roads"
         return "after tonight if rain arrives; otherwise keep outdoor sessions short"
+
+    for pollutant, threshold in WINDOW_THRESHOLDS.items():
+        forecast = _forecast(measurements.get(pollutant))
+        if forecast is not None and forecast >= threshold:
+            return f"now, before {_pollutant_display_name(pollutant)} rises over the next {FORECAST_HOURS} hours"
     return "anytime"
 
 
-def _interest_block(interest: str, *, top_pollutant: str, best_window: str) -> Optional[str]:
+def _trend_note(pollutant: str, measurement: Optional[Measurement]) -> Optional[str]:
+    forecast = _forecast(measurement)
+    if measurement is None or forecast is None or not measurement.trend.get("direction"):
+        return None
+    unit = measurement.unit or canonical_unit(POLLUTANT_PARAMS[pollutant])
+    return (
+        f"Trend: {_pollutant_display_name(pollutant)} is {measurement.trend['direction']}; "
+        f"expect about {forecast:.1f} {unit} over the next {FORECAST_HOURS} hours."
+    )
+
+
+def _interest_block(
+    interest: str,
+    *,
+    top_pollutant: str,
+    best_window: str,
+    trend_note: Optional[str] = None,
+) -> Optional[str]:
     if interest == "health_alerts":
         return f"Health alert: {top_pollutant} is driving today’s risk."
     if interest == "best_time_outdoors":
         return f"Best time outside: {best_window}."
     if interest == "weather_trends" or interest == "trends":
-        return "Trend: Levels are expected to fluctuate with local weather — monitor updates through the day."
+        return trend_note or "Trend: Levels are expected to fluctuate with local weather — monitor updates through the day."
     if interest == "pollution_sources":
         hints = {
             "NO2": "Vehicle traffic and combustion sources",
@@ -225,64 +325,58 @@ def _pollutant_display_name(pollutant: str) -> str:
     return mapping.get(pollutant, pollutant)
 
 
-def generate_insights(
-    *,
-    latitude: float,
-    longitude: float,
-    user_profile: Dict[str, Any],
-    rain_mm: Optional[float] = None,
-) -> Dict[str, Any]:
-    sensor = _nearest_openaq_sensor(latitude, longitude)
-    if sensor is None:
-        return {"status": "error", "message": "No nearby sensors available."}
+SOURCES = [
+    {
+        "label": "WHO Global Air Quality Guidelines (2021)",
+        "url": "https://www.who.int/publications/i/item/9789240034228",
+    },
+    {
+        "label": "U.S. EPA National Ambient Air Quality Standards",
+        "url": "https://www.epa.gov/naaqs",
+    },
+    {
+        "label": "OpenAQ Sensor Network",
+        "url": "https://openaq.org/",
+    },
+]
+
+FOOTERS = [
+    "Units: NO₂/O₃/SO₂ in ppb; PM₂.₅ in µg/m³.",
+    "Thresholds reflect WHO (2021) & U.S. EPA guidance.",
+]
+
+
+@dataclass
+class SensorInsights:
+    """The profile-independent part of an insight payload for one sensor."""
+
+    sensor: SensorContext
+    computed_at: str
+    severities: Dict[str, str]
+    overall: str
+    dominant: Optional[str]
+    headline: str
+    callouts: List[str]
+    evidence: List[str]
+    context: List[str]
+    metrics: List[Dict[str, Any]]
+    sensor_payload: Dict[str, Any]
+    forecast_location: Optional[str] = None  # nearest Open-Meteo export, for best-window lookups
+
+
+@timed("insights.build")
+def build_sensor_insights(sensor: SensorContext) -> SensorInsights:
+    """Tier, rank and describe a sensor's readings; safe to compute ahead of requests."""
 
     severities: Dict[str, str] = {}
-    for pollutant, (bins, labels) in POLLUTANT_BINS.items():
+    for pollutant in POLLUTANT_BINS:
         measurement = sensor.measurements.get(pollutant)
-        value = measurement.value if measurement else None
-        severities[pollutant] = _tier(value, bins, labels)
+        severities[pollutant] = pollutant_severity(pollutant, measurement.value if measurement else None)
 
     overall = max(severities.values(), key=_severity_rank) if severities else "unknown"
     top_pollutants = _top_pollutants(severities, sensor.measurements)
     dominant = top_pollutants[0] if top_pollutants else None
-
-    health_sensitivity = set(user_profile.get("health_sensitivity") or [])
-    activity_type = user_profile.get("activity_type")
-    audience = user_profile.get("audience")
-    interests = list(user_profile.get("interest") or [])
-
-    sensitivity_flags = {
-        "children_family": audience in {"family", "students"},
-        "asthma": "asthma" in health_sensitivity,
-        "heart": "heart_condition" in health_sensitivity,
-        "outdoor_worker": activity_type == "work_outdoors",
-    }
-
     measurements = sensor.measurements
-    pm25_value = measurements.get("PM25").value if measurements.get("PM25") else None
-    no2_value = measurements.get("NO2").value if measurements.get("NO2") else None
-    o3_value = measurements.get("O3").value if measurements.get("O3") else None
-    so2_value = measurements.get("SO2").value if measurements.get("SO2") else None
-
-    advice: List[str] = []
-    if no2_value is not None and no2_value >= 10 and (sensitivity_flags["children_family"] or sensitivity_flags["asthma"]):
-        advice.append("Because you’re checking for kids, avoid stroller time near busy roads; choose parks or residential streets.")
-        if sensitivity_flags["asthma"]:
-            advice.append("If you have asthma, carry your reliever and avoid rush-hour corridors.")
-    if pm25_value is not None and pm25_value >= 15 and sensitivity_flags["heart"]:
-        advice.append("If you have a heart condition, keep exertion light and prefer indoor exercise today.")
-    if o3_value is not None and o3_value >= 70 and activity_type in {"jogging", "cycling"}:
-        advice.append("Shift runs to early morning or evening to avoid ozone peaks.")
-    if sensitivity_flags["outdoor_worker"]:
-        advice.append("Use regular breaks in cleaner indoor air and consider a well-fitting mask during high particle periods.")
-
-    best_window = _best_window(no2_value, o3_value, pm25_value, rain_mm)
-    interest_blocks: List[str] = []
-    if dominant:
-        for interest in interests:
-            block = _interest_block(interest, top_pollutant=dominant, best_window=best_window)
-            if block:
-                interest_blocks.append(block)
 
     callouts: List[str] = []
     evidence: List[str] = []
@@ -294,7 +388,7 @@ def generate_insights(
         if not measurement or measurement.value is None:
             continue
         direction = _direction(measurement)
-        unit = measurement.unit or ("µg/m³" if pollutant == "PM25" else "ppb")
+        unit = measurement.unit or canonical_unit(POLLUTANT_PARAMS[pollutant])
         label = _pollutant_display_name(pollutant)
         callouts.append(f"{label} {measurement.value:.1f} {unit} ({direction}).")
         severity_label = severities.get(pollutant, "")
@@ -316,7 +410,7 @@ def generate_insights(
         if not measurement or measurement.value is None:
             continue
         label = _pollutant_display_name(pollutant)
-        unit = measurement.unit or ("µg/m³" if pollutant.upper().startswith("PM") else "ppb")
+        unit = measurement.unit or canonical_unit(CONTEXT_PARAMS[pollutant])
         table.append(
             {
                 "pollutant": label,
@@ -335,7 +429,7 @@ def generate_insights(
             if not measurement or measurement.value is None:
                 continue
             label = _pollutant_display_name(pollutant)
-            unit = measurement.unit or ("µg/m³" if pollutant.upper().startswith("PM") else "ppb")
+            unit = measurement.unit or canonical_unit(POLLUTANT_PARAMS[pollutant])
             table.append(
                 {
                     "pollutant": label,
@@ -359,41 +453,18 @@ def generate_insights(
         "extreme": "Hazardous air quality — stay indoors if possible.",
     }.get(overall, "Air quality update for {location}.")
 
-    timestamp = datetime.utcnow().isoformat() + "Z"
-
-    sources = [
-        {
-            "label": "WHO Global Air Quality Guidelines (2021)",
-            "url": "https://www.who.int/publications/i/item/9789240034228",
-        },
-        {
-            "label": "U.S. EPA National Ambient Air Quality Standards",
-            "url": "https://www.epa.gov/naaqs",
-        },
-        {
-            "label": "OpenAQ Sensor Network",
-            "url": "https://openaq.org/",
-        },
-    ]
-
-    payload = {
-        "status": "ok",
-        "generated_at": timestamp,
-        "overall_severity": overall,
-        "dominant_pollutant": _pollutant_display_name(dominant) if dominant else None,
-        "headline": severity_headline.format(location=sensor.location_name or "your area"),
-        "callouts": callouts,
-        "evidence": evidence,
-        "metrics": table,
-        "context": context_notes,
-        "advice": advice,
-        "interest": interest_blocks,
-        "best_window": best_window,
-        "footers": [
-            "Units: NO₂/O₃/SO₂ in ppb; PM₂.₅ in µg/m³.",
-            "Thresholds reflect WHO (2021) & U.S. EPA guidance.",
-        ],
-        "sensor": {
+    return SensorInsights(
+        sensor=sensor,
+        computed_at=datetime.utcnow().isoformat() + "Z",
+        severities=severities,
+        overall=overall,
+        dominant=dominant,
+        headline=severity_headline.format(location=sensor.location_name or "your area"),
+        callouts=callouts,
+        evidence=evidence,
+        context=context_notes,
+        metrics=table,
+        sensor_payload={
             "id": sensor.sensor_id,
             "location_name": sensor.location_name,
             "latitude": sensor.latitude,
@@ -404,14 +475,107 @@ def generate_insights(
                     "unit": measurement.unit,
                     "timestamp": measurement.timestamp,
                     "previous": measurement.previous,
+                    "trend": measurement.trend,
                 }
                 for pollutant, measurement in sensor.measurements.items()
             },
         },
-        "sources": sources,
+        forecast_location=_nearest_forecast_location(sensor.latitude, sensor.longitude),
+    )
+
+
+@timed("insights.personalize")
+def personalize_insights(
+    base: SensorInsights,
+    user_profile: Dict[str, Any],
+    rain_mm: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Combine precomputed sensor insights with a quiz profile into the response payload."""
+
+    health_sensitivity = set(user_profile.get("health_sensitivity") or [])
+    activity_type = user_profile.get("activity_type")
+    audience = user_profile.get("audience")
+    interests = list(user_profile.get("interest") or [])
+
+    sensitivity_flags = {
+        "children_family": audience in {"family", "students"},
+        "asthma": "asthma" in health_sensitivity,
+        "heart": "heart_condition" in health_sensitivity,
+        "outdoor_worker": activity_type == "work_outdoors",
     }
 
-    return payload
+    measurements = base.sensor.measurements
+    pm25_value = measurements.get("PM25").value if measurements.get("PM25") else None
+    no2_value = measurements.get("NO2").value if measurements.get("NO2") else None
+    o3_value = measurements.get("O3").value if measurements.get("O3") else None
 
+    advice: List[str] = []
+    if no2_value is not None and no2_value >= 10 and (sensitivity_flags["children_family"] or sensitivity_flags["asthma"]):
+        advice.append("Because you’re checking for kids, avoid stroller time near busy roads; choose parks or residential streets.")
+        if sensitivity_flags["asthma"]:
+            advice.append("If you have asthma, carry your reliever and avoid rush-hour corridors.")
+    if pm25_value is not None and pm25_value >= 15 and sensitivity_flags["heart"]:
+        advice.append("If you have a heart condition, keep exertion light and prefer indoor exercise today.")
+    if o3_value is not None and o3_value >= 70 and activity_type in {"jogging", "cycling"}:
+        advice.append("Shift runs to early morning or evening to avoid ozone peaks.")
+    if sensitivity_flags["outdoor_worker"]:
+        advice.append("Use regular breaks in cleaner indoor air and consider a well-fitting mask during high particle periods.")
+
+    # A lookup in the table precomputed after each Open-Meteo fetch; None once the forecast has run out.
+    forecast_window = forecast_windows.best_window(base.forecast_location) if base.forecast_location else None
+    best_window = _best_window(measurements, rain_mm, forecast_window, base.forecast_location)
+    interest_blocks: List[str] = []
+    if base.dominant:
+        trend_note = _trend_note(base.dominant, measurements.get(base.dominant))
+        for interest in interests:
+            block = _interest_block(interest, top_pollutant=base.dominant, best_window=best_window, trend_note=trend_note)
+            if block:
+                interest_blocks.append(block)
 
-__all__ = ["generate_insights"]
+    return {
+        "status": "ok",
+        "generated_at": base.computed_at,
+        "overall_severity": base.overall,
+        "dominant_pollutant": _pollutant_display_name(base.dominant) if base.dominant else None,
+        "headline": base.headline,
+        "callouts": list(base.callouts),
+        "evidence": list(base.evidence),
+        "metrics": [dict(row) for row in base.metrics],
+        "context": list(base.context),
+        "advice": advice,
+        "interest": interest_blocks,
+        "best_window": best_window,
+        "best_window_forecast": forecast_window,
+        "footers": list(FOOTERS),
+        "sensor": {
+            **base.sensor_payload,
+            "measurements": {key: dict(value) for key, value in base.sensor_payload["measurements"].items()},
+        },
+        "sources": [dict(source) for source in SOURCES],
+    }
+
+
+@timed("insights.generate")
+def generate_insights(
+    *,
+    latitude: float,
+    longitude: float,
+    user_profile: Dict[str, Any],
+    rain_mm: Optional[float] = None,
+) -> Dict[str, Any]:
+    sensor = _nearest_openaq_sensor(latitude, longitude)
+    if sensor is None:
+        return {"status": "error", "message": "No nearby sensors available."}
+    return personalize_insights(build_sensor_insights(sensor), user_profile, rain_mm)
+
+
+__all__ = [
+    "POLLUTANT_PARAMS",
+    "SensorContext",
+    "SensorInsights",
+    "build_sensor_insights",
+    "generate_insights",
+    "load_sensor_context",
+    "personalize_insights",
+    "pollutant_severity",
+]
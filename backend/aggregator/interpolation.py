@@ -0,0 +1,344 @@
+"""Pollutant concentrations between sensors, interpolated from the nearest ones.
+
+Insights otherwise take every reading from the single nearest OpenAQ sensor,
+so a point between two stations reads whichever one is closer.
+:class:`Interpolator` estimates each pollutant instead, using inverse-distance
+weighting (IDW) over the ``k`` nearest sensors that measure it. Far from every
+sensor the estimate leans on the Open-Meteo model at the time of the latest
+reading. The sensor weight is ``exp(-d / AGGREGATOR_INTERPOLATION_BLEND_KM)``,
+where ``d`` is the distance to the nearest sensor.
+
+Surfaces are rebuilt together with the precomputed insights and evaluated once
+over a regular raster covering :data:`GTA_BBOX`. A lookup inside the raster is
+an array index; points outside it are interpolated on demand.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .frame_cache import FileSignature
+    from .insights import POLLUTANT_PARAMS, SensorContext, pollutant_severity
+    from .lazy import lazy_import
+    from .metrics import stage_timer
+    from .openmeteo import data_access as openmeteo_dao
+    from .series import engine
+    from .units import canonical_unit
+except ImportError:  # pragma: no cover - support script execution
+    from frame_cache import FileSignature  # type: ignore
+    from insights import POLLUTANT_PARAMS, SensorContext, pollutant_severity  # type: ignore
+    from lazy import lazy_import  # type: ignore
+    from metrics import stage_timer  # type: ignore
+    from openmeteo import data_access as openmeteo_dao  # type: ignore
+    from series import engine  # type: ignore
+    from units import canonical_unit  # type: ignore
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+NEIGHBOURS = int(os.environ.get("AGGREGATOR_INTERPOLATION_NEIGHBOURS", "6"))
+POWER = 2.0
+# Distance at which sensors and the model weigh roughly 37/63; 0 disables the model blend.
+BLEND_KM = float(os.environ.get("AGGREGATOR_INTERPOLATION_BLEND_KM", "10"))
+GRID_STEP = float(os.environ.get("AGGREGATOR_INTERPOLATION_GRID_STEP", "0.01"))
+GTA_BBOX = (-79.95, 43.40, -78.75, 44.20)  # min_lon, min_lat, max_lon, max_lat
+# Model hours further than this before the latest sensor reading are not blended in.
+MODEL_MAX_LAG_SECONDS = 3 * 3600
+MODEL_PARAMETERS = {"PM25": "pm2_5", "O3": "ozone", "NO2": "nitrogen_dioxide", "SO2": "sulphur_dioxide"}
+# Bound the (points x samples) distance matrix built per chunk.
+MAX_DISTANCE_CELLS = 1_000_000
+
+
+def haversine_km(latitude: Any, longitude: Any, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distance between point(s) and arrays of points; broadcasts like numpy."""
+
+    phi1, phi2 = np.radians(latitude), np.radians(latitudes)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(longitudes) - np.radians(longitude)
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def idw(
+    latitudes: Any,
+    longitudes: Any,
+    sample_latitudes: np.ndarray,
+    sample_longitudes: np.ndarray,
+    sample_values: np.ndarray,
+    k: int = NEIGHBOURS,
+    power: float = POWER,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse-distance weighted estimate at each point from its ``k`` nearest samples.
+
+    Returns the estimates and the distance in km to the nearest sample; both are
+    NaN/inf without samples. A point on top of a sample takes its value.
+    """
+
+    point_lats = np.atleast_1d(np.asarray(latitudes, dtype=float))
+    point_lons = np.atleast_1d(np.asarray(longitudes, dtype=float))
+    estimates = np.full(len(point_lats), np.nan)
+    nearest = np.full(len(point_lats), np.inf)
+    count = len(sample_values)
+    if not count:
+        return estimates, nearest
+
+    k = min(k, count)
+    step = max(1, MAX_DISTANCE_CELLS // count)
+    for start in range(0, len(point_lats), step):
+        stop = start + step
+        distances = haversine_km(
+            point_lats[start:stop, None],
+            point_lons[start:stop, None],
+            sample_latitudes[None, :],
+            sample_longitudes[None, :],
+        )
+        if k < count:
+            index = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            distances = np.take_along_axis(distances, index, axis=1)
+            values = sample_values[index]
+        else:
+            values = np.broadcast_to(sample_values, distances.shape)
+        weights = 1.0 / np.maximum(distances, 1e-6) ** power
+        estimates[start:stop] = (weights * values).sum(axis=1) / weights.sum(axis=1)
+        nearest[start:stop] = distances.min(axis=1)
+    return estimates, nearest
+
+
+def blend(estimates: np.ndarray, nearest_km: np.ndarray, model: np.ndarray, blend_km: float = BLEND_KM) -> np.ndarray:
+    """Mix sensor estimates with model values, trusting sensors less the further away they are."""
+
+    if blend_km <= 0:
+        return estimates
+    weight = np.exp(-nearest_km / blend_km)
+    with np.errstate(invalid="ignore"):
+        mixed = weight * estimates + (1.0 - weight) * model
+    return np.where(np.isfinite(model), np.where(np.isfinite(estimates), mixed, model), estimates)
+
+
+def _epoch(timestamp: Optional[str]) -> Optional[int]:
+    if not timestamp:
+        return None
+    try:
+        parsed = pd.Timestamp(timestamp)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.tz_localize("UTC")
+    return int(parsed.timestamp())
+
+
+def _model_points(pollutant: str, at: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Canonical Open-Meteo values for ``pollutant`` at each modelled location, for the hour at or before ``at``."""
+
+    latitudes: List[float] = []
+    longitudes: List[float] = []
+    values: List[float] = []
+    for slug, location in openmeteo_dao.LOCATION_CATALOG.items():
+        try:
+            series = engine.load_series(engine.SeriesKey("openmeteo", slug, MODEL_PARAMETERS[pollutant]), canonical=True)
+        except engine.SeriesNotFound:
+            continue
+        index = int(np.searchsorted(series.epochs, at, side="right")) - 1
+        if index < 0 or at - int(series.epochs[index]) > MODEL_MAX_LAG_SECONDS or not np.isfinite(series.values[index]):
+            continue
+        latitudes.append(location["latitude"])
+        longitudes.append(location["longitude"])
+        values.append(float(series.values[index]))
+    return np.array(latitudes, dtype=float), np.array(longitudes, dtype=float), np.array(values, dtype=float)
+
+
+@dataclass(frozen=True)
+class Surface:
+    """One pollutant's samples and its raster over the interpolator's bounding box."""
+
+    pollutant: str
+    unit: Optional[str]
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    values: np.ndarray
+    model_latitudes: np.ndarray
+    model_longitudes: np.ndarray
+    model_values: np.ndarray
+    model_time: Optional[int]
+    grid: Optional[np.ndarray] = None  # rows (latitude ascending) × columns (longitude ascending)
+    grid_nearest_km: Optional[np.ndarray] = None
+
+    def evaluate(self, latitudes: Any, longitudes: Any) -> Tuple[np.ndarray, np.ndarray]:
+        """Interpolate at arbitrary points; returns values and distance to the nearest sensor."""
+
+        estimates, nearest = idw(latitudes, longitudes, self.latitudes, self.longitudes, self.values)
+        if len(self.model_values):
+            model, _ = idw(
+                latitudes,
+                longitudes,
+                self.model_latitudes,
+                self.model_longitudes,
+                self.model_values,
+                k=len(self.model_values),
+            )
+            estimates = blend(estimates, nearest, model)
+        return estimates, nearest
+
+
+def build_surface(pollutant: str, sensors: Sequence[SensorContext]) -> Surface:
+    readings = [
+        (sensor.latitude, sensor.longitude, measurement.value, measurement.timestamp)
+        for sensor in sensors
+        if (measurement := sensor.measurements.get(pollutant)) is not None and measurement.value is not None
+    ]
+    epochs = [epoch for epoch in (_epoch(reading[3]) for reading in readings) if epoch is not None]
+    model_time = max(epochs) if epochs else int(time.time())
+    if BLEND_KM > 0:
+        model = _model_points(pollutant, model_time)
+    else:
+        model = (np.empty(0), np.empty(0), np.empty(0))
+    return Surface(
+        pollutant=pollutant,
+        unit=canonical_unit(POLLUTANT_PARAMS[pollutant]),
+        latitudes=np.array([reading[0] for reading in readings], dtype=float),
+        longitudes=np.array([reading[1] for reading in readings], dtype=float),
+        values=np.array([reading[2] for reading in readings], dtype=float),
+        model_latitudes=model[0],
+        model_longitudes=model[1],
+        model_values=model[2],
+        model_time=model_time if len(model[2]) else None,
+    )
+
+
+def _json_value(value: float, digits: int = 3) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+class Interpolator:
+    """Per-pollutant surfaces built from the latest sensor readings, with a precomputed raster."""
+
+    def __init__(self, bbox: Tuple[float, float, float, float] = GTA_BBOX, step: float = GRID_STEP) -> None:
+        self.bbox = bbox
+        self.step = step
+        self.rows = int(round((bbox[3] - bbox[1]) / step)) + 1
+        self.columns = int(round((bbox[2] - bbox[0]) / step)) + 1
+        # Called to build the first surfaces when a lookup arrives before any rebuild.
+        self.loader: Optional[Callable[[], Any]] = None
+        self._lock = Lock()
+        self._rebuild_lock = Lock()
+        self._sensors: List[SensorContext] = []
+        self._surfaces: Dict[str, Surface] = {}
+        # (built at, sensor count) doubles as the ETag/Last-Modified source of grid responses.
+        self.signature: Optional[FileSignature] = None
+        self.last_duration: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.signature is not None
+
+    def rebuild(self, sensors: Optional[Sequence[SensorContext]] = None) -> None:
+        """Rebuild every surface from ``sensors`` (the previous ones when omitted) and the Open-Meteo model."""
+
+        with self._rebuild_lock:
+            sensors = list(self._sensors if sensors is None else sensors)
+            started = time.perf_counter()
+            latitudes = self.bbox[1] + self.step * np.arange(self.rows)
+            longitudes = self.bbox[0] + self.step * np.arange(self.columns)
+            grid_lats, grid_lons = np.meshgrid(latitudes, longitudes, indexing="ij")
+            surfaces: Dict[str, Surface] = {}
+            with stage_timer("interpolation.rebuild"):
+                for pollutant in POLLUTANT_PARAMS:
+                    surface = build_surface(pollutant, sensors)
+                    values, nearest = surface.evaluate(grid_lats.ravel(), grid_lons.ravel())
+                    surfaces[pollutant] = replace(
+                        surface,
+                        grid=values.reshape(self.rows, self.columns),
+                        grid_nearest_km=nearest.reshape(self.rows, self.columns),
+                    )
+            with self._lock:
+                self._sensors = sensors
+                self._surfaces = surfaces
+                self.signature = (time.time_ns(), len(sensors))
+            self.last_duration = time.perf_counter() - started
+            logger.info("Interpolated %d pollutants over a %dx%d grid in %.3fs", len(surfaces), self.rows, self.columns, self.last_duration)
+
+    def _ensure_loaded(self) -> None:
+        if not self.ready and self.loader is not None:
+            self.loader()
+
+    def at_many(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> List[Dict[str, Any]]:
+        """Interpolated pollutants at each point: raster cells inside the box, direct IDW outside it."""
+
+        self._ensure_loaded()
+        with self._lock:
+            surfaces = self._surfaces
+        point_lats = np.asarray(latitudes, dtype=float)
+        point_lons = np.asarray(longitudes, dtype=float)
+        rows = np.rint((point_lats - self.bbox[1]) / self.step).astype(np.int64)
+        columns = np.rint((point_lons - self.bbox[0]) / self.step).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.rows) & (columns >= 0) & (columns < self.columns)
+        rows, columns = np.where(inside, rows, 0), np.where(inside, columns, 0)
+        outside = np.flatnonzero(~inside)
+
+        results: List[Dict[str, Any]] = [{} for _ in range(len(point_lats))]
+        for pollutant, surface in surfaces.items():
+            values = surface.grid[rows, columns]
+            nearest = surface.grid_nearest_km[rows, columns]
+            if len(outside):
+                values[outside], nearest[outside] = surface.evaluate(point_lats[outside], point_lons[outside])
+            for result, value, distance in zip(results, values.tolist(), nearest.tolist()):
+                result[pollutant] = {
+                    "value": _json_value(value),
+                    "unit": surface.unit,
+                    "severity": pollutant_severity(pollutant, value if np.isfinite(value) else None),
+                    "nearest_sensor_km": _json_value(distance, 2),
+                }
+        return results
+
+    def at(self, latitude: float, longitude: float) -> Dict[str, Any]:
+        return self.at_many([latitude], [longitude])[0]
+
+    def grid_payload(self, pollutant: str) -> Dict[str, Any]:
+        """The raster of one pollutant for map overlays; raises ``KeyError`` for an unknown pollutant."""
+
+        self._ensure_loaded()
+        with self._lock:
+            surface = self._surfaces[pollutant]
+            signature = self.signature
+        model_time = surface.model_time
+        return {
+            "pollutant": pollutant,
+            "parameter": POLLUTANT_PARAMS[pollutant],
+            "unit": surface.unit,
+            "bbox": list(self.bbox),
+            "step": self.step,
+            "rows": self.rows,
+            "columns": self.columns,
+            "sensors": len(surface.values),
+            "model_locations": len(surface.model_values),
+            "model_time": (
+                datetime.fromtimestamp(model_time, timezone.utc).isoformat().replace("+00:00", "Z") if model_time else None
+            ),
+            "generated_at": (
+                datetime.fromtimestamp(signature[0] / 1e9, timezone.utc).isoformat().replace("+00:00", "Z") if signature else None
+            ),
+            "values": [[_json_value(value) for value in row] for row in surface.grid.tolist()],
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "grid": [self.rows, self.columns],
+            "sensors": len(self._sensors),
+            "last_duration": self.last_duration,
+        }
+
+
+INTERPOLATOR = Interpolator()
+
+
+__all__ = ["GTA_BBOX", "INTERPOLATOR", "Interpolator", "Surface", "blend", "build_surface", "haversine_km", "idw"]
@@ -0,0 +1,56 @@
+"""Deferred imports for heavy dependencies.
+
+``pandas`` and ``numpy`` together account for most of the aggregator's import
+time. Importing the app, forking a worker or answering ``/ready`` and the AQI
+routes does not need them. Modules therefore bind them with
+:func:`lazy_import`, and the real import happens on first attribute access,
+usually in the startup warmup thread.
+"""
+from __future__ import annotations
+
+import importlib
+import sys
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule(ModuleType):
+    """Stand-in that imports ``name`` on first attribute access.
+
+    After loading, the real module's namespace is copied onto the stand-in, so
+    later lookups are plain attribute hits rather than ``__getattr__`` calls.
+    ``importlib.import_module`` holds the import lock, so concurrent first
+    accesses from the executor and warmup threads are safe.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__.update(module.__dict__)
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._load(), attribute)
+
+    def __dir__(self) -> list:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return ``name`` if already imported, otherwise a :class:`LazyModule` for it."""
+
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+__all__ = ["LazyModule", "lazy_import"]
@@ -0,0 +1,27 @@
+"""Write ``catalog.json`` for the transformed OpenAQ data.
+
+The writer side of :mod:`.catalog`, kept out of the package's import path so
+running it does not import the module it executes. Run it from ``backend/``
+after the CSVs or ``locations.json`` change::
+
+    python -m aggregator.openaq.build_catalog
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import List, Optional
+
+from .catalog import write_catalog
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write catalog.json next to the OpenAQ locations.json.")
+    parser.parse_args(argv)
+    path = write_catalog()
+    print(f"Wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
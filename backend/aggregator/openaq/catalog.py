@@ -0,0 +1,296 @@
+"""Location catalog for the transformed OpenAQ data.
+
+``catalog.json`` sits next to ``locations.json`` and is written at ingest by
+``python -m aggregator.openaq.build_catalog``, which ``openaq/transform.py``
+runs when it finishes.
+For every location it stores the name, coordinates, parameters, first and last
+timestamps, row counts and the latest reading and :mod:`trends` summary per
+parameter. It also records the file signatures it was built from.
+
+The aggregator keeps the catalog in memory. It rereads it when those
+signatures change, and rebuilds it in memory from the CSVs when the file is
+missing or older than the data. ``GET /locations`` is then served without
+opening a CSV per location.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import data_access as dao
+
+try:
+    from ..lazy import lazy_import
+    from ..metrics import timed
+    from ..trends import compute_trend
+    from ..watcher import WATCHER, ChangeEvent
+except ImportError:  # pragma: no cover - support script execution
+    from lazy import lazy_import  # type: ignore
+    from metrics import timed  # type: ignore
+    from trends import compute_trend  # type: ignore
+    from watcher import WATCHER, ChangeEvent  # type: ignore
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILE = "catalog.json"
+# Bumped when entries gain fields; older files are rebuilt rather than served.
+CATALOG_VERSION = 3
+TREND_LOOKBACK_HOURS = 24  # every window in :mod:`trends` fits in the last day
+CATALOG_COLUMNS = (
+    "location_name",
+    "datetimeUtc",
+    "datetimeLocal",
+    "value",
+    "unit",
+    "value_canonical",
+    "unit_canonical",
+)
+
+BoundingBox = Tuple[float, float, float, float]  # min_lon, min_lat, max_lon, max_lat
+
+_CATALOG_LOCK = Lock()
+_CATALOG_STATE: Optional[List[Any]] = None
+_CATALOG: Dict[str, Dict[str, Any]] = {}
+
+
+def catalog_path() -> Path:
+    return dao.TRANSFORMED_DIR / CATALOG_FILE
+
+
+def source_state() -> List[Any]:
+    """:func:`data_access.dataset_state` in the JSON shape stored in the catalog."""
+
+    return [[name, list(signature) if signature else None] for name, signature in dao.dataset_state()]
+
+
+def _json_scalar(value: Any) -> Any:
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def _series_entry(file_name: str) -> Tuple[Optional[str], Dict[str, Any]]:
+    """Summarise one parameter CSV; returns its first location name and the entry."""
+
+    # Through the frame cache, so refreshing after an incremental ingest reparses nothing.
+    frame = dao.load_parameter_frame(file_name, CATALOG_COLUMNS)
+    name = None
+    if "location_name" in frame.columns:
+        name = next((str(value) for value in frame["location_name"].dropna().tolist() if str(value)), None)
+
+    entry: Dict[str, Any] = {"file": file_name, "rows": int(len(frame))}
+    timestamps = frame["datetimeUtc"].dropna() if "datetimeUtc" in frame.columns else None
+    if timestamps is None or timestamps.empty:
+        entry.update(first_timestamp=None, last_timestamp=None, latest=None, trend=None)
+        return name, entry
+
+    # ISO-8601 UTC strings sort chronologically.
+    entry["first_timestamp"] = str(timestamps.min())
+    entry["last_timestamp"] = str(timestamps.max())
+    latest = frame.loc[timestamps.idxmax()]
+    entry["latest"] = {
+        column: _json_scalar(latest[column])
+        for column in ("datetimeUtc", "datetimeLocal", "value", "unit", "value_canonical", "unit_canonical")
+        if column in frame.columns
+    }
+    entry["trend"] = _series_trend(file_name, entry["last_timestamp"])
+    return name, entry
+
+
+def _series_trend(file_name: str, last_timestamp: str) -> Optional[Dict[str, Any]]:
+    """Trend of the canonical readings; only the tail a trend looks at is parsed."""
+
+    measurements = dao.load_measurement_frame(file_name)
+    cutoff = (pd.Timestamp(last_timestamp) - pd.Timedelta(hours=TREND_LOOKBACK_HOURS)).strftime("%Y-%m-%dT%H:%M:%S")
+    # "YYYY-MM-DDTHH:MM:SS" without the zone suffix; UTC strings compare chronologically,
+    # so the tail is found before anything is parsed.
+    stamps = measurements["datetimeUtc"].fillna("").to_numpy(dtype="U19")
+    recent = stamps >= cutoff
+    values = pd.to_numeric(measurements["value_canonical"], errors="coerce").to_numpy(dtype=float)
+    return compute_trend(stamps[recent].astype("datetime64[s]").astype(np.int64), values[recent])
+
+
+def _location_entry(location: Dict[str, Any]) -> Dict[str, Any]:
+    name: Optional[str] = None
+    series: Dict[str, Dict[str, Any]] = {}
+    for file_name in location.get("files", []):
+        if not (dao.TRANSFORMED_DIR / file_name).exists():
+            continue
+        parameter = file_name.split("_")[-1].split(".")[0]
+        file_location_name, entry = _series_entry(file_name)
+        name = name or file_location_name
+        series.setdefault(parameter, entry)
+
+    firsts = [entry["first_timestamp"] for entry in series.values() if entry["first_timestamp"]]
+    lasts = [entry["last_timestamp"] for entry in series.values() if entry["last_timestamp"]]
+    return {
+        **location,
+        "location_name": name,
+        "parameters": dao.list_parameters(location),
+        "first_timestamp": min(firsts) if firsts else None,
+        "last_timestamp": max(lasts) if lasts else None,
+        "rows": sum(entry["rows"] for entry in series.values()),
+        "series": series,
+    }
+
+
+@timed("openaq.build_catalog")
+def build_catalog() -> Dict[str, Any]:
+    state = source_state()
+    locations = dao.load_locations() if dao.LOCATIONS_PATH.exists() else {}
+    return {
+        "version": CATALOG_VERSION,
+        "generated_at": time.time(),
+        "source_state": state,
+        "locations": {str(location_id): _location_entry(location) for location_id, location in locations.items()},
+    }
+
+
+def write_catalog(catalog: Optional[Dict[str, Any]] = None) -> Path:
+    """Replace ``catalog.json`` atomically with ``catalog``, built from the CSVs when not given."""
+
+    catalog = build_catalog() if catalog is None else catalog
+    path = catalog_path()
+    staging = path.with_suffix(".json.tmp")
+    with staging.open("w") as handle:
+        json.dump(catalog, handle, ensure_ascii=False, allow_nan=False)
+    os.replace(staging, path)
+    return path
+
+
+def _read_catalog() -> Optional[Dict[str, Any]]:
+    try:
+        with catalog_path().open() as handle:
+            catalog = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return catalog if isinstance(catalog, dict) and "locations" in catalog else None
+
+
+def load_catalog() -> Dict[str, Dict[str, Any]]:
+    """Return the in-memory catalog, keyed by location id, refreshed when the data changes."""
+
+    global _CATALOG_STATE, _CATALOG
+
+    state = source_state()
+    with _CATALOG_LOCK:
+        if state != _CATALOG_STATE:
+            catalog = _read_catalog()
+            if catalog is None or catalog.get("version") != CATALOG_VERSION or catalog.get("source_state") != state:
+                logger.info("OpenAQ catalog missing or stale; rebuilding it in memory")
+                catalog = build_catalog()
+            _CATALOG = catalog["locations"]
+            _CATALOG_STATE = state
+        return _CATALOG
+
+
+def update_locations(location_ids: Iterable[str]) -> None:
+    """Recompute the entries of ``location_ids`` after new rows were ingested, then persist.
+
+    The other entries are kept as they are. Entries are summarised from the
+    current frames, so running this twice for the same rows is harmless.
+    """
+
+    global _CATALOG_STATE, _CATALOG
+
+    state = source_state()
+    with _CATALOG_LOCK:
+        if _CATALOG_STATE is None:
+            catalog = build_catalog()
+        else:
+            locations = dao.load_locations()
+            entries = dict(_CATALOG)
+            for location_id in location_ids:
+                if location_id in locations:
+                    entries[location_id] = _location_entry(locations[location_id])
+            catalog = {"version": CATALOG_VERSION, "generated_at": time.time(), "source_state": state, "locations": entries}
+        _CATALOG = catalog["locations"]
+        _CATALOG_STATE = catalog["source_state"]
+        write_catalog(catalog)
+
+
+def invalidate() -> None:
+    global _CATALOG_STATE
+    with _CATALOG_LOCK:
+        _CATALOG_STATE = None
+
+
+def _on_change(events: List[ChangeEvent]) -> None:
+    """Recompute the entries of locations whose CSVs changed; a new ``locations.json`` reloads everything."""
+
+    if _CATALOG_STATE is None or source_state() == _CATALOG_STATE:
+        return  # not loaded yet, or already applied (the ingest updates it directly)
+    names = {event.name for event in events}
+    if dao.LOCATIONS_PATH.name in names:
+        invalidate()
+        return
+    changed = [
+        str(location_id)
+        for location_id, location in dao.load_locations().items()
+        if names.intersection(location.get("files", []))
+    ]
+    if changed:
+        update_locations(changed)
+
+
+WATCHER.watch(dao.TRANSFORMED_DIR, _on_change)
+
+
+def parse_bbox(text: str) -> BoundingBox:
+    """Parse ``min_lon,min_lat,max_lon,max_lat``; raises ``ValueError`` when malformed."""
+
+    parts = [float(part) for part in text.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox needs four numbers: min_lon,min_lat,max_lon,max_lat")
+    min_lon, min_lat, max_lon, max_lat = parts
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError("bbox minimums must not exceed maximums")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def filter_locations(
+    catalog: Dict[str, Dict[str, Any]],
+    *,
+    bbox: Optional[BoundingBox] = None,
+    parameters: Sequence[str] = (),
+    name_prefix: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Keep locations inside ``bbox``, offering every one of ``parameters`` and whose name starts with ``name_prefix``."""
+
+    prefix = name_prefix.strip().casefold() if name_prefix else None
+    selected: Dict[str, Dict[str, Any]] = {}
+    for location_id, entry in catalog.items():
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            latitude, longitude = entry.get("latitude"), entry.get("longitude")
+            if latitude is None or longitude is None:
+                continue
+            if not (min_lon <= float(longitude) <= max_lon and min_lat <= float(latitude) <= max_lat):
+                continue
+        if parameters and not set(parameters).issubset(entry.get("parameters", ())):
+            continue
+        if prefix and not (entry.get("location_name") or "").casefold().startswith(prefix):
+            continue
+        selected[location_id] = entry
+    return selected
+
+
+__all__ = [
+    "CATALOG_FILE",
+    "build_catalog",
+    "catalog_path",
+    "filter_locations",
+    "invalidate",
+    "load_catalog",
+    "parse_bbox",
+    "update_locations",
+    "write_catalog",
+]
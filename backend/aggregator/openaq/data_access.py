@@ -4,21 +4,107 @@ from __future__ import annotations
 import csv
 import json
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-import numpy as np
-import pandas as pd
+try:
+    from ..frame_cache import ColumnCache, FileSignature, file_signature
+    from ..lazy import lazy_import
+    from ..metrics import timed
+    from ..records import date_mask
+    from ..serialization import encode_records
+    from ..units import to_canonical
+    from ..watcher import WATCHER, ChangeEvent
+except ImportError:  # pragma: no cover - support script execution
+    from frame_cache import ColumnCache, FileSignature, file_signature  # type: ignore
+    from lazy import lazy_import  # type: ignore
+    from metrics import timed  # type: ignore
+    from records import date_mask  # type: ignore
+    from serialization import encode_records  # type: ignore
+    from units import to_canonical  # type: ignore
+    from watcher import WATCHER, ChangeEvent  # type: ignore
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 AGGREGATOR_ROOT = Path(__file__).resolve().parents[1]
 TRANSFORMED_DIR = AGGREGATOR_ROOT.parent / "openaq" / "transformed"
 LOCATIONS_PATH = TRANSFORMED_DIR / "locations.json"
 
+MEASUREMENT_COLUMNS = ("datetimeUtc", "datetimeLocal", "parameter", "value", "unit")
+CANONICAL_COLUMNS = ("value_canonical", "unit_canonical")
+
+FRAME_CACHE = ColumnCache("openaq")
+
+# ``locations.json`` and the paths of the CSVs it lists, as of the signature it was parsed at.
+_LOCATIONS: Tuple[Optional[FileSignature], Dict[str, Any], Tuple[Tuple[str, Path], ...]] = (None, {}, ())
+
+
+def _on_change(events: List[ChangeEvent]) -> None:
+    """Reparse the cached columns of rewritten CSVs so the next request hits a warm cache."""
+
+    for event in events:
+        if event.name.endswith(".csv"):
+            FRAME_CACHE.apply_change(event.name, event.path, event.signature)
+
+
+WATCHER.watch(TRANSFORMED_DIR, _on_change)
+
 
 def load_locations() -> Dict[str, Any]:
     with LOCATIONS_PATH.open() as handle:
         return json.load(handle)
 
 
+def _current_locations(signature: Optional[FileSignature]) -> Tuple[Dict[str, Any], Tuple[Tuple[str, Path], ...]]:
+    """``locations.json`` and its CSV paths, parsed once per ``signature`` for the per-request ETags.
+
+    The results are shared; callers must not modify them.
+    """
+
+    global _LOCATIONS
+
+    if signature is None:
+        return {}, ()
+    if _LOCATIONS[0] != signature:
+        locations = load_locations()
+        files = tuple(
+            (file_name, TRANSFORMED_DIR / file_name)
+            for location in locations.values()
+            for file_name in location.get("files", [])
+        )
+        _LOCATIONS = (signature, locations, files)
+    return _LOCATIONS[1], _LOCATIONS[2]
+
+
+def dataset_state() -> Tuple[Tuple[str, Optional[FileSignature]], ...]:
+    """Signatures of ``locations.json`` and every CSV it lists; changes after each ingest."""
+
+    signature = file_signature(LOCATIONS_PATH)
+    _, files = _current_locations(signature)
+    return (("locations.json", signature),) + tuple((name, file_signature(path)) for name, path in files)
+
+
+def resource_signatures(
+    location_id: Optional[str] = None,
+    parameter: Optional[str] = None,
+) -> Tuple[Optional[FileSignature], ...]:
+    """Signatures of the files a locations, location or parameter response is built from.
+
+    The location list reads names from the CSVs, so it depends on every file.
+    A location depends on ``locations.json`` only, and a parameter also on its
+    resolved CSV (``None`` when it does not resolve).
+    """
+
+    if location_id is None:
+        return tuple(signature for _, signature in dataset_state())
+    signatures: List[Optional[FileSignature]] = [file_signature(LOCATIONS_PATH)]
+    if parameter is not None:
+        location = _current_locations(signatures[0])[0].get(location_id)
+        file_name = resolve_parameter_file(location, parameter) if location else None
+        signatures.append(file_signature(TRANSFORMED_DIR / file_name) if file_name else None)
+    return tuple(signatures)
+
+
 def get_location_name(location: Dict[str, Any]) -> Optional[str]:
     for file_name in location.get("files", []):
         csv_path = TRANSFORMED_DIR / file_name
@@ -55,9 +141,42 @@ def resolve_parameter_file(location: Dict[str, Any], parameter: str) -> Optional
     return None
 
 
+def load_parameter_frame(file_name: str, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Return the cached frame for ``file_name``, optionally limited to ``columns``."""
+
+    return FRAME_CACHE.load(file_name, TRANSFORMED_DIR / file_name, list(columns) if columns is not None else None)
+
+
+def _with_canonical_units(frame: pd.DataFrame) -> pd.DataFrame:
+    if all(column in frame.columns for column in CANONICAL_COLUMNS):
+        return frame  # already stored in the CSV
+    parameters = frame["parameter"].dropna() if "parameter" in frame.columns else pd.Series(dtype=object)
+    parameter = str(parameters.iloc[0]) if not parameters.empty else ""
+    values, unit = to_canonical(parameter, frame["value"], frame.get("unit"))
+    return frame.assign(value_canonical=values, unit_canonical=unit)
+
+
+@timed("openaq.load_measurement_frame")
+def load_measurement_frame(file_name: str) -> pd.DataFrame:
+    """Return timestamps plus raw and canonical values for ``file_name``.
+
+    Canonical columns come from the CSV when the ingest step wrote them and
+    are otherwise derived once per file version, so callers never convert units
+    on the request path.
+    """
+
+    return FRAME_CACHE.derived(
+        file_name,
+        TRANSFORMED_DIR / file_name,
+        "canonical",
+        MEASUREMENT_COLUMNS + CANONICAL_COLUMNS,
+        _with_canonical_units,
+    )
+
+
+@timed("openaq.load_parameter_records")
 def load_parameter_records(file_name: str) -> List[Dict[str, Any]]:
-    csv_path = TRANSFORMED_DIR / file_name
-    df = pd.read_csv(csv_path)
+    df = load_parameter_frame(file_name)
     df = df.replace([np.inf, -np.inf], np.nan)
     df = df.astype(object)
     df = df.where(pd.notnull(df), None)
@@ -70,11 +189,15 @@ def load_parameter_records(file_name: str) -> List[Dict[str, Any]]:
     return records
 
 
-def filter_records_by_date(records: Iterable[Dict[str, Any]], date: str) -> List[Dict[str, Any]]:
-    prefix = str(date)
-    return [
-        record
-        for record in records
-        if isinstance(record.get("datetimeLocal"), str)
-        and record["datetimeLocal"].startswith(prefix)
-    ]
+@timed("openaq.load_parameter_json")
+def load_parameter_json(file_name: str, date: Optional[str] = None) -> bytes:
+    """Encode the records of :func:`load_parameter_records` straight from the frame's columns.
+
+    With ``date`` only rows whose ``datetimeLocal`` starts with it are kept, as
+    in :func:`records.filter_records_by_date`.
+    """
+
+    frame = load_parameter_frame(file_name)
+    if date is not None:
+        frame = frame[date_mask(frame["datetimeLocal"].tolist(), date)]
+    return encode_records({name: frame[name] for name in frame.columns}, len(frame))
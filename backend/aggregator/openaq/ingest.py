@@ -0,0 +1,369 @@
+"""Polling ingest of new OpenAQ measurements.
+
+Without this, data only changes when someone reruns ``openaq/transform.py``.
+The ingest service polls the OpenAQ v3 API for every location in
+``locations.json``. It resolves each location's sensors once
+(``/v3/locations/{id}``), then fetches measurements newer than the latest row
+of each parameter CSV (``/v3/sensors/{id}/measurements``). The newest gap is
+capped at ``AGGREGATOR_OPENAQ_BACKFILL_HOURS``.
+
+New rows are applied incrementally:
+
+* the CSV is rewritten atomically with the new rows on top, keeping its
+  newest-first order; only the new rows are encoded, and the old rows are
+  copied as bytes;
+* the cached columns in :data:`data_access.FRAME_CACHE` get the same rows
+  spliced in, so nothing is reparsed;
+* the affected catalog entries are recomputed from those frames.
+
+Callbacks in :attr:`OpenAQIngest.on_update`, such as the insight snapshot
+refresh, then run once per cycle that added rows.
+
+The service is enabled in the aggregator with ``AGGREGATOR_OPENAQ_INGEST=1``.
+``AGGREGATOR_OPENAQ_API_URL`` can point it at a stand-in such as
+``python -m benchmarks.upstream_server``. A single cycle can also run from the
+command line::
+
+    python -m aggregator.openaq.ingest --once --api-url http://127.0.0.1:8900
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from . import catalog
+from . import data_access as dao
+
+try:
+    from ..execution import run_blocking
+    from ..frame_cache import file_signature
+    from ..http_client import get_client
+    from ..lazy import lazy_import
+    from ..metrics import UPSTREAM_SECONDS, stage_timer
+    from ..units import to_canonical
+except ImportError:  # pragma: no cover - support script execution
+    from execution import run_blocking  # type: ignore
+    from frame_cache import file_signature  # type: ignore
+    from http_client import get_client  # type: ignore
+    from lazy import lazy_import  # type: ignore
+    from metrics import UPSTREAM_SECONDS, stage_timer  # type: ignore
+    from units import to_canonical  # type: ignore
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("AGGREGATOR_OPENAQ_INGEST", "").strip().lower() in ("1", "true", "yes")
+API_URL = os.environ.get("AGGREGATOR_OPENAQ_API_URL", "https://api.openaq.org").rstrip("/")
+API_KEY = os.environ.get("OPENAQ_API_KEY") or None
+POLL_SECONDS = float(os.environ.get("AGGREGATOR_OPENAQ_POLL_SECONDS", "900"))
+BACKFILL_HOURS = float(os.environ.get("AGGREGATOR_OPENAQ_BACKFILL_HOURS", "48"))
+PAGE_LIMIT = 1000
+MAX_PAGES = 10
+
+
+@dataclass(frozen=True)
+class Reading:
+    datetime_utc: str
+    datetime_local: Optional[str]
+    value: float
+    unit: Optional[str]
+
+
+@dataclass
+class IngestResult:
+    started_at: float
+    duration_ms: float = 0.0
+    rows_added: int = 0
+    files_updated: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "rows_added": self.rows_added,
+            "files_updated": list(self.files_updated),
+            "errors": list(self.errors),
+        }
+
+
+def _utc_iso(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_measurement(item: Dict[str, Any]) -> Optional[Reading]:
+    """Read one ``/v3/sensors/{id}/measurements`` result.
+
+    Hourly OpenAQ readings are labelled with the end of their period, which is
+    also how the CSV exports stamp them.
+    """
+
+    period = item.get("period") or {}
+    stamp = period.get("datetimeTo") or period.get("datetimeFrom") or item.get("datetime") or {}
+    utc = stamp.get("utc")
+    value = item.get("value")
+    if not isinstance(utc, str) or not isinstance(value, (int, float)):
+        return None
+    parameter = item.get("parameter") or {}
+    return Reading(
+        datetime_utc=_utc_iso(datetime.fromisoformat(utc.replace("Z", "+00:00"))),
+        datetime_local=stamp.get("local"),
+        value=float(value),
+        unit=parameter.get("units"),
+    )
+
+
+def latest_timestamp(file_name: str) -> Optional[str]:
+    frame = dao.load_parameter_frame(file_name, ("datetimeUtc",))
+    stamps = frame["datetimeUtc"].dropna() if "datetimeUtc" in frame.columns else None
+    return str(stamps.max()) if stamps is not None and not stamps.empty else None
+
+
+def _new_rows(file_name: str, readings: Sequence[Reading]) -> Tuple[List[str], Optional[str]]:
+    """Return the header and the CSV text of readings newer than the file's latest row, newest first."""
+
+    frame = dao.load_parameter_frame(file_name)
+    header = list(frame.columns)
+    latest = latest_timestamp(file_name)
+    fresh: Dict[str, Reading] = {}
+    for reading in readings:
+        if latest is None or reading.datetime_utc > latest:
+            fresh[reading.datetime_utc] = reading
+    if not fresh or frame.empty:
+        return header, None
+
+    # Static columns (location, coordinates, owner...) repeat the newest existing row.
+    template = frame.iloc[0].to_dict()
+    ordered = [fresh[stamp] for stamp in sorted(fresh, reverse=True)]
+    rows = pd.DataFrame([template] * len(ordered), columns=header)
+    rows["value"] = [reading.value for reading in ordered]
+    rows["unit"] = [reading.unit or template.get("unit") for reading in ordered]
+    rows["datetimeUtc"] = [reading.datetime_utc for reading in ordered]
+    rows["datetimeLocal"] = [reading.datetime_local for reading in ordered]
+    if "value_canonical" in header:
+        values, unit = to_canonical(str(template.get("parameter")), rows["value"], rows["unit"])
+        rows["value_canonical"] = values
+        if "unit_canonical" in header:
+            rows["unit_canonical"] = unit
+    return header, rows.to_csv(header=False, index=False)
+
+
+def append_readings(file_name: str, readings: Sequence[Reading]) -> int:
+    """Add readings newer than the CSV's latest row to the file and the frame cache; returns rows added."""
+
+    path = dao.TRANSFORMED_DIR / file_name
+    with stage_timer("openaq.ingest.append"):
+        header, text = _new_rows(file_name, readings)
+        if text is None:
+            return 0
+        previous = file_signature(path)
+        with path.open("rb") as handle:
+            header_line = handle.readline()
+            body = handle.read()
+        staging = path.with_name(f".{path.name}.tmp")
+        staging.write_bytes(header_line + text.encode("utf-8") + body)
+        os.replace(staging, path)
+
+        added = pd.read_csv(io.StringIO(header_line.decode("utf-8") + text))
+        if list(added.columns) != header:
+            dao.FRAME_CACHE.invalidate(file_name)
+        else:
+            dao.FRAME_CACHE.prepend(file_name, path, added, previous)
+    return len(added)
+
+
+class OpenAQIngest:
+    def __init__(
+        self,
+        api_url: str = API_URL,
+        api_key: Optional[str] = API_KEY,
+        interval: float = POLL_SECONDS,
+        backfill_hours: float = BACKFILL_HOURS,
+    ) -> None:
+        self.api_url = api_url.rstrip("/")
+        self.api_key = api_key
+        self.interval = interval
+        self.backfill_hours = backfill_hours
+        self.on_update: List[Callable[[], Any]] = []
+        self.last_result: Optional[IngestResult] = None
+        self._sensors: Dict[str, Dict[str, int]] = {}
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def _get(self, client: httpx.AsyncClient, path: str, template: str, **params: Any) -> Dict[str, Any]:
+        headers = {"X-API-Key": self.api_key} if self.api_key else None
+        started = time.perf_counter()
+        outcome = "network_error"
+        try:
+            response = await client.get(f"{self.api_url}{path}", params=params or None, headers=headers)
+            outcome = "ok" if response.status_code == 200 else f"http_{response.status_code}"
+            response.raise_for_status()
+            return response.json()
+        finally:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, endpoint=f"{self.api_url}{template}", outcome=outcome)
+
+    async def sensors(self, client: httpx.AsyncClient, location_id: str) -> Dict[str, int]:
+        """Map parameter name to sensor id for ``location_id``; resolved once per process."""
+
+        cached = self._sensors.get(location_id)
+        if cached is None:
+            payload = await self._get(client, f"/v3/locations/{location_id}", "/v3/locations/{id}")
+            cached = {}
+            for result in payload.get("results", []):
+                for sensor in result.get("sensors", []):
+                    name = (sensor.get("parameter") or {}).get("name")
+                    if name and "id" in sensor:
+                        cached.setdefault(str(name), int(sensor["id"]))
+            self._sensors[location_id] = cached
+        return cached
+
+    async def measurements(self, client: httpx.AsyncClient, sensor_id: int, since: str) -> List[Reading]:
+        readings: List[Reading] = []
+        for page in range(1, MAX_PAGES + 1):
+            payload = await self._get(
+                client,
+                f"/v3/sensors/{sensor_id}/measurements",
+                "/v3/sensors/{id}/measurements",
+                datetime_from=since,
+                limit=PAGE_LIMIT,
+                page=page,
+            )
+            results = payload.get("results", [])
+            readings.extend(reading for reading in map(parse_measurement, results) if reading is not None)
+            if len(results) < PAGE_LIMIT:
+                break
+        return readings
+
+    def _since(self, latest: Optional[str]) -> str:
+        floor = _utc_iso(datetime.now(timezone.utc) - timedelta(hours=self.backfill_hours))
+        return max(latest, floor) if latest else floor
+
+    async def poll_once(self, client: Optional[httpx.AsyncClient] = None) -> IngestResult:
+        """Fetch and apply new readings for every location; a failing sensor is logged and skipped."""
+
+        client = client or get_client()
+        result = IngestResult(started_at=time.time())
+        started = time.perf_counter()
+        changed: List[str] = []
+        for location_id, location in dao.load_locations().items():
+            location_id = str(location_id)
+            try:
+                sensors = await self.sensors(client, location_id)
+            except (httpx.HTTPError, ValueError) as exc:
+                result.errors.append(f"location {location_id}: {exc}")
+                continue
+            for parameter in dao.list_parameters(location):
+                file_name = dao.resolve_parameter_file(location, parameter)
+                sensor_id = sensors.get(parameter)
+                if not file_name or sensor_id is None:
+                    continue
+                try:
+                    latest = await run_blocking(latest_timestamp, file_name)
+                    readings = await self.measurements(client, sensor_id, self._since(latest))
+                    added = await run_blocking(append_readings, file_name, readings) if readings else 0
+                except (httpx.HTTPError, ValueError, OSError) as exc:
+                    result.errors.append(f"{file_name}: {exc}")
+                    continue
+                if added:
+                    result.rows_added += added
+                    result.files_updated.append(file_name)
+                    if location_id not in changed:
+                        changed.append(location_id)
+
+        if changed:
+            await run_blocking(catalog.update_locations, changed)
+            for callback in self.on_update:
+                try:
+                    await run_blocking(callback)
+                except Exception:  # pragma: no cover - a failing consumer must not stop ingest
+                    logger.exception("OpenAQ ingest update callback failed")
+        result.duration_ms = (time.perf_counter() - started) * 1000
+        self.last_result = result
+        logger.info(
+            "OpenAQ ingest added %d rows to %d files in %.0fms (%d errors)",
+            result.rows_added,
+            len(result.files_updated),
+            result.duration_ms,
+            len(result.errors),
+        )
+        return result
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except Exception:  # pragma: no cover - keep polling after unexpected failures
+                logger.exception("OpenAQ ingest cycle failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start polling on the running event loop unless already started."""
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="openaq-ingest")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "api_url": self.api_url,
+            "interval_seconds": self.interval,
+            "running": self._task is not None and not self._task.done(),
+            "last_result": self.last_result.summary() if self.last_result else None,
+        }
+
+
+OPENAQ_INGEST = OpenAQIngest()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Poll OpenAQ and append new measurements to the transformed CSVs.")
+    parser.add_argument("--api-url", default=API_URL)
+    parser.add_argument("--once", action="store_true", help="Run a single cycle and exit")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="Seconds between cycles")
+    parser.add_argument("--backfill-hours", type=float, default=BACKFILL_HOURS)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    ingest = OpenAQIngest(args.api_url, API_KEY, args.interval, args.backfill_hours)
+
+    async def run() -> int:
+        async with httpx.AsyncClient(timeout=30) as client:
+            while True:
+                result = await ingest.poll_once(client)
+                if args.once:
+                    return 1 if result.errors and not result.rows_added else 0
+                await asyncio.sleep(args.interval)
+
+    return asyncio.run(run())
+
+
+__all__ = [
+    "OPENAQ_INGEST",
+    "IngestResult",
+    "OpenAQIngest",
+    "Reading",
+    "append_readings",
+    "latest_timestamp",
+    "parse_measurement",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
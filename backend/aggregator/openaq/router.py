@@ -1,57 +1,143 @@
 """FastAPI router exposing OpenAQ-backed endpoints."""
 from __future__ import annotations
 
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Request
 
+from . import catalog
 from . import data_access as dao
 
+try:
+    from ..http_cache import INDEX_CACHE_CONTROL, cached_json
+except ImportError:  # pragma: no cover - support script execution
+    from http_cache import INDEX_CACHE_CONTROL, cached_json  # type: ignore
+
 router = APIRouter(tags=["openaq"])
 
 
-@router.get("/locations")
-def get_locations() -> Dict[str, Any]:
-    locations = dao.load_locations()
-    enriched: Dict[str, Any] = {}
-    for location_id, location in locations.items():
-        enriched[location_id] = {
-            **location,
-            "location_name": dao.get_location_name(location),
+def _catalog_locations(
+    bbox: Optional[catalog.BoundingBox],
+    parameters: List[str],
+    name_prefix: Optional[str],
+) -> Dict[str, Any]:
+    return catalog.filter_locations(
+        catalog.load_catalog(),
+        bbox=bbox,
+        parameters=parameters,
+        name_prefix=name_prefix,
+    )
+
+
+def _catalog_trends(
+    bbox: Optional[catalog.BoundingBox],
+    location_ids: List[str],
+    parameters: List[str],
+) -> Dict[str, Dict[str, Any]]:
+    wanted = set(location_ids)
+    return {
+        location_id: {
+            parameter: entry.get("trend")
+            for parameter, entry in location["series"].items()
+            if not parameters or parameter in parameters
         }
-    return enriched
+        for location_id, location in catalog.filter_locations(catalog.load_catalog(), bbox=bbox).items()
+        if not wanted or location_id in wanted
+    }
 
 
-@router.get("/locations/{location_id}")
-def get_location_parameters(location_id: str) -> Union[List[str], Dict[str, str]]:
+def _location_parameters(location_id: str) -> Union[List[str], Dict[str, str]]:
     locations = dao.load_locations()
     if location_id not in locations:
         return {"error": "Location not found"}
     return dao.list_parameters(locations[location_id])
 
 
-@router.get("/locations/{location_id}/{parameter}")
-def get_location_parameter(location_id: str, parameter: str) -> Union[List[Dict[str, Any]], Dict[str, str]]:
+def _parameter_records(
+    location_id: str,
+    parameter: str,
+    date: Optional[str] = None,
+) -> Union[bytes, Dict[str, str]]:
     locations = dao.load_locations()
     if location_id not in locations:
         return {"error": "Location not found"}
     file_name = dao.resolve_parameter_file(locations[location_id], parameter)
     if not file_name:
         return {"error": "Parameter not found"}
-    return dao.load_parameter_records(file_name)
+    return dao.load_parameter_json(file_name, date)
+
+
+@router.get("/locations")
+async def get_locations(
+    request: Request,
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    parameter: Optional[List[str]] = Query(None, description="Only locations measuring every listed parameter"),
+    name: Optional[str] = Query(None, description="Case-insensitive location name prefix"),
+) -> Dict[str, Any]:
+    try:
+        box = catalog.parse_bbox(bbox) if bbox else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {exc}") from exc
+    return await cached_json(
+        request,
+        dao.resource_signatures(),
+        _catalog_locations,
+        box,
+        parameter or [],
+        name,
+        cache_control=INDEX_CACHE_CONTROL,
+    )
+
+
+@router.get("/trends")
+async def get_trends(
+    request: Request,
+    location: Optional[List[str]] = Query(None, description="Only these location ids"),
+    parameter: Optional[List[str]] = Query(None, description="Only these parameters"),
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+) -> Dict[str, Any]:
+    try:
+        box = catalog.parse_bbox(bbox) if bbox else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {exc}") from exc
+    return await cached_json(
+        request,
+        dao.resource_signatures(),
+        _catalog_trends,
+        box,
+        location or [],
+        parameter or [],
+        cache_control=INDEX_CACHE_CONTROL,
+    )
+
+
+@router.get("/locations/{location_id}")
+async def get_location_parameters(request: Request, location_id: str) -> Union[List[str], Dict[str, str]]:
+    return await cached_json(
+        request,
+        dao.resource_signatures(location_id),
+        _location_parameters,
+        location_id,
+        cache_control=INDEX_CACHE_CONTROL,
+    )
+
+
+@router.get("/locations/{location_id}/{parameter}")
+async def get_location_parameter(
+    request: Request,
+    location_id: str,
+    parameter: str,
+) -> Union[List[Dict[str, Any]], Dict[str, str]]:
+    signatures = dao.resource_signatures(location_id, parameter)
+    return await cached_json(request, signatures, _parameter_records, location_id, parameter)
 
 
 @router.get("/locations/{location_id}/{parameter}/{date}")
-def get_location_parameter_for_date(
+async def get_location_parameter_for_date(
+    request: Request,
     location_id: str,
     parameter: str,
     date: str,
 ) -> Union[List[Dict[str, Any]], Dict[str, str]]:
-    locations = dao.load_locations()
-    if location_id not in locations:
-        return {"error": "Location not found"}
-    file_name = dao.resolve_parameter_file(locations[location_id], parameter)
-    if not file_name:
-        return {"error": "Parameter not found"}
-    records = dao.load_parameter_records(file_name)
-    return dao.filter_records_by_date(records, date)
+    signatures = dao.resource_signatures(location_id, parameter)
+    return await cached_json(request, signatures, _parameter_records, location_id, parameter, date)
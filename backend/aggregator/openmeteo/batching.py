@@ -0,0 +1,176 @@
+"""Coalesce per-coordinate Open-Meteo calls into multi-location async requests.
+
+Open-Meteo accepts comma-separated ``latitude``/``longitude`` lists and answers
+with a JSON array holding one payload per coordinate, in request order. The
+helpers here split coordinates into bounded batches, demultiplex the array back
+onto the caller's coordinates and isolate failures by bisecting a batch that the
+upstream rejects, so one bad coordinate never poisons its neighbours. When the
+upstream is unreachable or failing (transport errors, 5xx, 429), splitting would
+only multiply requests that wait out the same timeout, so the whole batch fails
+at once instead.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+
+try:
+    from ..metrics import UPSTREAM_SECONDS
+except ImportError:  # pragma: no cover - support script execution
+    from metrics import UPSTREAM_SECONDS  # type: ignore
+
+MAX_BATCH_SIZE = 50  # openmeteo/fetch_openmeteo_data.py keeps its own copy for the backfill
+DEFAULT_TIMEOUT = 10
+
+Coordinate = Tuple[float, float]
+
+
+class BatchRequestError(Exception):
+    """Raised when a multi-location request cannot be mapped back to its coordinates."""
+
+
+class UpstreamUnavailable(BatchRequestError):
+    """Raised when the upstream failed regardless of the coordinates asked for."""
+
+
+@dataclass
+class BatchResult:
+    latitude: float
+    longitude: float
+    payload: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.payload is not None
+
+
+def chunked(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    if size < 1:
+        raise ValueError("Batch size must be at least 1")
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _join(values: Sequence[float]) -> str:
+    return ",".join(str(value) for value in values)
+
+
+def demultiplex(payload: Any, expected: int) -> List[Dict[str, Any]]:
+    """Split an Open-Meteo response into one payload per requested coordinate."""
+
+    if isinstance(payload, dict):
+        if payload.get("error"):
+            raise BatchRequestError(str(payload.get("reason") or "Open-Meteo reported an error"))
+        payloads = [payload]
+    elif isinstance(payload, list):
+        payloads = payload
+    else:
+        raise BatchRequestError(f"Unexpected payload type {type(payload).__name__}")
+
+    if len(payloads) != expected:
+        raise BatchRequestError(f"Expected {expected} location payloads, received {len(payloads)}")
+    if not all(isinstance(item, dict) for item in payloads):
+        raise BatchRequestError("Location payloads must be JSON objects")
+    return payloads
+
+
+async def _request_chunk(
+    client: httpx.AsyncClient,
+    url: str,
+    chunk: Sequence[Coordinate],
+    params: Dict[str, Any],
+    timeout: float,
+) -> List[Dict[str, Any]]:
+    query = {
+        **params,
+        "latitude": _join([latitude for latitude, _ in chunk]),
+        "longitude": _join([longitude for _, longitude in chunk]),
+    }
+    started = time.perf_counter()
+    try:
+        response = await client.get(url, params=query, timeout=timeout)
+    except httpx.HTTPError as exc:  # network hiccups
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, endpoint=url, outcome="network_error")
+        raise UpstreamUnavailable(str(exc) or type(exc).__name__) from exc
+
+    UPSTREAM_SECONDS.observe(
+        time.perf_counter() - started,
+        endpoint=url,
+        outcome="ok" if response.is_success else f"http_{response.status_code}",
+    )
+    if response.status_code >= 500 or response.status_code == 429:
+        raise UpstreamUnavailable(f"HTTP {response.status_code}: {response.reason_phrase}")
+    if not response.is_success:
+        raise BatchRequestError(f"HTTP {response.status_code}: {response.reason_phrase}")
+
+    try:
+        payload = response.json()
+    except ValueError as exc:
+        raise BatchRequestError("Response was not valid JSON") from exc
+    return demultiplex(payload, len(chunk))
+
+
+async def _fetch_chunk(
+    client: httpx.AsyncClient,
+    url: str,
+    chunk: Sequence[Coordinate],
+    params: Dict[str, Any],
+    timeout: float,
+) -> List[BatchResult]:
+    try:
+        payloads = await _request_chunk(client, url, chunk, params, timeout)
+    except UpstreamUnavailable as exc:
+        return [BatchResult(latitude, longitude, error=str(exc)) for latitude, longitude in chunk]
+    except BatchRequestError as exc:
+        if len(chunk) == 1:
+            latitude, longitude = chunk[0]
+            return [BatchResult(latitude, longitude, error=str(exc))]
+        # Bisect so a single rejected coordinate only fails itself.
+        middle = len(chunk) // 2
+        left, right = await asyncio.gather(
+            _fetch_chunk(client, url, chunk[:middle], params, timeout),
+            _fetch_chunk(client, url, chunk[middle:], params, timeout),
+        )
+        return left + right
+
+    return [
+        BatchResult(latitude, longitude, payload=payload)
+        for (latitude, longitude), payload in zip(chunk, payloads)
+    ]
+
+
+async def fetch_batched(
+    client: httpx.AsyncClient,
+    url: str,
+    coordinates: Sequence[Coordinate],
+    params: Dict[str, Any],
+    *,
+    max_batch_size: int = MAX_BATCH_SIZE,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> List[BatchResult]:
+    """Fetch ``params`` for every coordinate using as few round trips as possible.
+
+    Batches are issued concurrently. Results are returned in the same order as
+    ``coordinates``; failed coordinates carry an ``error`` instead of a
+    ``payload``.
+    """
+
+    chunks = list(chunked(list(coordinates), max_batch_size))
+    outcomes = await asyncio.gather(*(_fetch_chunk(client, url, chunk, params, timeout) for chunk in chunks))
+    return [result for outcome in outcomes for result in outcome]
+
+
+__all__ = [
+    "BatchRequestError",
+    "BatchResult",
+    "MAX_BATCH_SIZE",
+    "UpstreamUnavailable",
+    "chunked",
+    "demultiplex",
+    "fetch_batched",
+]
@@ -2,15 +2,32 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
-
-import numpy as np
-import pandas as pd
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from ..frame_cache import ColumnCache, FileSignature, file_signature
+    from ..lazy import lazy_import
+    from ..metrics import timed
+    from ..records import date_mask
+    from ..serialization import encode_records
+    from ..watcher import WATCHER, ChangeEvent
+except ImportError:  # pragma: no cover - support script execution
+    from frame_cache import ColumnCache, FileSignature, file_signature  # type: ignore
+    from lazy import lazy_import  # type: ignore
+    from metrics import timed  # type: ignore
+    from records import date_mask  # type: ignore
+    from serialization import encode_records  # type: ignore
+    from watcher import WATCHER, ChangeEvent  # type: ignore
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
 
 AGGREGATOR_ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = AGGREGATOR_ROOT.parent / "openmeteo" / "data"
 BASE_COLUMNS = {"location_name", "time"}
 PROVIDER_NAME = "Open-Meteo"
+TIMEZONE = "America/New_York"  # exports are requested with this timezone; times are naive local
 
 LOCATION_CATALOG: Dict[str, Dict[str, Any]] = {
     "oshawa": {
@@ -79,8 +96,35 @@ def available_location_files() -> Dict[str, Path]:
     }
 
 
-def _read_location_frame(path: Path) -> pd.DataFrame:
-    return pd.read_csv(path)
+def resource_signatures(slug: Optional[str] = None) -> Tuple[Optional[FileSignature], ...]:
+    """Signatures of the files behind one location's responses, or behind the location list.
+
+    The data directory's own signature is included so adding, removing or
+    renaming an export changes the result.
+    """
+
+    files = available_location_files()
+    if slug is not None:
+        path = files.get(slug)
+        return (file_signature(DATA_DIR), file_signature(path) if path else None)
+    return (file_signature(DATA_DIR),) + tuple(file_signature(files[name]) for name in sorted(files))
+
+
+FRAME_CACHE = ColumnCache("openmeteo")
+
+
+def _on_change(events: List[ChangeEvent]) -> None:
+    for event in events:
+        if event.name.endswith(".csv"):
+            FRAME_CACHE.apply_change(Path(event.name).stem, event.path, event.signature)
+
+
+WATCHER.watch(DATA_DIR, _on_change)
+RECORD_COLUMNS = ("time", "location_name")
+
+_METADATA_LOCK = Lock()
+_METADATA_STATE: Optional[Tuple[Tuple[str, FileSignature], ...]] = None
+_METADATA_INDEX: List[Dict[str, Any]] = []
 
 
 def list_parameters(slug: str) -> Optional[List[str]]:
@@ -88,38 +132,58 @@ def list_parameters(slug: str) -> Optional[List[str]]:
     path = files.get(slug)
     if path is None:
         return None
-    frame = pd.read_csv(path, nrows=0)
-    return [column for column in frame.columns if column not in BASE_COLUMNS]
+    return [column for column in FRAME_CACHE.header(slug, path) if column not in BASE_COLUMNS]
+
+
+def _first_location_name(path: Path) -> Optional[str]:
+    frame = pd.read_csv(path, nrows=1, usecols=lambda column: column == "location_name")
+    if frame.empty or "location_name" not in frame.columns:
+        return None
+    value = frame.iloc[0]["location_name"]
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    if pd.notna(value):
+        return str(value)
+    return None
 
 
+def _build_metadata_entry(slug: str, path: Path) -> Dict[str, Any]:
+    catalog_entry = LOCATION_CATALOG.get(slug, {})
+    parameters = [column for column in FRAME_CACHE.header(slug, path) if column not in BASE_COLUMNS]
+    return {
+        "slug": slug,
+        "location_name": _first_location_name(path) or catalog_entry.get("location_name"),
+        "latitude": catalog_entry.get("latitude"),
+        "longitude": catalog_entry.get("longitude"),
+        "parameters": parameters,
+        "filename": path.name,
+    }
+
+
+@timed("openmeteo.load_location_metadata")
 def load_location_metadata() -> List[Dict[str, Any]]:
-    metadata: List[Dict[str, Any]] = []
-    for slug, path in available_location_files().items():
-        frame = _read_location_frame(path)
-        parameters = [column for column in frame.columns if column not in BASE_COLUMNS]
-        catalog_entry = LOCATION_CATALOG.get(slug, {})
-
-        location_name: Optional[str] = None
-        if not frame.empty and "location_name" in frame.columns:
-            value = frame.iloc[0].get("location_name")
-            if isinstance(value, str) and value.strip():
-                location_name = value.strip()
-            elif pd.notna(value):
-                location_name = str(value)
-
-        metadata.append(
-            {
-                "slug": slug,
-                "location_name": location_name or catalog_entry.get("location_name"),
-                "latitude": catalog_entry.get("latitude"),
-                "longitude": catalog_entry.get("longitude"),
-                "parameters": parameters,
-                "filename": path.name,
-            }
-        )
-    return metadata
+    """Return location metadata, reading only CSV headers and first rows.
 
+    The index is built once and reused until a file is added, removed or
+    modified in ``DATA_DIR``.
+    """
 
+    global _METADATA_STATE, _METADATA_INDEX
+
+    files = available_location_files()
+    state = tuple(
+        (slug, signature)
+        for slug, signature in ((slug, file_signature(path)) for slug, path in files.items())
+        if signature is not None
+    )
+    with _METADATA_LOCK:
+        if state != _METADATA_STATE:
+            _METADATA_INDEX = [_build_metadata_entry(slug, files[slug]) for slug, _ in state]
+            _METADATA_STATE = state
+        return [{**entry, "parameters": list(entry["parameters"])} for entry in _METADATA_INDEX]
+
+
+@timed("openmeteo.coerce_records")
 def _coerce_records(frame: pd.DataFrame, parameter: str, slug: str) -> List[Dict[str, Any]]:
     if parameter not in frame.columns:
         return []
@@ -141,20 +205,37 @@ def _coerce_records(frame: pd.DataFrame, parameter: str, slug: str) -> List[Dict
     return records
 
 
+@timed("openmeteo.load_parameter_records")
 def load_parameter_records(slug: str, parameter: str) -> Optional[List[Dict[str, Any]]]:
     files = available_location_files()
     path = files.get(slug)
     if path is None:
         return None
-    frame = _read_location_frame(path)
+    frame = FRAME_CACHE.load(slug, path, RECORD_COLUMNS + (parameter,))
     return _coerce_records(frame, parameter, slug)
 
 
-def filter_records_by_date(records: Iterable[Dict[str, Any]], date: str) -> List[Dict[str, Any]]:
-    prefix = str(date)
-    return [
-        record
-        for record in records
-        if isinstance(record.get("datetimeLocal"), str)
-        and record["datetimeLocal"].startswith(prefix)
-    ]
+@timed("openmeteo.load_parameter_json")
+def load_parameter_json(slug: str, parameter: str, date: Optional[str] = None) -> Optional[bytes]:
+    """Encode the records of :func:`load_parameter_records` straight from the frame's columns."""
+
+    files = available_location_files()
+    path = files.get(slug)
+    if path is None:
+        return None
+    frame = FRAME_CACHE.load(slug, path, RECORD_COLUMNS + (parameter,))
+    if parameter not in frame.columns:
+        return b"[]"
+    if date is not None:
+        frame = frame[date_mask(frame["time"].tolist(), date)]
+    columns = {
+        "datetimeLocal": frame["time"],
+        "location_name": frame["location_name"],
+        "value": frame[parameter],
+        "parameter": parameter,
+        "unit": PARAMETER_UNITS.get(parameter),
+        "provider": PROVIDER_NAME,
+        "location_id": slug,
+        "datetimeUtc": None,
+    }
+    return encode_records(columns, len(frame))
@@ -1,43 +1,122 @@
 """FastAPI router for Open-Meteo datasets."""
 from __future__ import annotations
 
-from typing import Any, Dict, List, Union
+import time
+from typing import Any, Dict, List, Optional, Union
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Request
 
 from . import data_access as dao
+from . import windows
 
-router = APIRouter(prefix="/openmeteo", tags=["openmeteo"])
-
+try:
+    from ..http_cache import INDEX_CACHE_CONTROL, cached_json
+except ImportError:  # pragma: no cover - support script execution
+    from http_cache import INDEX_CACHE_CONTROL, cached_json  # type: ignore
 
-@router.get("/locations")
-def list_locations() -> List[Dict[str, Any]]:
-    return dao.load_location_metadata()
+router = APIRouter(prefix="/openmeteo", tags=["openmeteo"])
 
 
-@router.get("/locations/{location_slug}/parameters")
-def get_location_parameters(location_slug: str) -> Union[List[str], Dict[str, str]]:
+def _location_parameters(location_slug: str) -> Union[List[str], Dict[str, str]]:
     parameters = dao.list_parameters(location_slug)
     if parameters is None:
         return {"error": "Location not found"}
     return parameters
 
 
-@router.get("/locations/{location_slug}/parameters/{parameter}")
-def get_location_parameter(location_slug: str, parameter: str) -> Union[List[Dict[str, Any]], Dict[str, str]]:
-    records = dao.load_parameter_records(location_slug, parameter)
+def _parameter_records(
+    location_slug: str,
+    parameter: str,
+    date: Optional[str] = None,
+) -> Union[bytes, Dict[str, str]]:
+    records = dao.load_parameter_json(location_slug, parameter, date)
     if records is None:
         return {"error": "Location not found"}
     return records
 
 
+@router.get("/locations")
+async def list_locations(request: Request) -> List[Dict[str, Any]]:
+    return await cached_json(
+        request,
+        dao.resource_signatures(),
+        dao.load_location_metadata,
+        cache_control=INDEX_CACHE_CONTROL,
+    )
+
+
+@router.get("/locations/{location_slug}/parameters")
+async def get_location_parameters(request: Request, location_slug: str) -> Union[List[str], Dict[str, str]]:
+    return await cached_json(
+        request,
+        dao.resource_signatures(location_slug),
+        _location_parameters,
+        location_slug,
+        cache_control=INDEX_CACHE_CONTROL,
+    )
+
+
+@router.get("/locations/{location_slug}/parameters/{parameter}")
+async def get_location_parameter(
+    request: Request,
+    location_slug: str,
+    parameter: str,
+) -> Union[List[Dict[str, Any]], Dict[str, str]]:
+    signatures = dao.resource_signatures(location_slug)
+    return await cached_json(request, signatures, _parameter_records, location_slug, parameter)
+
+
 @router.get("/locations/{location_slug}/parameters/{parameter}/{date}")
-def get_location_parameter_for_date(
+async def get_location_parameter_for_date(
+    request: Request,
     location_slug: str,
     parameter: str,
     date: str,
 ) -> Union[List[Dict[str, Any]], Dict[str, str]]:
-    records = dao.load_parameter_records(location_slug, parameter)
-    if records is None:
+    signatures = dao.resource_signatures(location_slug)
+    return await cached_json(request, signatures, _parameter_records, location_slug, parameter, date)
+
+
+def _best_window_payload(location_slug: str, moment: Optional[float], hours: int) -> Dict[str, Any]:
+    forecast = windows.forecast_range(location_slug)
+    if forecast is None:
         return {"error": "Location not found"}
-    return dao.filter_records_by_date(records, date)
+    return {
+        "location": location_slug,
+        "hours": hours,
+        "forecast": {"start": forecast[0], "end": forecast[1], "timezone": dao.TIMEZONE},
+        "window": windows.best_window(location_slug, moment, hours),
+        "days": windows.daily_windows(location_slug, hours),
+    }
+
+
+@router.get("/locations/{location_slug}/best-window")
+async def get_location_best_window(
+    request: Request,
+    location_slug: str,
+    hours: int = Query(windows.DEFAULT_WINDOW_HOURS, description="Window length in hours: 1, 2 or 3"),
+    at: Optional[str] = Query(None, description="ISO datetime to search from (naive values are local); defaults to now"),
+) -> Dict[str, Any]:
+    """Cleanest outdoor windows in the location's 72-hour forecast, read from the precomputed table."""
+
+    if hours not in windows.WINDOW_LENGTHS:
+        raise HTTPException(status_code=400, detail=f"hours must be one of {', '.join(map(str, windows.WINDOW_LENGTHS))}")
+    try:
+        moment = windows.parse_moment(at)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    signatures = dao.resource_signatures(location_slug)
+    if moment is None:
+        # "Now" only moves the answer on the hour: search from the hour's start and
+        # version the response by it, so Last-Modified is never older than the window.
+        moment = float(int(time.time()) // windows.HOUR * windows.HOUR)
+        signatures += ((int(moment) * 1_000_000_000, 0),)
+    return await cached_json(
+        request,
+        signatures,
+        _best_window_payload,
+        location_slug,
+        moment,
+        hours,
+        cache_control=INDEX_CACHE_CONTROL,
+    )
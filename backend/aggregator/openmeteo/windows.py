@@ -0,0 +1,255 @@
+"""Best hours to be outdoors, searched in the Open-Meteo hourly forecasts.
+
+Each export in ``openmeteo/data`` ends with a 72-hour forecast (``forecast_days=3``).
+Every forecast hour gets an exposure score: the sum of PM2.5, ozone and NO2,
+each divided by its :data:`WINDOW_THRESHOLDS` level, plus rain in mm. A window
+costs the mean score of its consecutive daytime hours. For every hour, a
+sliding-window minimum over the window costs then finds the cheapest window
+starting within the next :data:`LOOKAHEAD_HOURS`, and a grouped minimum finds
+the cheapest window of each forecast day.
+
+The resulting table is derived once per file version through the frame cache,
+and rebuilt as soon as the watcher reports a new export. A lookup is a binary
+search for the current hour followed by an index.
+"""
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import data_access as dao
+
+try:
+    from ..lazy import lazy_import
+    from ..units import canonical_unit, to_canonical
+    from ..watcher import WATCHER, ChangeEvent
+except ImportError:  # pragma: no cover - support script execution
+    from lazy import lazy_import  # type: ignore
+    from units import canonical_unit, to_canonical  # type: ignore
+    from watcher import WATCHER, ChangeEvent  # type: ignore
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+HOUR = 3600
+FORECAST_HOURS = 72
+LOOKAHEAD_HOURS = int(os.environ.get("AGGREGATOR_BEST_WINDOW_LOOKAHEAD_HOURS", "24"))
+WINDOW_LENGTHS = (1, 2, 3)
+DEFAULT_WINDOW_HOURS = 2
+DAYTIME = (6, 22)  # windows start at or after 6:00 and end by 22:00 local time
+RAIN_WEIGHT = 1.0  # exposure units per mm of rain in an hour
+
+# Levels above which outdoor time is worth planning around, in canonical units.
+WINDOW_THRESHOLDS = {"O3": 70.0, "NO2": 10.0, "PM25": 15.0}
+FORECAST_COLUMNS = {"PM25": "pm2_5", "O3": "ozone", "NO2": "nitrogen_dioxide"}
+TABLE_COLUMNS = ("time",) + tuple(FORECAST_COLUMNS.values()) + ("rain",)
+
+
+def sliding_minimum(costs: np.ndarray, span: int) -> np.ndarray:
+    """Index of the smallest cost in ``costs[i : i + span]`` for every ``i``; ``-1`` when all are infinite.
+
+    Ties go to the earliest index.
+    """
+
+    if not len(costs):
+        return np.empty(0, dtype=np.int64)
+    padded = np.concatenate([costs, np.full(span - 1, np.inf)])
+    views = np.lib.stride_tricks.sliding_window_view(padded, span)
+    best = views.argmin(axis=1) + np.arange(len(costs))
+    return np.where(np.isfinite(costs[best]), best, -1)
+
+
+def window_costs(exposure: np.ndarray, epochs: np.ndarray, hours: np.ndarray, length: int) -> np.ndarray:
+    """Mean exposure of the ``length``-hour window starting at each hour; infinite where it is not allowed.
+
+    A window must cover consecutive hours with a finite score and lie within :data:`DAYTIME`.
+    """
+
+    count = len(exposure)
+    costs = np.full(count, np.inf)
+    if count < length:
+        return costs
+    starts = count - length + 1
+    finite = np.isfinite(exposure)
+    totals = np.concatenate([[0.0], np.cumsum(np.where(finite, exposure, 0.0))])
+    valid = np.concatenate([[0], np.cumsum(finite)])
+    sums = totals[length:] - totals[:-length]
+    complete = (valid[length:] - valid[:-length]) == length
+    contiguous = epochs[length - 1 :] - epochs[:starts] == (length - 1) * HOUR
+    daytime = (hours[:starts] >= DAYTIME[0]) & (hours[:starts] + length <= DAYTIME[1])
+    allowed = complete & contiguous & daytime
+    costs[:starts] = np.where(allowed, sums / length, np.inf)
+    return costs
+
+
+def _clock(hour: int) -> str:
+    hour %= 24
+    suffix = "am" if hour < 12 else "pm"
+    return f"{hour % 12 or 12}{suffix}"
+
+
+def _describe(columns: Dict[str, np.ndarray], start: int, length: int) -> Dict[str, Any]:
+    first = datetime.strptime(columns["time"][start], "%Y-%m-%dT%H:%M")
+    end = first + timedelta(hours=length)
+    levels = {pollutant: columns[pollutant][start : start + length] for pollutant in FORECAST_COLUMNS}
+    return {
+        "start": first.strftime("%Y-%m-%dT%H:%M"),
+        "end": end.strftime("%Y-%m-%dT%H:%M"),
+        "hours": length,
+        "label": f"{first.strftime('%a')} {_clock(first.hour)}–{_clock(end.hour)}",
+        "exposure": round(float(columns["exposure"][start : start + length].mean()), 3),
+        "levels": {
+            pollutant: {"value": round(float(values.mean()), 2), "unit": canonical_unit(FORECAST_COLUMNS[pollutant])}
+            for pollutant, values in levels.items()
+            if np.isfinite(values).all()
+        },
+        "rain_mm": round(float(np.nansum(columns["rain"][start : start + length])), 2),
+    }
+
+
+def build_table(frame: pd.DataFrame) -> pd.DataFrame:
+    """Per forecast hour: canonical levels, exposure, and the best window start for each length."""
+
+    frame = frame.tail(FORECAST_HOURS).reset_index(drop=True)
+    local = pd.to_datetime(frame["time"], errors="coerce")
+    utc = local.dt.tz_localize(dao.TIMEZONE, ambiguous="NaT", nonexistent="shift_forward").dt.tz_convert("UTC")
+    keep = utc.notna().to_numpy()
+    frame, local, utc = frame[keep].reset_index(drop=True), local[keep].reset_index(drop=True), utc[keep]
+    epochs = ((utc - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+    table = pd.DataFrame({"epoch": epochs, "time": local.dt.strftime("%Y-%m-%dT%H:%M").to_numpy()})
+    exposure = np.zeros(len(frame))
+    for pollutant, column in FORECAST_COLUMNS.items():
+        if column in frame.columns:
+            values, _ = to_canonical(column, frame[column], dao.PARAMETER_UNITS.get(column))
+        else:
+            values = np.full(len(frame), np.nan)
+        table[pollutant] = values
+        exposure += values / WINDOW_THRESHOLDS[pollutant]
+    rain = pd.to_numeric(frame["rain"], errors="coerce").to_numpy(dtype=float) if "rain" in frame.columns else np.zeros(len(frame))
+    table["rain"] = rain
+    exposure += RAIN_WEIGHT * np.nan_to_num(rain, nan=0.0)
+    table["exposure"] = exposure
+
+    columns = {name: table[name].to_numpy() for name in ("time", "exposure", "rain", *FORECAST_COLUMNS)}
+    hours = local.dt.hour.to_numpy()
+    days = local.dt.strftime("%Y-%m-%d").to_numpy()
+    for length in WINDOW_LENGTHS:
+        costs = window_costs(exposure, epochs, hours, length)
+        best = sliding_minimum(costs, max(1, LOOKAHEAD_HOURS - length + 1))
+        daily = pd.Series(costs).groupby(days).transform("idxmin").to_numpy(dtype=np.int64)
+        daily = np.where(np.isfinite(costs[daily]), daily, -1)
+        table[f"cost_{length}h"] = costs
+        table[f"best_{length}h"] = best
+        table[f"day_{length}h"] = daily
+        # Describe every window a lookup can return now, so requests only copy a dict.
+        summaries = np.full(len(table), None, dtype=object)
+        for start in np.union1d(best[best >= 0], daily[daily >= 0]).tolist():
+            summaries[start] = _describe(columns, start, length)
+        table[f"window_{length}h"] = summaries
+    return table
+
+
+def load_table(slug: str) -> Optional[pd.DataFrame]:
+    """The precomputed window table of ``slug``, or ``None`` without an export."""
+
+    path = dao.available_location_files().get(slug)
+    if path is None:
+        return None
+    return dao.FRAME_CACHE.derived(slug, path, "best_windows", TABLE_COLUMNS, build_table)
+
+
+def _check_hours(hours: int) -> None:
+    if hours not in WINDOW_LENGTHS:
+        raise ValueError(f"hours must be one of {', '.join(str(length) for length in WINDOW_LENGTHS)}")
+
+
+def parse_moment(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds of an ISO datetime; naive values are local to the exports' timezone."""
+
+    if value is None or not value.strip():
+        return None
+    timestamp = pd.Timestamp(value.strip())
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(dao.TIMEZONE)
+    return timestamp.timestamp()
+
+
+def _copy(slug: str, window: Dict[str, Any]) -> Dict[str, Any]:
+    """A caller-owned copy of a cached window summary."""
+
+    return {"location": slug, **window, "levels": {key: dict(level) for key, level in window["levels"].items()}}
+
+
+def best_window(slug: str, at: Optional[float] = None, hours: int = DEFAULT_WINDOW_HOURS) -> Optional[Dict[str, Any]]:
+    """Cheapest ``hours``-long window starting within the lookahead of ``at`` (now by default).
+
+    Returns ``None`` when ``at`` is past the forecast or no daytime window is left in it.
+    """
+
+    _check_hours(hours)
+    table = load_table(slug)
+    if table is None or table.empty:
+        return None
+    epochs = table["epoch"].to_numpy()
+    moment = time.time() if at is None else at
+    if moment >= epochs[-1] + HOUR:
+        return None
+    index = max(0, int(np.searchsorted(epochs, moment, side="right")) - 1)
+    start = int(table[f"best_{hours}h"].iat[index])
+    return _copy(slug, table[f"window_{hours}h"].iat[start]) if start >= 0 else None
+
+
+def daily_windows(slug: str, hours: int = DEFAULT_WINDOW_HOURS) -> List[Dict[str, Any]]:
+    """Cheapest ``hours``-long window of every forecast day that has one."""
+
+    _check_hours(hours)
+    table = load_table(slug)
+    if table is None or table.empty:
+        return []
+    windows = table[f"window_{hours}h"].to_numpy()
+    return [_copy(slug, windows[start]) for start in table[f"day_{hours}h"].unique().tolist() if start >= 0]
+
+
+def forecast_range(slug: str) -> Optional[Tuple[str, str]]:
+    """First and last local forecast hour of ``slug``."""
+
+    table = load_table(slug)
+    if table is None or table.empty:
+        return None
+    return str(table["time"].iat[0]), str(table["time"].iat[-1])
+
+
+def refresh() -> List[str]:
+    """Build the table of every export; returns the slugs built."""
+
+    return [slug for slug in sorted(dao.available_location_files()) if load_table(slug) is not None]
+
+
+def _on_change(events: List[ChangeEvent]) -> None:
+    """Rebuild the tables of fetched exports right away so requests never pay for it."""
+
+    for event in events:
+        if event.name.endswith(".csv") and event.signature is not None:
+            load_table(event.name[: -len(".csv")])
+
+
+WATCHER.watch(dao.DATA_DIR, _on_change)
+
+
+__all__ = [
+    "DEFAULT_WINDOW_HOURS",
+    "WINDOW_LENGTHS",
+    "WINDOW_THRESHOLDS",
+    "best_window",
+    "build_table",
+    "daily_windows",
+    "forecast_range",
+    "load_table",
+    "parse_moment",
+    "refresh",
+    "sliding_minimum",
+    "window_costs",
+]
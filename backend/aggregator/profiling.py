@@ -0,0 +1,195 @@
+"""Opt-in cProfile capture for individual requests.
+
+A request is profiled when it carries an ``X-Profile`` header matching
+``AGGREGATOR_PROFILE_TOKEN`` or is picked by ``AGGREGATOR_PROFILE_SAMPLE_RATE``.
+Without a token only sampling is available, and the debug endpoints stay hidden. Route handlers hand their pandas-heavy
+work to the bounded executor, so profiling happens inside each executor job:
+:func:`profiled` wraps the job when the calling request is being profiled. The
+last ``AGGREGATOR_PROFILE_HISTORY`` profiles are kept in memory for the debug
+endpoints.
+"""
+from __future__ import annotations
+
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Deque, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_TOKEN = os.environ.get("AGGREGATOR_PROFILE_TOKEN") or None
+SAMPLE_RATE = float(os.environ.get("AGGREGATOR_PROFILE_SAMPLE_RATE", "0"))
+MAX_PROFILES = int(os.environ.get("AGGREGATOR_PROFILE_HISTORY", "20"))
+SORT_KEYS = ("cumulative", "tottime", "ncalls")
+
+_ids = itertools.count(1)
+
+
+@dataclass
+class RequestProfile:
+    id: int
+    method: str
+    path: str
+    trigger: str
+    started_at: float = field(default_factory=time.time)
+    route: Optional[str] = None
+    status: Optional[int] = None
+    duration_ms: Optional[float] = None
+    _profiles: List[cProfile.Profile] = field(default_factory=list, repr=False)
+    _lock: Lock = field(default_factory=Lock, repr=False)
+
+    def add(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    @property
+    def jobs(self) -> int:
+        with self._lock:
+            return len(self._profiles)
+
+    def stats(self) -> Optional[pstats.Stats]:
+        """Merge the per-job profiles; jobs finishing after the response (streamed bodies) are included."""
+
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0], stream=io.StringIO())
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def report(self, sort: str = "cumulative", limit: int = 40) -> str:
+        stats = self.stats()
+        if stats is None:
+            return "No executor work was recorded for this request.\n"
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def dump(self) -> bytes:
+        """Serialise in the ``pstats`` file format so ``pstats.Stats(path)`` or snakeviz can load it."""
+
+        stats = self.stats()
+        return marshal.dumps(stats.stats if stats is not None else {})
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "executor_jobs": self.jobs,
+        }
+
+
+_ACTIVE: ContextVar[Optional[RequestProfile]] = ContextVar("aggregator_request_profile", default=None)
+
+
+class ProfileStore:
+    def __init__(self, capacity: int = MAX_PROFILES) -> None:
+        self._profiles: Deque[RequestProfile] = deque(maxlen=max(1, capacity))
+        self._lock = Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> List[RequestProfile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[RequestProfile]:
+        with self._lock:
+            return next((profile for profile in self._profiles if profile.id == profile_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+PROFILE_STORE = ProfileStore()
+
+
+def authorized(header_value: Optional[str]) -> bool:
+    """Whether ``header_value`` may trigger profiling or read stored profiles; never without a configured token."""
+
+    if header_value is None or not PROFILE_TOKEN:
+        return False
+    return hmac.compare_digest(header_value.encode(), PROFILE_TOKEN.encode())
+
+
+def trigger_for(header_value: Optional[str]) -> Optional[str]:
+    if authorized(header_value):
+        return "header"
+    if SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+def begin(method: str, path: str, trigger: str) -> RequestProfile:
+    profile = RequestProfile(id=next(_ids), method=method, path=path, trigger=trigger)
+    _ACTIVE.set(profile)
+    return profile
+
+
+def finish(profile: RequestProfile, *, route: Optional[str], status: int, duration: float) -> None:
+    profile.route = route
+    profile.status = status
+    profile.duration_ms = duration * 1000
+    PROFILE_STORE.add(profile)
+
+
+def profiled(fn: Callable[..., T]) -> Callable[..., T]:
+    """Return ``fn`` wrapped to record a cProfile into the active request profile, if any."""
+
+    active = _ACTIVE.get()
+    if active is None:
+        return fn
+
+    @wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            active.add(profile)
+
+    return wrapper
+
+
+__all__ = [
+    "MAX_PROFILES",
+    "PROFILE_HEADER",
+    "PROFILE_ID_HEADER",
+    "PROFILE_STORE",
+    "ProfileStore",
+    "RequestProfile",
+    "SAMPLE_RATE",
+    "SORT_KEYS",
+    "authorized",
+    "begin",
+    "finish",
+    "profiled",
+    "trigger_for",
+]
@@ -0,0 +1,29 @@
+"""Date filtering shared by the OpenAQ and Open-Meteo record responses.
+
+Both sources serve ``datetimeLocal`` as a local ISO string, so the ``date``
+path segment (``YYYY``, ``YYYY-MM`` or ``YYYY-MM-DD``) is a string prefix.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List
+
+
+def _on_date(value: Any, prefix: str) -> bool:
+    return isinstance(value, str) and value.startswith(prefix)
+
+
+def date_mask(values: Iterable[Any], date: str) -> List[bool]:
+    """Whether each local timestamp in ``values`` falls on ``date``; non-strings never do."""
+
+    prefix = str(date)
+    return [_on_date(value, prefix) for value in values]
+
+
+def filter_records_by_date(records: Iterable[Dict[str, Any]], date: str) -> List[Dict[str, Any]]:
+    """The records whose ``datetimeLocal`` falls on ``date``."""
+
+    prefix = str(date)
+    return [record for record in records if _on_date(record.get("datetimeLocal"), prefix)]
+
+
+__all__ = ["date_mask", "filter_records_by_date"]
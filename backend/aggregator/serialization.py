@@ -0,0 +1,61 @@
+"""JSON encoding straight to bytes for large dataset payloads.
+
+Routes returning plain lists of dicts go through FastAPI's ``jsonable_encoder``
+and then ``json.dumps``. Building those dicts from a DataFrame
+(``astype(object)``, ``where(notnull)``, ``to_dict``) costs more than the
+encoding itself. :func:`encode_records` turns columns into records with
+``tolist`` and ``zip`` and encodes them in one call. It uses ``orjson`` (listed
+in ``requirements.txt``), which writes NaN and infinities as ``null``. Without
+it, the standard library produces the same output more slowly.
+"""
+from __future__ import annotations
+
+import json
+import math
+from itertools import repeat
+from typing import Any, Iterable, List, Mapping
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - slower standard-library fallback
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode compactly as UTF-8, like Starlette's ``JSONResponse``.
+
+    ``orjson`` writes NaN as ``null`` where the fallback raises ``ValueError``.
+    """
+
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _finite_or_none(values: List[Any]) -> List[Any]:
+    return [None if isinstance(value, float) and not math.isfinite(value) else value for value in values]
+
+
+def _column_values(column: Any, length: int) -> Iterable[Any]:
+    if hasattr(column, "tolist"):
+        values = column.tolist()
+        return values if orjson is not None else _finite_or_none(values)
+    if isinstance(column, float) and not math.isfinite(column):
+        column = None
+    return repeat(column, length)
+
+
+def encode_records(columns: Mapping[str, Any], length: int) -> bytes:
+    """Encode ``length`` records whose fields come from ``columns``, in mapping order.
+
+    Each value is either an array-like (a pandas ``Series`` or NumPy array) of
+    ``length`` items or a scalar repeated in every record. Missing and
+    non-finite values become ``null``.
+    """
+
+    names = list(columns)
+    values = [_column_values(column, length) for column in columns.values()]
+    return dumps([dict(zip(names, row)) for row in zip(*values)])
+
+
+__all__ = ["dumps", "encode_records"]
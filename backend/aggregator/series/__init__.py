@@ -0,0 +1,5 @@
+"""Unified time-series query package."""
+
+from .router import router
+
+__all__ = ["router"]
@@ -0,0 +1,287 @@
+"""Time-aligned statistics across the locations of one parameter.
+
+``GET /series/aggregate`` answers questions such as "mean and max PM2.5
+across GTA sensors per hour" without the client fetching every series. The
+selected locations are stacked into a ``locations × time`` matrix of bucket
+averages. Each requested statistic is then one NaN-aware reduction over the
+location axis.
+
+The stack is cached per dataset version, so other statistics or time windows
+over the same selection only slice and reduce. Responses are additionally
+cached as bytes by :func:`http_cache.cached_json`.
+"""
+from __future__ import annotations
+
+import re
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from . import engine
+from .storage import STORAGE
+
+try:
+    from ..frame_cache import FileSignature
+    from ..lazy import lazy_import
+    from ..metrics import stage_timer, timed
+    from ..openaq import catalog as openaq_catalog
+    from ..units import to_canonical
+except ImportError:  # pragma: no cover - support script execution
+    from frame_cache import FileSignature  # type: ignore
+    from lazy import lazy_import  # type: ignore
+    from metrics import stage_timer, timed  # type: ignore
+    from openaq import catalog as openaq_catalog  # type: ignore
+    from units import to_canonical  # type: ignore
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+BoundingBox = Tuple[float, float, float, float]  # min_lon, min_lat, max_lon, max_lat
+
+STATISTICS = ("mean", "min", "max", "median", "count")
+DEFAULT_STATISTICS = ("mean", "max", "count")
+DEFAULT_RESOLUTION = 3600
+MAX_CACHED_STACKS = 32
+_PERCENTILE = re.compile(r"^p(\d{1,2}(?:\.\d+)?|100)$")
+
+
+class NoLocations(LookupError):
+    """Raised when no location of the source measures the parameter within the selection."""
+
+
+@dataclass(frozen=True)
+class Stack:
+    locations: Tuple[str, ...]
+    unit: Optional[str]
+    timestamps: np.ndarray  # bucket start, UTC epoch seconds
+    values: np.ndarray  # locations × timestamps bucket averages, NaN where a location has no reading
+
+
+def parse_statistic(name: str) -> Tuple[str, Optional[float]]:
+    """Validate ``mean``, ``min``, ``max``, ``median``, ``count`` or a percentile such as ``p90``."""
+
+    text = name.strip().lower()
+    if text in STATISTICS:
+        return text, None
+    match = _PERCENTILE.match(text)
+    if match is None:
+        raise ValueError(f"Unknown statistic '{name}'; use {', '.join(STATISTICS)} or p0-p100")
+    return text, float(match.group(1))
+
+
+def _inside(bbox: Optional[BoundingBox], latitude: Any, longitude: Any) -> bool:
+    if bbox is None:
+        return True
+    if latitude is None or longitude is None:
+        return False
+    min_lon, min_lat, max_lon, max_lat = bbox
+    return min_lon <= float(longitude) <= max_lon and min_lat <= float(latitude) <= max_lat
+
+
+def select_locations(
+    source: str,
+    parameter: str,
+    bbox: Optional[BoundingBox] = None,
+    location_ids: Sequence[str] = (),
+) -> List[str]:
+    """Locations of ``source`` measuring ``parameter``, inside ``bbox`` and among ``location_ids`` when given."""
+
+    if source == "openaq":
+        entries = openaq_catalog.filter_locations(openaq_catalog.load_catalog(), bbox=bbox, parameters=[parameter])
+        candidates = list(entries)
+    elif source == "openmeteo":
+        candidates = [
+            slug
+            for slug in engine.openmeteo_dao.available_location_files()
+            if parameter in (engine.openmeteo_dao.list_parameters(slug) or [])
+            and _inside(
+                bbox,
+                engine.openmeteo_dao.LOCATION_CATALOG.get(slug, {}).get("latitude"),
+                engine.openmeteo_dao.LOCATION_CATALOG.get(slug, {}).get("longitude"),
+            )
+        ]
+    elif source == "tempo":
+        if parameter not in engine.tempo_dao.list_parameters():
+            return []
+        candidates = [
+            cell["location"]
+            for cell in engine.tempo_dao.list_cells(parameter)
+            if _inside(bbox, cell["latitude"], cell["longitude"])
+        ]
+    else:
+        raise ValueError(f"Unknown source '{source}'")
+    if location_ids:
+        wanted = set(location_ids)
+        candidates = [location for location in candidates if location in wanted]
+    return sorted(candidates)
+
+
+def dataset_signatures(source: str, parameter: str) -> Tuple[Optional[FileSignature], ...]:
+    """Signatures of every file an aggregate over ``source``/``parameter`` can read."""
+
+    if source == "openaq":
+        return engine.openaq_dao.resource_signatures()
+    if source == "openmeteo":
+        return engine.openmeteo_dao.resource_signatures()
+    if source == "tempo":
+        return tuple(signature for _, signature in engine.tempo_dao.snapshot_state(parameter))
+    raise ValueError(f"Unknown source '{source}'")
+
+
+def _stack_series(
+    source: str, parameter: str, locations: Sequence[str], resolution: int, canonical: bool
+) -> Tuple[Optional[str], np.ndarray, np.ndarray]:
+    keys = [engine.SeriesKey(source, location, parameter) for location in locations]
+    loaded = STORAGE.load(keys, resolution=resolution, canonical=canonical)
+    # A location whose series failed to load keeps its row, all NaN.
+    series = [
+        item if isinstance(item, engine.Series) else engine.Series(key, None, np.empty(0, dtype=np.int64), np.empty(0))
+        for key, item in ((key, loaded[key]) for key in keys)
+    ]
+    units = {item.unit for item in series if item.unit is not None}
+    if len(units) > 1:
+        raise ValueError(f"Locations report {parameter} in different units ({', '.join(sorted(units))}); use canonical=true")
+    timestamps, columns = engine.align(series, resolution)
+    matrix = np.vstack(columns) if columns else np.empty((0, len(timestamps)))
+    return (units.pop() if units else None), timestamps, matrix
+
+
+def _stack_tempo(
+    parameter: str, locations: Sequence[str], resolution: int, canonical: bool
+) -> Tuple[Optional[str], np.ndarray, np.ndarray]:
+    """Pivot the stacked TEMPO frame directly; thousands of cells would be slow one series at a time."""
+
+    frame = engine.tempo_dao.load_parameter_frame(parameter)
+    frame = frame[frame["location"].isin(locations)]
+    values = frame["value"].to_numpy(dtype=float)
+    present = frame["unit"].dropna()
+    unit = str(present.iloc[0]) if not present.empty else None
+    if canonical:
+        values, unit = to_canonical(parameter, values, frame["unit"])
+    buckets = (frame["epoch"].to_numpy(dtype=np.int64) // resolution) * resolution
+    timestamps, columns = np.unique(buckets, return_inverse=True)
+    rows = pd.Categorical(frame["location"], categories=list(locations)).codes
+    finite = np.isfinite(values)
+    shape = (len(locations), len(timestamps))
+    sums = np.zeros(shape)
+    counts = np.zeros(shape)
+    np.add.at(sums, (rows[finite], columns[finite]), values[finite])
+    np.add.at(counts, (rows[finite], columns[finite]), 1.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        matrix = np.where(counts > 0, sums / counts, np.nan)
+    return unit, timestamps.astype(np.int64), matrix
+
+
+_STACK_LOCK = Lock()
+_STACKS: "OrderedDict[Hashable, Tuple[Hashable, Stack]]" = OrderedDict()
+
+
+def load_stack(
+    source: str,
+    parameter: str,
+    locations: Sequence[str],
+    resolution: int = DEFAULT_RESOLUTION,
+    canonical: bool = True,
+) -> Stack:
+    """Return the ``locations × time`` matrix of bucket averages, reused while the dataset is unchanged."""
+
+    version = dataset_signatures(source, parameter)
+    cache_key = (source, parameter, tuple(locations), resolution, canonical)
+    with _STACK_LOCK:
+        cached = _STACKS.get(cache_key)
+        if cached is not None and cached[0] == version:
+            _STACKS.move_to_end(cache_key)
+            return cached[1]
+
+    with stage_timer("aggregate.stack"):
+        if source == "tempo":
+            unit, timestamps, matrix = _stack_tempo(parameter, locations, resolution, canonical)
+        else:
+            unit, timestamps, matrix = _stack_series(source, parameter, locations, resolution, canonical)
+    stack = Stack(tuple(locations), unit, timestamps, matrix)
+    with _STACK_LOCK:
+        _STACKS[cache_key] = (version, stack)
+        _STACKS.move_to_end(cache_key)
+        while len(_STACKS) > MAX_CACHED_STACKS:
+            _STACKS.popitem(last=False)
+    return stack
+
+
+def reduce(values: np.ndarray, statistic: str, percentile: Optional[float]) -> np.ndarray:
+    """Reduce ``values`` over locations (axis 0); columns without readings give NaN (or 0 for ``count``)."""
+
+    if statistic == "count":
+        return np.isfinite(values).sum(axis=0).astype(float)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns
+        if percentile is not None:
+            return np.nanpercentile(values, percentile, axis=0)
+        return {"mean": np.nanmean, "min": np.nanmin, "max": np.nanmax, "median": np.nanmedian}[statistic](values, axis=0)
+
+
+@timed("series.aggregate")
+def aggregate(
+    source: str,
+    parameter: str,
+    *,
+    statistics: Sequence[str] = DEFAULT_STATISTICS,
+    bbox: Optional[BoundingBox] = None,
+    location_ids: Sequence[str] = (),
+    start: engine.TimeBound = None,
+    end: engine.TimeBound = None,
+    resolution: int = DEFAULT_RESOLUTION,
+    canonical: bool = True,
+) -> Dict[str, Any]:
+    """Per-bucket statistics across the selected locations, as a JSON-ready payload.
+
+    Buckets where no selected location has a finite reading are left out.
+    Raises :class:`NoLocations` when the selection is empty and ``ValueError``
+    for an unknown statistic or mixed units.
+    """
+
+    parsed = [parse_statistic(name) for name in statistics]
+    locations = select_locations(source, parameter, bbox, location_ids)
+    if not locations:
+        raise NoLocations(f"No {source} locations measure '{parameter}' in the selection")
+    stack = load_stack(source, parameter, locations, resolution, canonical)
+
+    start_epoch, end_epoch = engine.parse_time_bound(start), engine.parse_time_bound(end)
+    lo = 0 if start_epoch is None else int(np.searchsorted(stack.timestamps, start_epoch, side="left"))
+    hi = len(stack.timestamps) if end_epoch is None else int(np.searchsorted(stack.timestamps, end_epoch, side="right"))
+    values = stack.values[:, lo:hi]
+    keep = np.isfinite(values).any(axis=0)
+    values = values[:, keep]
+
+    results: Dict[str, Any] = {}
+    for name, percentile in parsed:
+        column = reduce(values, name, percentile)
+        if name == "count":
+            results[name] = [int(value) for value in column.tolist()]
+        else:
+            results[name] = [None if value != value else value for value in column.tolist()]
+    return {
+        "source": source,
+        "parameter": parameter,
+        "unit": stack.unit,
+        "resolution": resolution,
+        "canonical": canonical,
+        "locations": list(stack.locations),
+        "timestamps": stack.timestamps[lo:hi][keep].tolist(),
+        "statistics": results,
+    }
+
+
+__all__ = [
+    "DEFAULT_STATISTICS",
+    "NoLocations",
+    "STATISTICS",
+    "Stack",
+    "aggregate",
+    "dataset_signatures",
+    "load_stack",
+    "parse_statistic",
+    "reduce",
+    "select_locations",
+]
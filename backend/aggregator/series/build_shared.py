@@ -0,0 +1,146 @@
+"""Build the shared series store read by aggregator workers.
+
+The loader side of :mod:`.shared`: it loads every series once, writes a new
+generation and then points ``CURRENT`` at it. Run it as its own process::
+
+    python -m aggregator.series.build_shared --root /dev/shm/aggregator
+    python -m aggregator.series.build_shared --root /dev/shm/aggregator --watch 60
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import engine
+from .shared import CURRENT_FILE, KEEP_GENERATIONS, MANIFEST_FILE, Entry, _entry_name, _generation_dir, read_current
+
+try:
+    from ..lazy import lazy_import
+except ImportError:  # pragma: no cover - support script execution
+    from lazy import lazy_import  # type: ignore
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+
+def source_state() -> str:
+    """Digest of every source file signature; a new generation is built when it changes."""
+
+    state: List[Any] = [engine.openaq_dao.dataset_state()]
+    files = engine.openmeteo_dao.available_location_files()
+    state.append(sorted((slug, engine.file_signature(path)) for slug, path in files.items()))
+    state.extend(engine.tempo_dao.snapshot_state(parameter) for parameter in engine.tempo_dao.list_parameters())
+    return hashlib.sha1(repr(state).encode()).hexdigest()
+
+
+def iter_keys() -> Iterator[Any]:
+    """Yield a :class:`~.engine.SeriesKey` for every series the data directories hold."""
+
+    for location_id, location in engine.openaq_dao.load_locations().items():
+        for parameter in engine.openaq_dao.list_parameters(location):
+            yield engine.SeriesKey("openaq", str(location_id), parameter)
+    for slug in engine.openmeteo_dao.available_location_files():
+        for parameter in engine.openmeteo_dao.list_parameters(slug) or []:
+            yield engine.SeriesKey("openmeteo", slug, parameter)
+    for parameter in engine.tempo_dao.list_parameters():
+        frame = engine.tempo_dao.load_parameter_frame(parameter)
+        for cell in frame["location"].drop_duplicates():
+            yield engine.SeriesKey("tempo", cell, parameter)
+
+
+def build(root: Path, keep: int = KEEP_GENERATIONS) -> int:
+    """Write a new generation under ``root``, point ``CURRENT`` at it and prune old ones."""
+
+    root.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    state = source_state()
+    index: Dict[str, Entry] = {}
+    epochs: List[np.ndarray] = []
+    values: List[np.ndarray] = []
+    offset = 0
+    for key in iter_keys():
+        for canonical in (False, True):
+            try:
+                _, loader = engine._RESOLVERS[key.source](key, canonical)
+                series = loader()
+            except engine.SeriesNotFound:
+                continue
+            index[_entry_name((key.source, key.location, key.parameter, canonical))] = (offset, len(series.epochs), series.unit)
+            epochs.append(series.epochs)
+            values.append(series.values)
+            offset += len(series.epochs)
+
+    number = (read_current(root) or 0) + 1
+    directory = _generation_dir(root, number)
+    staging = root / f".{directory.name}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir()
+    np.save(staging / "epochs.npy", np.concatenate(epochs) if epochs else np.empty(0, dtype=np.int64))
+    np.save(staging / "values.npy", np.concatenate(values) if values else np.empty(0))
+    with (staging / MANIFEST_FILE).open("w") as handle:
+        json.dump({"generation": number, "created_at": time.time(), "state": state, "series": index}, handle)
+    staging.rename(directory)
+
+    pointer = root / f".{CURRENT_FILE}.tmp"
+    pointer.write_text(f"{number}\n")
+    os.replace(pointer, root / CURRENT_FILE)
+
+    for stale in sorted(root.glob("gen-*"))[:-keep]:
+        # Workers still mapping a pruned generation keep its pages until they swap.
+        shutil.rmtree(stale, ignore_errors=True)
+    logger.info(
+        "Built shared series generation %d: %d series, %d points in %.1fs",
+        number,
+        len(index),
+        offset,
+        time.perf_counter() - started,
+    )
+    return number
+
+
+def _current_state(root: Path) -> Optional[str]:
+    number = read_current(root)
+    if number is None:
+        return None
+    try:
+        with (_generation_dir(root, number) / MANIFEST_FILE).open() as handle:
+            return json.load(handle)["state"]
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the shared series store read by aggregator workers.")
+    parser.add_argument("--root", type=Path, default=os.environ.get("AGGREGATOR_SHARED_DATA_DIR"), help="Store directory")
+    parser.add_argument("--watch", type=float, default=0.0, help="Re-check the data every N seconds and rebuild on change")
+    parser.add_argument("--force", action="store_true", help="Build even if the data has not changed")
+    parser.add_argument("--keep", type=int, default=KEEP_GENERATIONS, help="Generations to keep on disk")
+    args = parser.parse_args(argv)
+    if args.root is None:
+        parser.error("--root or AGGREGATOR_SHARED_DATA_DIR is required")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    force = args.force
+    while True:
+        if force or _current_state(args.root) != source_state():
+            build(args.root, keep=max(1, args.keep))
+            force = False
+        if args.watch <= 0:
+            return 0
+        time.sleep(args.watch)
+
+
+__all__ = ["build", "iter_keys", "source_state"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,397 @@
+"""Query engine returning OpenAQ, Open-Meteo and TEMPO data in one series schema.
+
+Every series is identified by ``(source, location, parameter)`` and carries UTC
+epoch seconds, float values and a unit. Loaded series are cached per file
+version, so repeated dashboard queries only pay for slicing and alignment.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple, Union
+
+try:
+    from ..frame_cache import file_signature
+    from ..lazy import lazy_import
+    from ..metrics import timed
+    from ..openaq import data_access as openaq_dao
+    from ..openmeteo import data_access as openmeteo_dao
+    from ..tempo import data_access as tempo_dao
+    from ..units import to_canonical
+    from ..watcher import WATCHER, ChangeEvent
+    from .shared import SHARED_STORE
+except ImportError:  # pragma: no cover - support script execution
+    from frame_cache import file_signature  # type: ignore
+    from lazy import lazy_import  # type: ignore
+    from metrics import timed  # type: ignore
+    from openaq import data_access as openaq_dao  # type: ignore
+    from openmeteo import data_access as openmeteo_dao  # type: ignore
+    from tempo import data_access as tempo_dao  # type: ignore
+    from units import to_canonical  # type: ignore
+    from watcher import WATCHER, ChangeEvent  # type: ignore
+    from series.shared import SHARED_STORE  # type: ignore
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+SOURCES = ("openaq", "openmeteo", "tempo")
+MAX_CACHED_SERIES = 256
+
+TimeBound = Union[None, int, float, str]
+
+
+class SeriesNotFound(LookupError):
+    """Raised when a (source, location, parameter) tuple does not resolve to data."""
+
+
+@dataclass(frozen=True)
+class SeriesKey:
+    source: str
+    location: str
+    parameter: str
+
+
+@dataclass
+class Series:
+    key: SeriesKey
+    unit: Optional[str]
+    epochs: np.ndarray
+    values: np.ndarray
+
+    def between(self, start: Optional[int], end: Optional[int]) -> "Series":
+        lo = 0 if start is None else int(np.searchsorted(self.epochs, start, side="left"))
+        hi = len(self.epochs) if end is None else int(np.searchsorted(self.epochs, end, side="right"))
+        return Series(self.key, self.unit, self.epochs[lo:hi], self.values[lo:hi])
+
+
+def epoch_seconds(values: pd.Series, timezone: Optional[str] = None) -> np.ndarray:
+    """Convert timestamps to float UTC epoch seconds; unparseable entries become NaN.
+
+    Naive timestamps are interpreted in ``timezone`` when given, otherwise UTC.
+    """
+
+    if timezone is None:
+        parsed = pd.to_datetime(values, utc=True, errors="coerce")
+    else:
+        parsed = pd.to_datetime(values, errors="coerce")
+        parsed = parsed.dt.tz_localize(timezone, ambiguous="NaT", nonexistent="shift_forward").dt.tz_convert("UTC")
+    return ((parsed - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(seconds=1)).to_numpy(dtype=float, na_value=np.nan)
+
+
+def _build_series(key: SeriesKey, unit: Optional[str], epochs: np.ndarray, values: Any) -> Series:
+    numeric = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+    numeric = np.where(np.isfinite(numeric), numeric, np.nan)
+    valid = np.isfinite(epochs)
+    order = np.argsort(epochs[valid], kind="stable")
+    return Series(
+        key=key,
+        unit=unit,
+        epochs=epochs[valid].astype(np.int64)[order],
+        values=numeric[valid][order],
+    )
+
+
+Resolver = Callable[[SeriesKey, bool], Tuple[Hashable, Callable[[], Series]]]
+
+
+def _first_unit(units: pd.Series) -> Optional[str]:
+    present = units.dropna()
+    return str(present.iloc[0]) if not present.empty else None
+
+
+def _resolve_openaq(key: SeriesKey, canonical: bool) -> Tuple[Hashable, Callable[[], Series]]:
+    location = openaq_dao.load_locations().get(key.location)
+    if location is None:
+        raise SeriesNotFound("Location not found")
+    file_name = openaq_dao.resolve_parameter_file(location, key.parameter)
+    if not file_name:
+        raise SeriesNotFound("Parameter not found")
+    version = file_signature(openaq_dao.TRANSFORMED_DIR / file_name)
+    if version is None:
+        raise SeriesNotFound("Parameter not found")
+
+    def load() -> Series:
+        if canonical:
+            frame = openaq_dao.load_measurement_frame(file_name)
+            value_column, unit_column = "value_canonical", "unit_canonical"
+        else:
+            frame = openaq_dao.load_parameter_frame(file_name, ("datetimeUtc", "value", "unit"))
+            value_column, unit_column = "value", "unit"
+        unit = _first_unit(frame[unit_column]) if unit_column in frame.columns else None
+        return _build_series(key, unit, epoch_seconds(frame["datetimeUtc"]), frame[value_column])
+
+    return version, load
+
+
+def _resolve_openmeteo(key: SeriesKey, canonical: bool) -> Tuple[Hashable, Callable[[], Series]]:
+    path = openmeteo_dao.available_location_files().get(key.location)
+    if path is None:
+        raise SeriesNotFound("Location not found")
+    if key.parameter not in (openmeteo_dao.list_parameters(key.location) or []):
+        raise SeriesNotFound("Parameter not found")
+    version = file_signature(path)
+
+    def load() -> Series:
+        frame = openmeteo_dao.FRAME_CACHE.load(key.location, path, ("time", key.parameter))
+        epochs = epoch_seconds(frame["time"], openmeteo_dao.TIMEZONE)
+        unit = openmeteo_dao.PARAMETER_UNITS.get(key.parameter)
+        values = frame[key.parameter]
+        if canonical:
+            values, unit = to_canonical(key.parameter, values, unit)
+        return _build_series(key, unit, epochs, values)
+
+    return version, load
+
+
+def _resolve_tempo(key: SeriesKey, canonical: bool) -> Tuple[Hashable, Callable[[], Series]]:
+    version = tempo_dao.snapshot_state(key.parameter)
+    if not version:
+        raise SeriesNotFound("Parameter not found")
+
+    def load() -> Series:
+        frame = tempo_dao.load_parameter_frame(key.parameter)
+        cell = frame[frame["location"] == key.location]
+        if cell.empty:
+            raise SeriesNotFound("Location not found")
+        unit = _first_unit(cell["unit"])
+        values = cell["value"]
+        if canonical:
+            values, unit = to_canonical(key.parameter, values, cell["unit"])
+        return _build_series(key, unit, cell["epoch"].to_numpy(dtype=float), values)
+
+    return version, load
+
+
+_RESOLVERS: Dict[str, Resolver] = {
+    "openaq": _resolve_openaq,
+    "openmeteo": _resolve_openmeteo,
+    "tempo": _resolve_tempo,
+}
+
+_CACHE_LOCK = Lock()
+_SERIES_CACHE: "OrderedDict[Tuple[SeriesKey, bool], Tuple[Hashable, Series]]" = OrderedDict()
+
+
+def load_series(key: SeriesKey, canonical: bool = False) -> Series:
+    """Load the full series for ``key``, reusing the cached copy while its files are unchanged.
+
+    With ``canonical`` the values are expressed in the unit chosen by
+    :mod:`units`; the conversion is part of the cached load. When a shared
+    store is attached (see :mod:`.shared`), its zero-copy slices are returned
+    instead and only series missing from it are loaded in-process.
+    """
+
+    if SHARED_STORE is not None:
+        shared = SHARED_STORE.lookup(key.source, key.location, key.parameter, canonical)
+        if shared is not None:
+            unit, epochs, values = shared
+            return Series(key, unit, epochs, values)
+
+    resolver = _RESOLVERS.get(key.source)
+    if resolver is None:
+        raise SeriesNotFound(f"Unknown source '{key.source}'")
+    version, loader = resolver(key, canonical)
+    cache_key = (key, canonical)
+
+    with _CACHE_LOCK:
+        cached = _SERIES_CACHE.get(cache_key)
+        if cached is not None and cached[0] == version:
+            _SERIES_CACHE.move_to_end(cache_key)
+            return cached[1]
+
+    series = loader()
+    with _CACHE_LOCK:
+        _SERIES_CACHE[cache_key] = (version, series)
+        _SERIES_CACHE.move_to_end(cache_key)
+        while len(_SERIES_CACHE) > MAX_CACHED_SERIES:
+            _SERIES_CACHE.popitem(last=False)
+    return series
+
+
+def read_series(key: SeriesKey, canonical: bool = False) -> Series:
+    """Load ``key`` straight from its files, bypassing the series cache and the shared store."""
+
+    resolver = _RESOLVERS.get(key.source)
+    if resolver is None:
+        raise SeriesNotFound(f"Unknown source '{key.source}'")
+    _, loader = resolver(key, canonical)
+    return loader()
+
+
+def clear_cache() -> None:
+    with _CACHE_LOCK:
+        _SERIES_CACHE.clear()
+
+
+def _reload(affected: Callable[[SeriesKey], bool]) -> None:
+    """Rebuild the cached series matching ``affected``; other series stay untouched."""
+
+    with _CACHE_LOCK:
+        stale = [cache_key for cache_key in _SERIES_CACHE if affected(cache_key[0])]
+        for cache_key in stale:
+            del _SERIES_CACHE[cache_key]
+    for key, canonical in stale:
+        try:
+            load_series(key, canonical)
+        except (SeriesNotFound, OSError, ValueError):
+            pass  # reported by the next query that asks for it
+
+
+def _on_openaq_change(events: List[ChangeEvent]) -> None:
+    names = {event.name for event in events}
+    if "locations.json" in names:
+        _reload(lambda key: key.source == "openaq")
+        return
+    locations = openaq_dao.load_locations()
+    _reload(
+        lambda key: key.source == "openaq"
+        and openaq_dao.resolve_parameter_file(locations.get(key.location) or {}, key.parameter) in names
+    )
+
+
+def _on_openmeteo_change(events: List[ChangeEvent]) -> None:
+    slugs = {event.name[: -len(".csv")] for event in events if event.name.endswith(".csv")}
+    _reload(lambda key: key.source == "openmeteo" and key.location in slugs)
+
+
+def _on_tempo_change(events: List[ChangeEvent]) -> None:
+    parameters = {tempo_dao.parameter_from_filename(event.name) for event in events}
+    _reload(lambda key: key.source == "tempo" and key.parameter in parameters)
+
+
+# Registered after the data access layers, so their frames are reloaded first.
+WATCHER.watch(openaq_dao.TRANSFORMED_DIR, _on_openaq_change)
+WATCHER.watch(openmeteo_dao.DATA_DIR, _on_openmeteo_change)
+WATCHER.watch(tempo_dao.TRANSFORMED_DIR, _on_tempo_change)
+
+
+def parse_time_bound(value: TimeBound) -> Optional[int]:
+    """Accept epoch seconds or an ISO date/datetime (naive values are UTC)."""
+
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip()
+    try:
+        return int(float(text))
+    except ValueError:
+        pass
+    timestamp = pd.Timestamp(text)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize("UTC")
+    return int(timestamp.timestamp())
+
+
+def align(series: Sequence[Series], resolution: Optional[int] = None) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """Place every series on the union of their timestamps.
+
+    With ``resolution`` (seconds) timestamps are floored to that bucket size
+    first and readings sharing a bucket are averaged, which lines up e.g.
+    hourly ground sensors with irregular satellite overpasses.
+    """
+
+    bucketed: List[Tuple[np.ndarray, np.ndarray]] = []
+    for item in series:
+        epochs, values = item.epochs, item.values
+        if resolution and len(epochs):
+            floored = (epochs // resolution) * resolution
+            epochs, inverse = np.unique(floored, return_inverse=True)
+            finite = np.isfinite(values)
+            sums = np.bincount(inverse, weights=np.where(finite, values, 0.0), minlength=len(epochs))
+            counts = np.bincount(inverse, weights=finite.astype(float), minlength=len(epochs))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values = np.where(counts > 0, sums / counts, np.nan)
+        bucketed.append((epochs, values))
+
+    if bucketed:
+        timestamps = np.unique(np.concatenate([epochs for epochs, _ in bucketed]))
+    else:
+        timestamps = np.empty(0, dtype=np.int64)
+
+    aligned: List[np.ndarray] = []
+    for epochs, values in bucketed:
+        column = np.full(len(timestamps), np.nan)
+        column[np.searchsorted(timestamps, epochs)] = values
+        aligned.append(column)
+    return timestamps.astype(np.int64), aligned
+
+
+def _json_values(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(value) else float(value) for value in values.tolist()]
+
+
+def load_range(
+    keys: Sequence[SeriesKey],
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    canonical: bool = False,
+) -> Dict[SeriesKey, Union[Series, SeriesNotFound]]:
+    """Each key's series within ``[start, end]``, or the ``SeriesNotFound`` it raised."""
+
+    loaded: Dict[SeriesKey, Union[Series, SeriesNotFound]] = {}
+    for key in keys:
+        try:
+            loaded[key] = load_series(key, canonical).between(start, end)
+        except SeriesNotFound as exc:
+            loaded[key] = exc
+    return loaded
+
+
+def payload(
+    keys: Sequence[SeriesKey],
+    loaded: Mapping[SeriesKey, Union[Series, SeriesNotFound]],
+    resolution: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Align ``loaded`` into the JSON-ready ``POST /series`` payload, in ``keys`` order."""
+
+    series: List[Series] = []
+    entries: List[Dict[str, Any]] = []
+    for key in keys:
+        entry: Dict[str, Any] = {"source": key.source, "location": key.location, "parameter": key.parameter}
+        item = loaded[key]
+        if isinstance(item, SeriesNotFound):
+            item = Series(key, None, np.empty(0, dtype=np.int64), np.empty(0))
+            entry["error"] = str(loaded[key])
+        entry["unit"] = item.unit
+        series.append(item)
+        entries.append(entry)
+
+    timestamps, columns = align(series, resolution)
+    for entry, column in zip(entries, columns):
+        entry["values"] = _json_values(column)
+
+    return {"timestamps": timestamps.tolist(), "series": entries}
+
+
+@timed("series.query")
+def query(
+    keys: Sequence[SeriesKey],
+    *,
+    start: TimeBound = None,
+    end: TimeBound = None,
+    resolution: Optional[int] = None,
+    canonical: bool = False,
+) -> Dict[str, Any]:
+    """Load, slice and align ``keys`` in one pass and return a JSON-ready payload."""
+
+    loaded = load_range(keys, parse_time_bound(start), parse_time_bound(end), canonical)
+    return payload(keys, loaded, resolution)
+
+
+__all__ = [
+    "SOURCES",
+    "Series",
+    "SeriesKey",
+    "SeriesNotFound",
+    "align",
+    "clear_cache",
+    "epoch_seconds",
+    "load_range",
+    "load_series",
+    "parse_time_bound",
+    "payload",
+    "query",
+    "read_series",
+]
@@ -0,0 +1,153 @@
+"""FastAPI router for cross-source time-series queries."""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
+
+from . import aggregate, engine
+from .storage import STORAGE
+
+try:
+    from ..execution import run_blocking
+    from ..http_cache import cached_json
+    from ..openaq import catalog
+    from ..serialization import dumps
+except ImportError:  # pragma: no cover - support script execution
+    from execution import run_blocking  # type: ignore
+    from http_cache import cached_json  # type: ignore
+    from openaq import catalog  # type: ignore
+    from serialization import dumps  # type: ignore
+
+router = APIRouter(tags=["series"])
+
+MAX_SERIES_PER_QUERY = 50
+
+
+class SeriesSelector(BaseModel):
+    source: str
+    location: str
+    parameter: str
+
+
+class SeriesQuery(BaseModel):
+    series: List[SeriesSelector] = Field(default_factory=list)
+    start: Optional[Union[int, float, str]] = None
+    end: Optional[Union[int, float, str]] = None
+    resolution: Optional[int] = Field(default=None, description="Bucket size in seconds used to align timestamps")
+    canonical: bool = Field(default=False, description="Convert values to canonical units (ppb for gases, µg/m³ for particles)")
+
+
+@router.post("/series")
+async def query_series(payload: SeriesQuery) -> Dict[str, Any]:
+    if not payload.series:
+        raise HTTPException(status_code=400, detail="Provide at least one series")
+    if len(payload.series) > MAX_SERIES_PER_QUERY:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SERIES_PER_QUERY} series per query")
+    if payload.resolution is not None and payload.resolution <= 0:
+        raise HTTPException(status_code=400, detail="resolution must be a positive number of seconds")
+
+    unknown = sorted({selector.source for selector in payload.series} - set(engine.SOURCES))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown source(s): {', '.join(unknown)}")
+
+    try:
+        start = engine.parse_time_bound(payload.start)
+        end = engine.parse_time_bound(payload.end)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid time bound: {exc}") from exc
+
+    keys = [engine.SeriesKey(selector.source, selector.location, selector.parameter) for selector in payload.series]
+    body = await run_blocking(
+        _query_json,
+        keys,
+        start=start,
+        end=end,
+        resolution=payload.resolution,
+        canonical=payload.canonical,
+    )
+    return Response(content=body, media_type="application/json")
+
+
+def _query_json(keys: List[engine.SeriesKey], **options: Any) -> bytes:
+    # Already JSON-safe, so skip FastAPI's jsonable_encoder walk over every value.
+    return dumps(STORAGE.query(keys, **options))
+
+
+@router.get("/series/aggregate")
+async def aggregate_series(
+    request: Request,
+    parameter: str,
+    source: str = "openaq",
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    location: Optional[List[str]] = Query(None, description="Restrict to these location ids"),
+    stat: Optional[List[str]] = Query(None, description="mean, min, max, median, count or a percentile such as p90"),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    resolution: int = aggregate.DEFAULT_RESOLUTION,
+    canonical: bool = True,
+) -> Response:
+    if source not in engine.SOURCES:
+        raise HTTPException(status_code=400, detail=f"Unknown source: {source}")
+    if resolution <= 0:
+        raise HTTPException(status_code=400, detail="resolution must be a positive number of seconds")
+    statistics = stat or list(aggregate.DEFAULT_STATISTICS)
+    try:
+        for name in statistics:
+            aggregate.parse_statistic(name)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    try:
+        box = catalog.parse_bbox(bbox) if bbox else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {exc}") from exc
+    try:
+        engine.parse_time_bound(start)
+        engine.parse_time_bound(end)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid time bound: {exc}") from exc
+
+    try:
+        return await cached_json(
+            request,
+            aggregate.dataset_signatures(source, parameter),
+            _aggregate_payload,
+            source,
+            parameter,
+            tuple(statistics),
+            box,
+            tuple(location or ()),
+            start,
+            end,
+            resolution,
+            canonical,
+        )
+    except aggregate.NoLocations as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _aggregate_payload(
+    source: str,
+    parameter: str,
+    statistics: Tuple[str, ...],
+    bbox: Optional[aggregate.BoundingBox],
+    location_ids: Tuple[str, ...],
+    start: Optional[str],
+    end: Optional[str],
+    resolution: int,
+    canonical: bool,
+) -> Dict[str, Any]:
+    return aggregate.aggregate(
+        source,
+        parameter,
+        statistics=statistics,
+        bbox=bbox,
+        location_ids=location_ids,
+        start=start,
+        end=end,
+        resolution=resolution,
+        canonical=canonical,
+    )
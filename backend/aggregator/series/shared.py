@@ -0,0 +1,155 @@
+"""Series data shared read-only between aggregator workers.
+
+With several uvicorn workers each process would parse every CSV and hold its
+own copy of every series. Instead, a loader process builds all series once
+into a *generation*: two flat ``.npy`` arrays (epochs and values) plus a
+manifest mapping each ``(source, location, parameter, canonical)`` to an
+offset, length and unit. Workers memory-map the arrays read-only, so the
+pages are shared through the OS page cache and a lookup is a zero-copy slice.
+Put the store on ``/dev/shm`` to keep it in RAM.
+
+Layout of the store directory::
+
+    CURRENT               generation number, replaced atomically
+    gen-000007/manifest.json
+    gen-000007/epochs.npy
+    gen-000007/values.npy
+
+A rebuild writes a complete new generation directory first and only then
+replaces ``CURRENT``, so workers never see a half-written generation. Workers
+re-read ``CURRENT`` at most every ``AGGREGATOR_SHARED_CHECK_SECONDS`` and swap
+their attachment in one reference assignment; requests already holding
+slices of the previous generation keep them until they finish.
+
+Workers attach when ``AGGREGATOR_SHARED_DATA_DIR`` is set. Series missing from
+the current generation fall back to the per-process cache in :mod:`.engine`.
+Stores are built by :mod:`.build_shared`::
+
+    python -m aggregator.series.build_shared --root /dev/shm/aggregator
+    python -m aggregator.series.build_shared --root /dev/shm/aggregator --watch 60
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from ..lazy import lazy_import
+except ImportError:  # pragma: no cover - support script execution
+    from lazy import lazy_import  # type: ignore
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+KEEP_GENERATIONS = 2
+CHECK_SECONDS = float(os.environ.get("AGGREGATOR_SHARED_CHECK_SECONDS", "1"))
+
+EntryKey = Tuple[str, str, str, bool]  # source, location, parameter, canonical
+Entry = Tuple[int, int, Optional[str]]  # offset, length, unit
+
+
+def _entry_name(key: EntryKey) -> str:
+    source, location, parameter, canonical = key
+    return "\t".join((source, location, parameter, "canonical" if canonical else "raw"))
+
+
+def _generation_dir(root: Path, generation: int) -> Path:
+    return root / f"gen-{generation:06d}"
+
+
+def read_current(root: Path) -> Optional[int]:
+    try:
+        return int((root / CURRENT_FILE).read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+@dataclass
+class Generation:
+    number: int
+    state: str
+    index: Dict[str, Entry]
+    epochs: np.ndarray
+    values: np.ndarray
+
+    @classmethod
+    def attach(cls, root: Path, number: int) -> "Generation":
+        directory = _generation_dir(root, number)
+        with (directory / MANIFEST_FILE).open() as handle:
+            manifest = json.load(handle)
+        return cls(
+            number=number,
+            state=manifest["state"],
+            index={name: (offset, length, unit) for name, (offset, length, unit) in manifest["series"].items()},
+            epochs=np.load(directory / "epochs.npy", mmap_mode="r"),
+            values=np.load(directory / "values.npy", mmap_mode="r"),
+        )
+
+    def lookup(self, key: EntryKey) -> Optional[Tuple[Optional[str], np.ndarray, np.ndarray]]:
+        entry = self.index.get(_entry_name(key))
+        if entry is None:
+            return None
+        offset, length, unit = entry
+        return unit, self.epochs[offset : offset + length], self.values[offset : offset + length]
+
+
+class SharedSeriesStore:
+    """Worker-side view of the newest generation under ``root``."""
+
+    def __init__(self, root: Path, check_interval: float = CHECK_SECONDS) -> None:
+        self.root = Path(root)
+        self.check_interval = check_interval
+        self._generation: Optional[Generation] = None
+        self._checked_at = float("-inf")
+        self._lock = Lock()
+
+    def current(self) -> Optional[Generation]:
+        """Return the attached generation, attaching a newer one if ``CURRENT`` moved."""
+
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._generation
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._generation
+            self._checked_at = now
+            number = read_current(self.root)
+            attached = self._generation
+            if number is not None and (attached is None or attached.number != number):
+                try:
+                    self._generation = Generation.attach(self.root, number)
+                    logger.info("Attached shared series generation %d", number)
+                except (OSError, KeyError, ValueError):
+                    # Pruned between reading CURRENT and attaching; retry on the next check.
+                    logger.warning("Could not attach shared series generation %d", number, exc_info=True)
+            return self._generation
+
+    def lookup(
+        self, source: str, location: str, parameter: str, canonical: bool
+    ) -> Optional[Tuple[Optional[str], np.ndarray, np.ndarray]]:
+        generation = self.current()
+        return None if generation is None else generation.lookup((source, location, parameter, canonical))
+
+    def status(self) -> Dict[str, Any]:
+        generation = self._generation
+        return {
+            "root": str(self.root),
+            "generation": generation.number if generation else None,
+            "series": len(generation.index) if generation else 0,
+        }
+
+
+_root = os.environ.get("AGGREGATOR_SHARED_DATA_DIR")
+SHARED_STORE: Optional[SharedSeriesStore] = SharedSeriesStore(Path(_root)) if _root else None
+
+
+__all__ = ["CURRENT_FILE", "KEEP_GENERATIONS", "MANIFEST_FILE", "SHARED_STORE", "Generation", "SharedSeriesStore", "read_current"]
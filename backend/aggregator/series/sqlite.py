@@ -0,0 +1,318 @@
+"""SQLite storage backend for OpenAQ and Open-Meteo series.
+
+Every imported reading is one row of ``measurements``. Its primary key is
+``(source, location, parameter, time, seq)`` and the table is ``WITHOUT
+ROWID``, so rows are clustered in that order and the key doubles as a
+covering index: a range read is one index seek plus a sequential scan. A
+second index on ``(source, parameter, time, location)`` serves reads across
+locations.
+
+Rows are imported per source file through :func:`engine.read_series`, the
+same code path as the CSV backend, so both backends return identical series.
+The ``files`` table records each file's signature. :meth:`SqliteStorage.sync`
+reimports only files that changed. Reads check the dataset state at most every
+``AGGREGATOR_STORAGE_CHECK_SECONDS`` and sync first when it moved, for example
+after an ingest.
+
+Build or refresh the database from the command line::
+
+    python -m aggregator.series.sqlite --path aggregator/data/timeseries.sqlite3   # from backend/
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from threading import Lock, local
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import engine
+from .storage import SQLITE_PATH, Loaded, SeriesStorage
+
+try:
+    from ..frame_cache import FileSignature, file_signature
+    from ..lazy import lazy_import
+    from ..metrics import stage_timer
+except ImportError:  # pragma: no cover - support script execution
+    from frame_cache import FileSignature, file_signature  # type: ignore
+    from lazy import lazy_import  # type: ignore
+    from metrics import stage_timer  # type: ignore
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+IMPORTED_SOURCES = ("openaq", "openmeteo")
+CHECK_SECONDS = float(os.environ.get("AGGREGATOR_STORAGE_CHECK_SECONDS", "1"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS series (
+    source TEXT NOT NULL,
+    location TEXT NOT NULL,
+    parameter TEXT NOT NULL,
+    file TEXT NOT NULL,
+    unit TEXT,
+    unit_canonical TEXT,
+    PRIMARY KEY (source, location, parameter)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS series_by_file ON series (file);
+CREATE TABLE IF NOT EXISTS measurements (
+    source TEXT NOT NULL,
+    location TEXT NOT NULL,
+    parameter TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    value REAL,
+    value_canonical REAL,
+    PRIMARY KEY (source, location, parameter, time, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS measurements_by_parameter
+    ON measurements (source, parameter, time, location, value, value_canonical);
+"""
+
+SourceFiles = Dict[str, Tuple[Path, List[engine.SeriesKey]]]
+
+
+def source_files() -> SourceFiles:
+    """Map ``<source>/<file name>`` to the file and the series keys it holds."""
+
+    files: SourceFiles = {}
+    dao = engine.openaq_dao
+    if dao.LOCATIONS_PATH.exists():
+        for location_id, location in dao.load_locations().items():
+            for parameter in dao.list_parameters(location):
+                file_name = dao.resolve_parameter_file(location, parameter)
+                if file_name:
+                    entry = files.setdefault(f"openaq/{file_name}", (dao.TRANSFORMED_DIR / file_name, []))
+                    entry[1].append(engine.SeriesKey("openaq", str(location_id), parameter))
+    for slug, path in engine.openmeteo_dao.available_location_files().items():
+        parameters = engine.openmeteo_dao.list_parameters(slug) or []
+        files[f"openmeteo/{path.name}"] = (path, [engine.SeriesKey("openmeteo", slug, parameter) for parameter in parameters])
+    return files
+
+
+def _nullable(values: Any) -> List[Optional[float]]:
+    return [None if math.isnan(value) else value for value in values.tolist()]
+
+
+def _rows(key: engine.SeriesKey) -> Tuple[List[Tuple[Any, ...]], Optional[str], Optional[str]]:
+    """Measurement rows for ``key`` plus its raw and canonical units."""
+
+    raw = engine.read_series(key, canonical=False)
+    canonical = engine.read_series(key, canonical=True)
+    if not np.array_equal(raw.epochs, canonical.epochs):
+        raise ValueError(f"Raw and canonical readings of {key} do not line up")
+    rows = [
+        (key.source, key.location, key.parameter, epoch, seq, value, value_canonical)
+        for seq, (epoch, value, value_canonical) in enumerate(
+            zip(raw.epochs.tolist(), _nullable(raw.values), _nullable(canonical.values))
+        )
+    ]
+    return rows, raw.unit, canonical.unit
+
+
+class SqliteStorage(SeriesStorage):
+    name = "sqlite"
+
+    def __init__(self, path: Path = SQLITE_PATH, check_interval: float = CHECK_SECONDS) -> None:
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._local = local()
+        self._write_lock = Lock()
+        self._state: Optional[Tuple[Tuple[str, Optional[FileSignature]], ...]] = None
+        self._checked_at = float("-inf")
+        self.last_sync: Optional[float] = None
+        self.last_sync_files = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets executor threads read while a sync writes."""
+
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _current_state(self, files: SourceFiles) -> Tuple[Tuple[str, Optional[FileSignature]], ...]:
+        state = [("openaq/locations.json", file_signature(engine.openaq_dao.LOCATIONS_PATH))]
+        state.extend((name, file_signature(path)) for name, (path, _) in sorted(files.items()))
+        return tuple(state)
+
+    def sync(self, force: bool = False) -> int:
+        """Import files added or changed since the last sync and drop removed ones; returns files imported."""
+
+        self._checked_at = time.monotonic()
+        files = source_files()
+        state = self._current_state(files)
+        if not force and state == self._state:
+            return 0
+        with self._write_lock, stage_timer("storage.sqlite.sync"):
+            connection = self._connection()
+            stored = {
+                name: (mtime_ns, size)
+                for name, mtime_ns, size in connection.execute("SELECT name, mtime_ns, size FROM files")
+            }
+            signatures = dict(state[1:])
+            stale = [name for name in files if force or signatures[name] != stored.get(name)]
+            removed = [name for name in stored if name not in files]
+            with connection:
+                for name in removed + stale:
+                    self._delete_file(connection, name)
+                for name in stale:
+                    signature = signatures[name]
+                    if signature is None:
+                        continue
+                    self._import_file(connection, name, files[name][1])
+                    connection.execute("INSERT INTO files VALUES (?, ?, ?)", (name, *signature))
+            self._state = state
+            self.last_sync = time.time()
+            self.last_sync_files = len(stale)
+        if stale or removed:
+            logger.info("SQLite storage imported %d files and dropped %d", len(stale), len(removed))
+        return len(stale)
+
+    def _delete_file(self, connection: sqlite3.Connection, name: str) -> None:
+        keys = connection.execute("SELECT source, location, parameter FROM series WHERE file = ?", (name,)).fetchall()
+        connection.executemany(
+            "DELETE FROM measurements WHERE source = ? AND location = ? AND parameter = ?",
+            keys,
+        )
+        connection.execute("DELETE FROM series WHERE file = ?", (name,))
+        connection.execute("DELETE FROM files WHERE name = ?", (name,))
+
+    def _import_file(self, connection: sqlite3.Connection, name: str, keys: Iterable[engine.SeriesKey]) -> None:
+        for key in keys:
+            try:
+                rows, unit, unit_canonical = _rows(key)
+            except engine.SeriesNotFound:
+                continue
+            connection.execute(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?)",
+                (key.source, key.location, key.parameter, name, unit, unit_canonical),
+            )
+            connection.executemany("INSERT INTO measurements VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _read_group(
+        self,
+        source: str,
+        parameter: str,
+        locations: Sequence[str],
+        start: Optional[int],
+        end: Optional[int],
+        resolution: Optional[int],
+        canonical: bool,
+    ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Read one parameter for several locations in one query, split per location."""
+
+        column = "value_canonical" if canonical else "value"
+        placeholders = ", ".join("?" for _ in locations)
+        where = f"source = ? AND parameter = ? AND location IN ({placeholders}) AND time >= ? AND time <= ?"
+        params: List[Any] = [source, parameter, *locations, -(2**63), 2**63 - 1]
+        if start is not None:
+            params[-2] = start
+        if end is not None:
+            params[-1] = end
+        if resolution:
+            sql = (
+                f"SELECT location, (time / ?) * ? AS bucket, AVG({column}) FROM measurements "
+                f"WHERE {where} GROUP BY location, bucket ORDER BY location, bucket"
+            )
+            params = [resolution, resolution, *params]
+        else:
+            sql = f"SELECT location, time, {column} FROM measurements WHERE {where} ORDER BY location, time, seq"
+        rows = self._connection().execute(sql, params).fetchall()
+
+        grouped: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        if not rows:
+            return grouped
+        names = [row[0] for row in rows]
+        epochs = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+        values = np.array([row[2] for row in rows], dtype=float)  # NULL becomes NaN
+        bounds = [0] + [index for index in range(1, len(names)) if names[index] != names[index - 1]] + [len(names)]
+        for lo, hi in zip(bounds, bounds[1:]):
+            grouped[names[lo]] = (epochs[lo:hi], values[lo:hi])
+        return grouped
+
+    def load(
+        self,
+        keys: Sequence[engine.SeriesKey],
+        *,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        resolution: Optional[int] = None,
+        canonical: bool = False,
+    ) -> Dict[engine.SeriesKey, Loaded]:
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.sync()
+        connection = self._connection()
+        units: Dict[engine.SeriesKey, Optional[str]] = {}
+        for key in dict.fromkeys(keys):
+            if key.source in IMPORTED_SOURCES:
+                row = connection.execute(
+                    "SELECT unit, unit_canonical FROM series WHERE source = ? AND location = ? AND parameter = ?",
+                    (key.source, key.location, key.parameter),
+                ).fetchone()
+                if row is not None:
+                    units[key] = row[1] if canonical else row[0]
+
+        groups: Dict[Tuple[str, str], List[str]] = {}
+        for key in units:
+            groups.setdefault((key.source, key.parameter), []).append(key.location)
+        loaded: Dict[engine.SeriesKey, Loaded] = {}
+        with stage_timer("storage.sqlite.read"):
+            for (source, parameter), locations in groups.items():
+                grouped = self._read_group(source, parameter, locations, start, end, resolution, canonical)
+                for location in locations:
+                    key = engine.SeriesKey(source, location, parameter)
+                    epochs, values = grouped.get(location, (np.empty(0, dtype=np.int64), np.empty(0)))
+                    loaded[key] = engine.Series(key, units[key], epochs, values)
+
+        # TEMPO, and anything missing from the database, comes from the files with the usual errors.
+        missing = [key for key in keys if key not in loaded]
+        loaded.update(engine.load_range(missing, start, end, canonical))
+        return loaded
+
+    def status(self) -> Dict[str, Any]:
+        connection = self._connection()
+        counts = dict(connection.execute("SELECT source, COUNT(*) FROM series GROUP BY source").fetchall())
+        return {
+            "backend": self.name,
+            "path": str(self.path),
+            "series": counts,
+            "last_sync": self.last_sync,
+            "last_sync_files": self.last_sync_files,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import OpenAQ and Open-Meteo series into the SQLite storage backend.")
+    parser.add_argument("--path", type=Path, default=SQLITE_PATH)
+    parser.add_argument("--force", action="store_true", help="Reimport every file, not just changed ones")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    storage = SqliteStorage(args.path)
+    started = time.perf_counter()
+    imported = storage.sync(force=args.force)
+    print(f"Imported {imported} files into {args.path} in {time.perf_counter() - started:.1f}s: {storage.status()['series']}")
+    return 0
+
+
+__all__ = ["SCHEMA", "SqliteStorage", "source_files"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Storage backends behind ``POST /series``.
+
+A :class:`SeriesStorage` answers range, bucketed and cross-location reads of
+``(source, location, parameter)`` series. Two backends exist:
+
+``csv`` (default)
+    Reads the source files through the frame caches and :mod:`.engine`.
+    A range query loads the whole series, then slices it.
+``sqlite``
+    Reads an embedded SQLite database imported from ``openaq/transformed``
+    and ``openmeteo/data`` (see :mod:`.sqlite`). Ranges, bucket averages and
+    several locations of one parameter become a single indexed query. TEMPO
+    grids and anything not imported fall back to the files.
+
+The backend is chosen with ``AGGREGATOR_STORAGE``; :data:`STORAGE` is the
+instance the router reads through.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Union
+
+from . import engine
+
+try:
+    from ..metrics import stage_timer
+except ImportError:  # pragma: no cover - support script execution
+    from metrics import stage_timer  # type: ignore
+
+AGGREGATOR_ROOT = Path(__file__).resolve().parents[1]
+BACKEND = os.environ.get("AGGREGATOR_STORAGE", "csv").strip().lower()
+SQLITE_PATH = Path(os.environ.get("AGGREGATOR_STORAGE_PATH", str(AGGREGATOR_ROOT / "data" / "timeseries.sqlite3")))
+
+Loaded = Union[engine.Series, engine.SeriesNotFound]
+
+
+class SeriesStorage:
+    """Read interface shared by the backends; this base reads the files through :mod:`.engine`."""
+
+    name = "csv"
+
+    def load(
+        self,
+        keys: Sequence[engine.SeriesKey],
+        *,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        resolution: Optional[int] = None,
+        canonical: bool = False,
+    ) -> Dict[engine.SeriesKey, Loaded]:
+        """Return each key's series within ``[start, end]``, or the ``SeriesNotFound`` it raised.
+
+        With ``resolution`` a backend may return bucket averages instead of raw
+        readings; :func:`engine.align` gives the same result for either.
+        """
+
+        return engine.load_range(keys, start, end, canonical)
+
+    def query(
+        self,
+        keys: Sequence[engine.SeriesKey],
+        *,
+        start: engine.TimeBound = None,
+        end: engine.TimeBound = None,
+        resolution: Optional[int] = None,
+        canonical: bool = False,
+    ) -> Dict[str, Any]:
+        """The ``POST /series`` payload; see :func:`engine.query`."""
+
+        start_epoch, end_epoch = engine.parse_time_bound(start), engine.parse_time_bound(end)
+        with stage_timer("series.query"):
+            loaded = self.load(keys, start=start_epoch, end=end_epoch, resolution=resolution, canonical=canonical)
+            return engine.payload(keys, loaded, resolution)
+
+    def sync(self) -> int:
+        """Bring the backend up to date with the source files; returns the number of files imported."""
+
+        return 0
+
+    def status(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+def open_storage(backend: str = BACKEND, path: Path = SQLITE_PATH) -> SeriesStorage:
+    if backend == "sqlite":
+        from .sqlite import SqliteStorage
+
+        return SqliteStorage(path)
+    if backend != "csv":
+        raise ValueError(f"Unknown AGGREGATOR_STORAGE backend '{backend}' (expected csv or sqlite)")
+    return SeriesStorage()
+
+
+STORAGE = open_storage()
+
+
+__all__ = ["BACKEND", "SQLITE_PATH", "STORAGE", "SeriesStorage", "open_storage"]
@@ -0,0 +1,143 @@
+"""Data access helpers for transformed NASA TEMPO snapshots."""
+from __future__ import annotations
+
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from ..frame_cache import ColumnCache, FileSignature, file_signature
+    from ..lazy import lazy_import
+    from ..metrics import timed
+    from ..watcher import WATCHER, ChangeEvent
+except ImportError:  # pragma: no cover - support script execution
+    from frame_cache import ColumnCache, FileSignature, file_signature  # type: ignore
+    from lazy import lazy_import  # type: ignore
+    from metrics import timed  # type: ignore
+    from watcher import WATCHER, ChangeEvent  # type: ignore
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+AGGREGATOR_ROOT = Path(__file__).resolve().parents[1]
+TRANSFORMED_DIR = AGGREGATOR_ROOT.parent / "tempo" / "transformed"
+PROVIDER_NAME = "NASA TEMPO"
+SNAPSHOT_COLUMNS = ("latitude", "longitude", "value", "unit", "datetimeUtc")
+
+FRAME_CACHE = ColumnCache("tempo")
+
+_STACK_LOCK = Lock()
+_STACKED: Dict[str, Tuple[Tuple[Tuple[str, FileSignature], ...], pd.DataFrame]] = {}
+
+
+def parameter_from_filename(file_name: str) -> Optional[str]:
+    """Extract the variable from ``tempo_<parameter>_<YYYYMMDD>_<HHMM>.csv``."""
+
+    parts = Path(file_name).stem.split("_")
+    if len(parts) < 4 or parts[0] != "tempo":
+        return None
+    return "_".join(parts[1:-2]) or None
+
+
+def available_snapshot_files(parameter: Optional[str] = None) -> Dict[str, Path]:
+    if not TRANSFORMED_DIR.exists():
+        return {}
+    files: Dict[str, Path] = {}
+    for path in sorted(TRANSFORMED_DIR.glob("tempo_*.csv")):
+        candidate = parameter_from_filename(path.name)
+        if candidate is None or (parameter is not None and candidate != parameter):
+            continue
+        files[path.name] = path
+    return files
+
+
+def list_parameters() -> List[str]:
+    parameters = {parameter_from_filename(name) for name in available_snapshot_files()}
+    return sorted(parameter for parameter in parameters if parameter)
+
+
+def cell_id(latitude: float, longitude: float) -> str:
+    """Identify a TEMPO grid cell; snapshots share cells, so this acts as the location id."""
+
+    return f"{latitude:.2f},{longitude:.2f}"
+
+
+def snapshot_state(parameter: str) -> Tuple[Tuple[str, FileSignature], ...]:
+    return tuple(
+        (name, signature)
+        for name, signature in (
+            (name, file_signature(path)) for name, path in available_snapshot_files(parameter).items()
+        )
+        if signature is not None
+    )
+
+
+@timed("tempo.load_parameter_frame")
+def load_parameter_frame(parameter: str) -> pd.DataFrame:
+    """Stack every snapshot of ``parameter`` into one long frame keyed by grid cell.
+
+    Columns: ``location``, ``latitude``, ``longitude``, ``epoch`` (UTC seconds),
+    ``value`` and ``unit``. The stacked frame is rebuilt only when a snapshot
+    file is added, removed or modified.
+    """
+
+    state = snapshot_state(parameter)
+    with _STACK_LOCK:
+        cached = _STACKED.get(parameter)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+    files = available_snapshot_files(parameter)
+    frames = [FRAME_CACHE.load(name, files[name], SNAPSHOT_COLUMNS) for name, _ in state]
+    if frames:
+        stacked = pd.concat(frames, ignore_index=True)
+    else:
+        stacked = pd.DataFrame(columns=list(SNAPSHOT_COLUMNS))
+
+    timestamps = pd.to_datetime(stacked["datetimeUtc"], utc=True, errors="coerce")
+    epochs = (timestamps - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+    latitudes = pd.to_numeric(stacked["latitude"], errors="coerce").to_numpy(dtype=float)
+    longitudes = pd.to_numeric(stacked["longitude"], errors="coerce").to_numpy(dtype=float)
+    frame = pd.DataFrame(
+        {
+            "location": [cell_id(lat, lon) for lat, lon in zip(latitudes, longitudes)],
+            "latitude": latitudes,
+            "longitude": longitudes,
+            "epoch": epochs,
+            "value": pd.to_numeric(stacked["value"], errors="coerce").to_numpy(dtype=float),
+            "unit": stacked["unit"],
+        }
+    )
+    frame = frame[np.isfinite(frame["epoch"].to_numpy(dtype=float))]
+    frame = frame.astype({"epoch": "int64"}).sort_values(["location", "epoch"], kind="stable")
+    frame.reset_index(drop=True, inplace=True)
+
+    with _STACK_LOCK:
+        _STACKED[parameter] = (state, frame)
+    return frame
+
+
+def _on_change(events: List[ChangeEvent]) -> None:
+    """Reload changed snapshots and restack only the parameters they belong to."""
+
+    parameters = set()
+    for event in events:
+        parameter = parameter_from_filename(event.name)
+        if parameter is None or not event.name.endswith(".csv"):
+            continue
+        FRAME_CACHE.apply_change(event.name, event.path, event.signature)
+        parameters.add(parameter)
+    for parameter in sorted(parameters):
+        with _STACK_LOCK:
+            stacked = _STACKED.pop(parameter, None)
+        if stacked is not None:
+            load_parameter_frame(parameter)
+
+
+WATCHER.watch(TRANSFORMED_DIR, _on_change)
+
+
+def list_cells(parameter: str) -> List[Dict[str, Any]]:
+    frame = load_parameter_frame(parameter)
+    cells = frame.drop_duplicates("location")[["location", "latitude", "longitude"]]
+    return cells.to_dict(orient="records")
@@ -0,0 +1,138 @@
+"""Short-term trends of a measurement series.
+
+A trend summarises the readings leading up to a series' latest one. It holds
+rolling means, a least-squares slope and a simple exponential-smoothing
+nowcast, plus the three-hour projection those imply. The direction comes from
+the slope of the last :data:`SHORT_WINDOW_HOURS` alone. The smoothed level lags
+a sharp move, so comparing it with the latest reading would read such a move
+backwards, and the longer slope still reflects a rise that has since turned. Trends are computed once
+per file version at ingest (see :mod:`openaq.catalog`) and stored beside the
+latest reading, so insights and ``GET /trends`` never walk a series per
+request.
+
+Every statistic is a vectorised reduction over the tail of the series. The
+smoothing recursion is unrolled into a weighted sum of the last
+:data:`SMOOTHING_SPAN` readings.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+try:
+    from .lazy import lazy_import
+except ImportError:  # pragma: no cover - support script execution
+    from lazy import lazy_import  # type: ignore
+
+np = lazy_import("numpy")
+
+HOUR = 3600
+SHORT_WINDOW_HOURS = 3
+DAY_WINDOW_HOURS = 24
+SLOPE_WINDOW_HOURS = 6
+FORECAST_HOURS = 3
+SMOOTHING_ALPHA = 0.5
+# Readings beyond this contribute less than 0.5**24 to the smoothed level.
+SMOOTHING_SPAN = 24
+# A projected change smaller than this (absolute, or relative to the 24 h mean) counts as steady.
+STEADY_ABSOLUTE = 0.5
+STEADY_RELATIVE = 0.05
+
+DIRECTIONS = ("rising", "declining", "holding steady")
+
+
+def _round(value: Optional[float], digits: int = 4) -> Optional[float]:
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value), digits)
+
+
+def window_mean(epochs: np.ndarray, values: np.ndarray, end: int, hours: float) -> Optional[float]:
+    """Mean of the readings within ``hours`` before ``end`` (inclusive)."""
+
+    lo = int(np.searchsorted(epochs, end - hours * HOUR, side="left"))
+    hi = int(np.searchsorted(epochs, end, side="right"))
+    window = values[lo:hi]
+    return float(window.mean()) if len(window) else None
+
+
+def slope_per_hour(epochs: np.ndarray, values: np.ndarray, end: int, hours: float = SLOPE_WINDOW_HOURS) -> Optional[float]:
+    """Least-squares slope, in units per hour, of the readings within ``hours`` before ``end``."""
+
+    lo = int(np.searchsorted(epochs, end - hours * HOUR, side="left"))
+    hi = int(np.searchsorted(epochs, end, side="right"))
+    if hi - lo < 2:
+        return None
+    t = (epochs[lo:hi] - end) / HOUR
+    y = values[lo:hi]
+    t_centered = t - t.mean()
+    variance = float((t_centered * t_centered).sum())
+    if variance == 0.0:
+        return None
+    return float((t_centered * (y - y.mean())).sum()) / variance
+
+
+def smoothed_level(values: np.ndarray, alpha: float = SMOOTHING_ALPHA, span: int = SMOOTHING_SPAN) -> Optional[float]:
+    """Simple exponential smoothing level after the last reading.
+
+    ``l_t = alpha * x_t + (1 - alpha) * l_(t-1)`` unrolled over the last ``span``
+    readings. The weights are renormalised so a short series is not pulled
+    towards zero.
+    """
+
+    tail = values[-span:]
+    if not len(tail):
+        return None
+    weights = alpha * (1.0 - alpha) ** np.arange(len(tail) - 1, -1, -1, dtype=float)
+    weights[0] += (1.0 - alpha) ** len(tail)  # the oldest reading seeds the level
+    return float((weights * tail).sum() / weights.sum())
+
+
+def direction(change: Optional[float], reference: Optional[float]) -> Optional[str]:
+    """``rising``, ``declining`` or ``holding steady`` for a projected ``change`` around ``reference``."""
+
+    if change is None:
+        return None
+    threshold = max(STEADY_ABSOLUTE, STEADY_RELATIVE * abs(reference)) if reference is not None else STEADY_ABSOLUTE
+    if abs(change) < threshold:
+        return "holding steady"
+    return "rising" if change > 0 else "declining"
+
+
+def compute_trend(epochs: Any, values: Any) -> Optional[Dict[str, Any]]:
+    """Trend of one series at its latest finite reading; ``None`` without readings.
+
+    ``epochs`` are UTC seconds and need not be sorted. Non-finite values are
+    ignored.
+    """
+
+    epochs = np.asarray(epochs, dtype=np.int64)
+    values = np.asarray(values, dtype=float)
+    finite = np.isfinite(values)
+    if not finite.any():
+        return None
+    order = np.argsort(epochs[finite], kind="stable")
+    epochs, values = epochs[finite][order], values[finite][order]
+    end = int(epochs[-1])
+
+    mean_day = window_mean(epochs, values, end, DAY_WINDOW_HOURS)
+    slope = slope_per_hour(epochs, values, end)
+    recent = slope_per_hour(epochs, values, end, SHORT_WINDOW_HOURS)
+    nowcast = smoothed_level(values[epochs > end - DAY_WINDOW_HOURS * HOUR])
+    forecast = None
+    if nowcast is not None:
+        forecast = max(0.0, nowcast + (slope or 0.0) * FORECAST_HOURS)
+    return {
+        "as_of": datetime.fromtimestamp(end, timezone.utc).isoformat().replace("+00:00", "Z"),
+        "latest": _round(values[-1]),
+        "mean_3h": _round(window_mean(epochs, values, end, SHORT_WINDOW_HOURS)),
+        "mean_24h": _round(mean_day),
+        "slope_per_hour": _round(slope),
+        "nowcast": _round(nowcast),
+        f"forecast_{FORECAST_HOURS}h": _round(forecast),
+        "direction": direction(recent * FORECAST_HOURS if recent is not None else None, mean_day),
+        "points_24h": int((epochs > end - DAY_WINDOW_HOURS * HOUR).sum()),
+    }
+
+
+__all__ = ["DIRECTIONS", "FORECAST_HOURS", "compute_trend", "direction", "slope_per_hour", "smoothed_level", "window_mean"]
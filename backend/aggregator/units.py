@@ -0,0 +1,197 @@
+"""Canonical units for every parameter served by the aggregator.
+
+Sources report the same pollutant in different units: OpenAQ reference monitors
+publish gases in ppm, Open-Meteo models publish them in µg/m³ and the insight
+thresholds are written in ppb. Conversions here are vectorised and applied once
+per file version when data is loaded (or written at ingest time), never per
+request.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple, Union
+
+try:
+    from .lazy import lazy_import
+except ImportError:  # pragma: no cover - support script execution
+    from lazy import lazy_import  # type: ignore
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+# Molar volume of an ideal gas at 25 °C and 1 atm, used for µg/m³ <-> ppb.
+MOLAR_VOLUME_L = 24.45
+
+PPB = "ppb"
+PPM = "ppm"
+UG_M3 = "µg/m³"
+MG_M3 = "mg/m³"
+DEG_C = "°C"
+PERCENT = "%"
+
+UNIT_ALIASES: Dict[str, str] = {
+    "ppb": PPB,
+    "ppm": PPM,
+    "ug/m3": UG_M3,
+    "ug/m^3": UG_M3,
+    "µg/m³": UG_M3,
+    "µg/m3": UG_M3,
+    "μg/m³": UG_M3,
+    "μg/m3": UG_M3,
+    "mg/m3": MG_M3,
+    "mg/m³": MG_M3,
+    "c": DEG_C,
+    "degc": DEG_C,
+    "°c": DEG_C,
+    "%": PERCENT,
+    "particles/cm³": "particles/cm³",
+    "particles/cm3": "particles/cm³",
+    "m/s": "m/s",
+    "deg": "deg",
+    "mm": "mm",
+    "cm": "cm",
+    "index": "index",
+    "km^2": "km²",
+    "km²": "km²",
+    "molecules/cm^2": "molecules/cm²",
+    "molecules/cm2": "molecules/cm²",
+    "molecules/cm²": "molecules/cm²",
+}
+
+# Source-specific parameter names mapped onto one pollutant vocabulary.
+PARAMETER_ALIASES: Dict[str, str] = {
+    # Open-Meteo
+    "pm2_5": "pm25",
+    "ozone": "o3",
+    "nitrogen_dioxide": "no2",
+    "sulphur_dioxide": "so2",
+    "carbon_monoxide": "co",
+    "carbon_dioxide": "co2",
+    "temperature_2m": "temperature",
+    "relative_humidity_2m": "relativehumidity",
+    # TEMPO
+    "vertical_column_troposphere": "no2_column",
+}
+
+MOLECULAR_WEIGHTS: Dict[str, float] = {
+    "o3": 48.00,
+    "no2": 46.01,
+    "so2": 64.07,
+    "co": 28.01,
+    "no": 30.01,
+    "nox": 46.01,  # reported as NO2-equivalent
+}
+
+CANONICAL_UNITS: Dict[str, str] = {
+    "pm1": UG_M3,
+    "pm25": UG_M3,
+    "pm10": UG_M3,
+    "dust": UG_M3,
+    "o3": PPB,
+    "no2": PPB,
+    "so2": PPB,
+    "co": PPB,
+    "no": PPB,
+    "nox": PPB,
+    "co2": PPM,
+    "temperature": DEG_C,
+    "relativehumidity": PERCENT,
+    "um003": "particles/cm³",
+}
+
+_PPB_PER_PPM = 1000.0
+
+
+def canonical_parameter(parameter: str) -> str:
+    key = str(parameter).strip().lower()
+    return PARAMETER_ALIASES.get(key, key)
+
+
+def normalize_unit(unit: Optional[str]) -> Optional[str]:
+    if unit is None or (isinstance(unit, float) and np.isnan(unit)):
+        return None
+    text = str(unit).strip()
+    return UNIT_ALIASES.get(text.lower(), text) if text else None
+
+
+def canonical_unit(parameter: str, unit: Optional[str] = None) -> Optional[str]:
+    """Return the canonical unit for ``parameter``; unknown parameters keep ``unit``."""
+
+    return CANONICAL_UNITS.get(canonical_parameter(parameter), normalize_unit(unit))
+
+
+def conversion_factor(parameter: str, unit: Optional[str]) -> Tuple[Optional[float], Optional[str]]:
+    """Return ``(multiplier, canonical_unit)`` to convert ``unit`` for ``parameter``.
+
+    The multiplier is ``None`` when no conversion is known, in which case the
+    caller should treat the canonical value as missing rather than guess.
+    """
+
+    pollutant = canonical_parameter(parameter)
+    source = normalize_unit(unit)
+    target = CANONICAL_UNITS.get(pollutant)
+    if target is None:
+        return 1.0, source
+    if source is None:
+        return None, target
+    if source == target:
+        return 1.0, target
+
+    if target == PPB and source in (PPM, UG_M3, MG_M3):
+        if source == PPM:
+            return _PPB_PER_PPM, target
+        weight = MOLECULAR_WEIGHTS.get(pollutant)
+        if weight is None:
+            return None, target
+        per_ug = MOLAR_VOLUME_L / weight
+        return (per_ug if source == UG_M3 else per_ug * 1000.0), target
+    if target == UG_M3 and source == MG_M3:
+        return 1000.0, target
+    if target == PPM and source == PPB:
+        return 1.0 / _PPB_PER_PPM, target
+    return None, target
+
+
+def to_canonical(
+    parameter: str,
+    values: Union[np.ndarray, pd.Series],
+    units: Union[None, str, np.ndarray, pd.Series],
+) -> Tuple[np.ndarray, Optional[str]]:
+    """Convert ``values`` into the canonical unit of ``parameter`` in one pass.
+
+    ``units`` may be a single unit or one per value; each distinct unit is
+    resolved once and applied as a vectorised multiply. Values whose unit
+    cannot be converted become NaN.
+    """
+
+    numeric = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+    target = canonical_unit(parameter, units if isinstance(units, str) else None)
+
+    if units is None or isinstance(units, str):
+        factor, target = conversion_factor(parameter, units)
+        if factor is None:
+            return np.full(len(numeric), np.nan), target
+        return numeric * factor, target
+
+    unit_values = pd.Series(units).astype(object).to_numpy()
+    factors = np.full(len(numeric), np.nan)
+    for unit in pd.unique(unit_values):
+        factor, resolved = conversion_factor(parameter, unit)
+        if resolved is not None:
+            target = resolved
+        if factor is not None:
+            factors[unit_values == unit] = factor
+    return numeric * factors, target
+
+
+__all__ = [
+    "CANONICAL_UNITS",
+    "MOLECULAR_WEIGHTS",
+    "PARAMETER_ALIASES",
+    "UNIT_ALIASES",
+    "canonical_parameter",
+    "canonical_unit",
+    "conversion_factor",
+    "normalize_unit",
+    "to_canonical",
+]
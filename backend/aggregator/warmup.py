@@ -0,0 +1,223 @@
+"""Background warmup of datasets and derived tables at startup.
+
+Right after a deploy, the first requests would otherwise pay for CSV parsing,
+unit conversion and the insight snapshot. The warmup thread preloads them step
+by step, and ``GET /ready`` reports ``503`` until every step has succeeded.
+Failed steps are retried every ``AGGREGATOR_WARMUP_RETRY_SECONDS`` until they
+do. A rolling restart can then wait for readiness before sending traffic.
+
+Steps are chosen with ``AGGREGATOR_WARMUP``, a comma-separated list from
+:data:`STEPS`, or ``all`` (default) or ``none``.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+try:
+    from .insight_store import INSIGHT_STORE
+    from .metrics import stage_timer
+    from .openaq import catalog as openaq_catalog
+    from .openaq import data_access as openaq_dao
+    from .openmeteo import data_access as openmeteo_dao
+    from .openmeteo import windows as openmeteo_windows
+    from .series.storage import STORAGE
+    from .tempo import data_access as tempo_dao
+except ImportError:  # pragma: no cover - support script execution
+    from insight_store import INSIGHT_STORE  # type: ignore
+    from metrics import stage_timer  # type: ignore
+    from openaq import catalog as openaq_catalog  # type: ignore
+    from openaq import data_access as openaq_dao  # type: ignore
+    from openmeteo import data_access as openmeteo_dao  # type: ignore
+    from openmeteo import windows as openmeteo_windows  # type: ignore
+    from series.storage import STORAGE  # type: ignore
+    from tempo import data_access as tempo_dao  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+RETRY_SECONDS = float(os.environ.get("AGGREGATOR_WARMUP_RETRY_SECONDS", "30"))
+
+
+def _warm_locations() -> int:
+    locations = openaq_catalog.load_catalog()
+    openmeteo_dao.load_location_metadata()
+    return len(locations)
+
+
+def _warm_openaq() -> int:
+    files = 0
+    for location in openaq_dao.load_locations().values():
+        for file_name in location.get("files", []):
+            try:
+                openaq_dao.load_parameter_frame(file_name)
+                openaq_dao.load_measurement_frame(file_name)
+            except FileNotFoundError:
+                logger.warning("Warmup skipped missing OpenAQ file %s", file_name)
+                continue
+            files += 1
+    return files
+
+
+def _warm_openmeteo() -> int:
+    files = openmeteo_dao.available_location_files()
+    for slug, path in files.items():
+        openmeteo_dao.FRAME_CACHE.load(slug, path)
+    return len(files)
+
+
+def _warm_windows() -> int:
+    return len(openmeteo_windows.refresh())
+
+
+def _warm_storage() -> int:
+    return STORAGE.sync()
+
+
+def _warm_insights() -> int:
+    INSIGHT_STORE.refresh()
+    return len(INSIGHT_STORE)
+
+
+def _warm_tempo() -> int:
+    rows = 0
+    for parameter in tempo_dao.list_parameters():
+        rows += len(tempo_dao.load_parameter_frame(parameter))
+    return rows
+
+
+# Ordered: the storage import and the insight snapshot reuse the frames parsed just before them.
+STEPS: Dict[str, Callable[[], int]] = {
+    "locations": _warm_locations,
+    "openaq": _warm_openaq,
+    "openmeteo": _warm_openmeteo,
+    "windows": _warm_windows,
+    "storage": _warm_storage,
+    "insights": _warm_insights,
+    "tempo": _warm_tempo,
+}
+
+
+def configured_steps(value: Optional[str] = None) -> List[str]:
+    text = (value if value is not None else os.environ.get("AGGREGATOR_WARMUP", "all")).strip().lower()
+    if text in ("", "none", "off", "0", "false"):
+        return []
+    if text in ("all", "1", "true"):
+        return list(STEPS)
+    requested = [step.strip() for step in text.split(",") if step.strip()]
+    unknown = [step for step in requested if step not in STEPS]
+    if unknown:
+        logger.warning("Ignoring unknown warmup steps: %s", ", ".join(unknown))
+    return [step for step in STEPS if step in requested]
+
+
+@dataclass
+class StepStatus:
+    name: str
+    state: str = "pending"  # pending, running, done, failed
+    duration_ms: Optional[float] = None
+    items: Optional[int] = None
+    error: Optional[str] = None
+
+
+class Warmup:
+    def __init__(self, steps: Optional[Sequence[str]] = None, retry_seconds: float = RETRY_SECONDS) -> None:
+        self._lock = Lock()
+        self._finished = Event()
+        self.retry_seconds = retry_seconds
+        self._thread: Optional[Thread] = None
+        self._steps: List[StepStatus] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.configure(configured_steps() if steps is None else steps)
+
+    def configure(self, steps: Sequence[str]) -> None:
+        with self._lock:
+            self._steps = [StepStatus(name) for name in steps]
+            self._finished.clear()
+            if not self._steps:
+                self._finished.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._finished.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    @property
+    def failed(self) -> List[str]:
+        return [step.name for step in self._steps if step.state == "failed"]
+
+    def _run_step(self, step: StepStatus) -> None:
+        step.state = "running"
+        started = time.perf_counter()
+        try:
+            with stage_timer(f"warmup.{step.name}"):
+                step.items = STEPS[step.name]()
+            step.state = "done"
+            step.error = None
+        except Exception as exc:  # pragma: no cover - keep warming the remaining steps
+            logger.exception("Warmup step %s failed", step.name)
+            step.state = "failed"
+            step.error = str(exc) or type(exc).__name__
+        step.duration_ms = (time.perf_counter() - started) * 1000
+
+    def run(self) -> None:
+        """Run every configured step in order, then retry failed ones until all succeed.
+
+        A failing step does not stop the later ones, but the worker only turns
+        ready once every step has succeeded.
+        """
+
+        self.started_at = time.time()
+        for step in self._steps:
+            self._run_step(step)
+        while self.failed:
+            logger.warning("Warmup steps failed (%s); retrying in %.0fs", ", ".join(self.failed), self.retry_seconds)
+            time.sleep(self.retry_seconds)
+            for step in self._steps:
+                if step.state == "failed":
+                    self._run_step(step)
+        self.finished_at = time.time()
+        self._finished.set()
+        logger.info(
+            "Warmup finished in %.0fms: %s",
+            sum(step.duration_ms or 0 for step in self._steps),
+            ", ".join(f"{step.name}={step.state}" for step in self._steps),
+        )
+
+    def start(self) -> None:
+        """Start warming in a daemon thread unless a warmup already ran or is running."""
+
+        with self._lock:
+            if self._thread is not None or self._finished.is_set():
+                return
+            self._thread = Thread(target=self.run, name="aggregator-warmup", daemon=True)
+            self._thread.start()
+
+    def status(self) -> Dict[str, Any]:
+        steps = [
+            {
+                "name": step.name,
+                "state": step.state,
+                "duration_ms": step.duration_ms,
+                "items": step.items,
+                **({"error": step.error} if step.error else {}),
+            }
+            for step in self._steps
+        ]
+        return {
+            "status": "ready" if self.ready else ("degraded" if self.failed else "warming"),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "steps": steps,
+        }
+
+
+WARMUP = Warmup()
+
+__all__ = ["STEPS", "WARMUP", "Warmup", "configured_steps"]
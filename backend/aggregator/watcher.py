@@ -0,0 +1,327 @@
+"""Change notifications for the data directories.
+
+Caches over ``openaq/transformed``, ``openmeteo/data`` and ``tempo/transformed``
+are keyed by file signatures (mtime and size). Without a watcher every lookup
+costs a ``stat``: a ``/locations`` request stats every OpenAQ CSV.
+:data:`WATCHER` keeps the signatures of each watched directory in memory. It
+updates them from inotify events on Linux, or from a periodic rescan elsewhere.
+While it runs, :func:`frame_cache.file_signature` answers from that map.
+
+Data access layers register a callback per directory with
+:meth:`DataWatcher.watch`. Once a burst of writes settles, each callback
+receives the :class:`ChangeEvent` list for files whose signature changed, and
+drops or reloads only the affected entries. The aggregator starts the watcher
+in its lifespan; scripts that never start it keep calling ``stat`` as before.
+"""
+from __future__ import annotations
+
+import ctypes
+import logging
+import os
+import select
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+try:
+    from .metrics import WATCH_EVENTS
+except ImportError:  # pragma: no cover - support script execution
+    from metrics import WATCH_EVENTS  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+WATCH_MODE = os.environ.get("AGGREGATOR_WATCH", "auto").strip().lower()  # auto, inotify, polling or off
+POLL_SECONDS = float(os.environ.get("AGGREGATOR_WATCH_POLL_SECONDS", "2"))
+# Writers replace files in several steps; wait for a quiet spell before publishing.
+SETTLE_SECONDS = 0.1
+MAX_BATCH_SECONDS = 1.0
+
+FileSignature = Tuple[int, int]
+Callback = Callable[[List["ChangeEvent"]], Any]
+
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ONLYDIR = 0x1000000
+_WATCH_MASK = (
+    _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+    | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def stat_signature(path: Path) -> Optional[FileSignature]:
+    """Return ``(mtime_ns, size)`` for ``path`` or ``None`` if it does not exist."""
+
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    directory: Path
+    name: str
+    signature: Optional[FileSignature]  # None once the file is gone
+
+    @property
+    def path(self) -> Path:
+        return self.directory / self.name
+
+
+class _Inotify:
+    """Just enough of inotify(7) through ctypes; raises ``OSError`` where it is unavailable."""
+
+    def __init__(self) -> None:
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def add(self, directory: Path) -> int:
+        descriptor = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if descriptor < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), str(directory))
+        return descriptor
+
+    def wait(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """Return ``(wd, mask, name)`` events, waiting up to ``timeout`` seconds for the first."""
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events: List[Tuple[int, int, str]] = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            descriptor, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            events.append((descriptor, mask, os.fsdecode(data[offset : offset + length].rstrip(b"\0"))))
+            offset += length
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class DataWatcher:
+    """Track file signatures of registered directories and publish per-file changes."""
+
+    def __init__(self, poll_seconds: float = POLL_SECONDS) -> None:
+        self.poll_seconds = poll_seconds
+        self.mode: Optional[str] = None  # "inotify" or "polling" while running
+        self.events = 0
+        self.last_event: Optional[float] = None
+        self._callbacks: Dict[Path, List[Callback]] = {}
+        self._signatures: Dict[Path, Dict[str, FileSignature]] = {}
+        self._descriptors: Dict[int, Path] = {}
+        self._inotify: Optional[_Inotify] = None
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def watch(self, directory: Path, callback: Callback) -> None:
+        """Call ``callback`` with the changes in ``directory``, which may not exist yet."""
+
+        with self._lock:
+            self._callbacks.setdefault(Path(directory), []).append(callback)
+
+    @property
+    def running(self) -> bool:
+        return self.mode is not None
+
+    def signature(self, path: Path) -> Optional[FileSignature]:
+        """Signature of ``path`` from memory when its directory is watched, otherwise from ``stat``."""
+
+        signatures = self._signatures.get(path.parent)
+        if signatures is None:
+            return stat_signature(path)
+        return signatures.get(path.name)
+
+    def refresh(self, path: Path) -> Optional[FileSignature]:
+        """Stat ``path`` now and record it; writers call this so their own change is not reported back."""
+
+        signature = stat_signature(path)
+        with self._lock:
+            signatures = self._signatures.get(path.parent)
+            if signatures is not None:
+                _record(signatures, path.name, signature)
+        return signature
+
+    def _scan(self, directory: Path) -> Optional[Dict[str, FileSignature]]:
+        try:
+            with os.scandir(directory) as entries:
+                signatures: Dict[str, FileSignature] = {}
+                for entry in entries:
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            signatures[entry.name] = (stat.st_mtime_ns, stat.st_size)
+                    except OSError:
+                        continue
+                return signatures
+        except OSError:
+            return None
+
+    def _discover(self, directory: Path) -> None:
+        """Start tracking ``directory`` without reporting the files it already has as changes."""
+
+        if self._inotify is not None and directory not in self._descriptors.values():
+            try:
+                self._descriptors[self._inotify.add(directory)] = directory
+            except OSError:
+                pass  # missing for now; retried on the next poll
+        scanned = self._scan(directory)
+        if scanned is not None:
+            with self._lock:
+                self._signatures[directory] = scanned
+
+    def _changes(self, directory: Path, names: Optional[Set[str]]) -> List[ChangeEvent]:
+        """Restat ``names`` (every file when ``None``) and return those whose signature changed."""
+
+        if names is None:
+            scanned = self._scan(directory)
+            current = scanned or {}
+        else:
+            scanned = {}
+            current = {name: signature for name in names if (signature := stat_signature(directory / name))}
+        with self._lock:
+            signatures = self._signatures.get(directory)
+            if signatures is None:
+                return []
+            candidates = set(signatures) | set(current) if names is None else names
+            events: List[ChangeEvent] = []
+            for name in sorted(candidates):
+                signature = current.get(name)
+                if signatures.get(name) != signature:
+                    _record(signatures, name, signature)
+                    events.append(ChangeEvent(directory, name, signature))
+            if scanned is None:
+                del self._signatures[directory]  # the directory is gone; rediscovered if it returns
+        return events
+
+    def _publish(self, events: List[ChangeEvent]) -> None:
+        if not events:
+            return
+        directory = events[0].directory
+        self.events += len(events)
+        self.last_event = time.time()
+        WATCH_EVENTS.inc(len(events), directory=f"{directory.parent.name}/{directory.name}")
+        for callback in list(self._callbacks.get(directory, ())):
+            try:
+                callback(events)
+            except Exception:  # pragma: no cover - one failing consumer must not stop the others
+                logger.exception("Data watcher callback failed for %s", directory)
+
+    def _run(self) -> None:
+        pending: Dict[Path, Optional[Set[str]]] = {}  # None: rescan the whole directory
+        batch_started = 0.0
+        next_poll = 0.0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now >= next_poll:
+                next_poll = now + self.poll_seconds
+                for directory in list(self._callbacks):
+                    if directory not in self._signatures:
+                        self._discover(directory)
+                    elif self._inotify is None or directory not in self._descriptors.values():
+                        pending[directory] = None
+
+            if not pending:
+                batch_started = time.monotonic()
+            timeout = SETTLE_SECONDS if pending else max(0.0, next_poll - time.monotonic())
+            # Bounded so stop() returns promptly in inotify mode as well.
+            timeout = min(timeout, 0.5)
+            received = False
+            if self._inotify is None:
+                self._stop.wait(timeout)
+            else:
+                for descriptor, mask, name in self._inotify.wait(timeout):
+                    received = True
+                    if mask & _IN_Q_OVERFLOW:
+                        pending.update((directory, None) for directory in self._signatures)
+                        continue
+                    directory = self._descriptors.get(descriptor)
+                    if directory is None:
+                        continue
+                    if mask & (_IN_IGNORED | _IN_DELETE_SELF | _IN_MOVE_SELF):
+                        self._descriptors.pop(descriptor, None)
+                        pending[directory] = None
+                    elif name and pending.get(directory, set()) is not None:
+                        pending.setdefault(directory, set()).add(name)
+
+            if pending and (not received or time.monotonic() - batch_started >= MAX_BATCH_SECONDS):
+                batch, pending = pending, {}
+                for directory, names in batch.items():
+                    self._publish(self._changes(directory, names))
+
+    def start(self, mode: str = WATCH_MODE) -> Optional[str]:
+        """Begin watching the registered directories; returns the mode used, ``None`` when off."""
+
+        if self._thread is not None or mode == "off":
+            return self.mode
+        if mode in ("auto", "inotify"):
+            try:
+                self._inotify = _Inotify()
+            except OSError as exc:
+                logger.warning("inotify unavailable (%s); polling data directories every %ss", exc, self.poll_seconds)
+        self.mode = "inotify" if self._inotify is not None else "polling"
+        for directory in list(self._callbacks):
+            self._discover(directory)
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name="data-watcher", daemon=True)
+        self._thread.start()
+        return self.mode
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        with self._lock:
+            self._signatures.clear()
+            self._descriptors.clear()
+        self.mode = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "directories": sorted(str(directory) for directory in self._signatures),
+            "events": self.events,
+            "last_event": self.last_event,
+        }
+
+
+def _record(signatures: Dict[str, FileSignature], name: str, signature: Optional[FileSignature]) -> None:
+    if signature is None:
+        signatures.pop(name, None)
+    else:
+        signatures[name] = signature
+
+
+WATCHER = DataWatcher()
+
+
+__all__ = ["WATCHER", "ChangeEvent", "DataWatcher", "FileSignature", "stat_signature"]
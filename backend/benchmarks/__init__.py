@@ -0,0 +1,12 @@
+"""Reproducible benchmarks for the aggregator's hot paths.
+
+Run from ``backend/``::
+
+    python -m benchmarks --scale small
+    python -m benchmarks --scale large --json bench.json
+    python -m benchmarks --scale large --compare bench.json
+
+Data is synthetic (see :mod:`benchmarks.synthetic`) and upstream HTTP is served
+by in-process stubs (see :mod:`benchmarks.stubs`), so results depend only on
+the code under test and the machine.
+"""
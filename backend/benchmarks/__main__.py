@@ -0,0 +1,92 @@
+"""Command-line entry point: ``python -m benchmarks`` from ``backend/``."""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from aggregator.api import app
+
+from . import checks
+from .harness import compare, measure, render_table, save
+from .stubs import stub_upstreams
+from .suite import build_suite
+from .synthetic import SCALES, generate, use_dataset
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the aggregator's hot paths on synthetic data.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=None,
+        help="Where to generate (and reuse) the dataset; defaults to the system temp dir",
+    )
+    parser.add_argument("--regenerate", action="store_true", help="Rewrite the dataset even if it exists")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to sample each benchmark")
+    parser.add_argument("--json", type=Path, default=None, help="Write results to this file")
+    parser.add_argument("--compare", type=Path, default=None, help="Baseline results to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="Median slowdown ratio that counts as a regression",
+    )
+    parser.add_argument("--skip-checks", action="store_true", help="Do not run benchmarks.checks before timing")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    scale = SCALES[args.scale]
+    root = args.data_dir or Path(tempfile.gettempdir()) / f"aggregator-bench-{scale.name}-{scale.seed}"
+
+    if not args.skip_checks:
+        failures = checks.run()
+        if failures:
+            print("\nCheck failures:")
+            print("\n".join(f"  {line}" for line in failures))
+            return 1
+        print()
+
+    print(f"Preparing {scale.name} dataset in {root} ...", flush=True)
+    dataset = generate(root, scale, force=args.regenerate)
+
+    with use_dataset(dataset), stub_upstreams():
+        # No context manager: the lifespan would start the insight refresher and close the stubbed client.
+        client = TestClient(app)
+        benchmarks = [bench for bench in build_suite(dataset, client) if args.filter in bench.name]
+        results = []
+        for bench in benchmarks:
+            print(f"  {bench.name}", flush=True)
+            results.append(measure(bench, min_time=args.min_time))
+
+    print()
+    print(render_table(results))
+
+    if args.json is not None:
+        save(args.json, results, {"scale": scale.name})
+        print(f"\nSaved results to {args.json}")
+
+    if args.compare is not None:
+        baseline_scale = json.loads(args.compare.read_text(encoding="utf-8")).get("meta", {}).get("scale")
+        if baseline_scale != scale.name:
+            print(f"\nBaseline {args.compare} was recorded at scale {baseline_scale!r}, not {scale.name!r}")
+            return 2
+        regressions = compare(args.compare, results, args.threshold)
+        if regressions:
+            print(f"\nRegressions over {args.threshold:.2f}x:")
+            print("\n".join(f"  {line}" for line in regressions))
+            return 1
+        print(f"\nNo regressions over {args.threshold:.2f}x against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Behavioural checks that must hold on any dataset; exit code 1 on a failure::
+
+    python -m benchmarks.checks
+
+The repository has no test suite, so these plain assertions guard behaviour
+that the timing benchmarks would not notice.
+"""
+from __future__ import annotations
+
+import sys
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from aggregator.trends import compute_trend
+
+from .imports import TARGETS, audit
+
+HOUR = 3600
+
+
+def _direction(values: Sequence[float]) -> Optional[str]:
+    trend = compute_trend([index * HOUR for index in range(len(values))], values)
+    return trend["direction"] if trend else None
+
+
+def check_trend_directions() -> None:
+    """Directions follow the latest move, including right after a sharp jump."""
+
+    cases: List[Tuple[str, Sequence[float], str]] = [
+        ("monotone rising", [float(value) for value in range(1, 13)], "rising"),
+        ("monotone falling", [float(value) for value in range(12, 0, -1)], "declining"),
+        ("flat, then a jump up", [1.0] * 11 + [10.0], "rising"),
+        ("flat, then a drop", [10.0] * 11 + [1.0], "declining"),
+        ("rise that has turned", [37.0, 42.0, 51.0, 62.0, 63.0, 59.0, 42.0], "declining"),
+        ("flat", [5.0] * 12, "holding steady"),
+    ]
+    for name, values, expected in cases:
+        actual = _direction(values)
+        assert actual == expected, f"trend of {name} series is {actual!r}, expected {expected!r}"
+
+
+def check_import_budgets() -> None:
+    """A cold ``import aggregator.api`` stays within its budget and keeps the heavy modules lazy."""
+
+    breaches = audit([target for target in TARGETS if target.name == "app"], repeat=3, scale=1.0, top=0)
+    assert not breaches, "; ".join(breaches)
+
+
+CHECKS: Tuple[Callable[[], None], ...] = (check_trend_directions, check_import_budgets)
+
+
+def run(checks: Sequence[Callable[[], None]] = CHECKS) -> List[str]:
+    """Run ``checks``; returns one message per failed check."""
+
+    failures: List[str] = []
+    for check in checks:
+        try:
+            check()
+        except AssertionError as exc:
+            failures.append(f"{check.__name__}: {exc}")
+            print(f"{check.__name__:<28} FAILED")
+        else:
+            print(f"{check.__name__:<28} ok")
+    return failures
+
+
+def main() -> int:
+    failures = run()
+    if failures:
+        print("\nCheck failures:")
+        print("\n".join(f"  {line}" for line in failures))
+        return 1
+    print("\nAll checks passed.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Minimal asv-style timing harness: repeat, summarise, save and compare."""
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+@dataclass
+class Benchmark:
+    name: str
+    fn: Callable[[], Any]
+    # Runs untimed before every sample, e.g. to drop caches for a cold measurement.
+    setup: Optional[Callable[[], Any]] = None
+    group: str = "default"
+
+
+@dataclass
+class Result:
+    name: str
+    group: str
+    samples: List[float] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        return {
+            "repeats": len(ordered),
+            "min": ordered[0],
+            "median": statistics.median(ordered),
+            "mean": statistics.fmean(ordered),
+            "p95": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+            "max": ordered[-1],
+        }
+
+
+def measure(
+    benchmark: Benchmark,
+    *,
+    min_time: float = 1.0,
+    min_repeats: int = 3,
+    max_repeats: int = 200,
+    warmup: int = 1,
+) -> Result:
+    """Sample ``benchmark`` until ``min_time`` seconds and ``min_repeats`` samples are collected."""
+
+    for _ in range(warmup):
+        if benchmark.setup is not None:
+            benchmark.setup()
+        benchmark.fn()
+
+    result = Result(benchmark.name, benchmark.group)
+    spent = 0.0
+    while len(result.samples) < max_repeats and (len(result.samples) < min_repeats or spent < min_time):
+        if benchmark.setup is not None:
+            benchmark.setup()
+        started = time.perf_counter()
+        benchmark.fn()
+        elapsed = time.perf_counter() - started
+        result.samples.append(elapsed)
+        spent += elapsed
+    return result
+
+
+def format_seconds(value: float) -> str:
+    if value < 1e-3:
+        return f"{value * 1e6:8.1f} µs"
+    if value < 1.0:
+        return f"{value * 1e3:8.2f} ms"
+    return f"{value:8.3f} s "
+
+
+def render_table(results: Sequence[Result]) -> str:
+    width = max([len(result.name) for result in results] + [9])
+    lines = [f"{'benchmark':<{width}}  {'median':>11}  {'min':>11}  {'p95':>11}  {'n':>4}"]
+    for result in results:
+        summary = result.summary()
+        lines.append(
+            f"{result.name:<{width}}  {format_seconds(summary['median'])}  {format_seconds(summary['min'])}"
+            f"  {format_seconds(summary['p95'])}  {summary['repeats']:>4}"
+        )
+    return "\n".join(lines)
+
+
+def save(path: Path, results: Sequence[Result], meta: Dict[str, Any]) -> None:
+    payload = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(), **meta},
+        "results": {result.name: result.summary() for result in results},
+    }
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def compare(path: Path, results: Sequence[Result], threshold: float) -> List[str]:
+    """Return a line per benchmark whose median is more than ``threshold`` times the baseline."""
+
+    baseline = json.loads(path.read_text(encoding="utf-8")).get("results", {})
+    regressions: List[str] = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if not previous:
+            continue
+        ratio = result.summary()["median"] / previous["median"]
+        if ratio > threshold:
+            regressions.append(
+                f"{result.name}: {format_seconds(previous['median']).strip()} -> "
+                f"{format_seconds(result.summary()['median']).strip()} ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+__all__ = ["Benchmark", "Result", "compare", "format_seconds", "measure", "render_table", "save"]
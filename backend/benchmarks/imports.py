@@ -0,0 +1,164 @@
+"""Import-time audit with budgets, based on ``python -X importtime``.
+
+Each target runs in a fresh interpreter a few times. The best cumulative import
+time of the target module is compared with its budget, and modules that must
+stay lazy are checked to be absent from ``sys.modules`` afterwards. The exit
+code is non-zero on any breach, so this can gate CI::
+
+    python -m benchmarks.imports
+    python -m benchmarks.imports --scale 1.5 --top 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+
+@dataclass(frozen=True)
+class ImportTarget:
+    name: str
+    module: str
+    budget_ms: float
+    # Modules that must not be imported by the time ``module`` finishes importing.
+    forbidden: Tuple[str, ...] = ()
+    argv: Optional[Tuple[str, ...]] = None  # run a script instead of ``import module``
+
+
+TARGETS: Tuple[ImportTarget, ...] = (
+    ImportTarget(
+        "app",
+        "aggregator.api",
+        budget_ms=600.0,
+        forbidden=("pandas", "numpy", "uvicorn", "twilio"),
+    ),
+    ImportTarget(
+        "metrics",
+        "aggregator.metrics",
+        budget_ms=40.0,
+        forbidden=("pandas", "numpy", "fastapi"),
+    ),
+    ImportTarget(
+        "units",
+        "aggregator.units",
+        budget_ms=40.0,
+        forbidden=("pandas", "numpy"),
+    ),
+    ImportTarget(
+        "twilio-cli-help",
+        "__main__",
+        budget_ms=60.0,
+        forbidden=("twilio",),
+        argv=("twilio/main.py", "--help"),
+    ),
+)
+
+
+@dataclass
+class ImportSample:
+    total_ms: float
+    children: List[Tuple[str, float]] = field(default_factory=list)
+    loaded: Dict[str, bool] = field(default_factory=dict)
+
+
+def _parse_importtime(stderr: str, module: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """Return the cumulative time of ``module`` (or all top-level imports) and its heaviest imports."""
+
+    rows: List[Tuple[int, str, float]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((depth, name.strip(), int(cumulative) / 1000))
+
+    if module != "__main__":
+        index = next((i for i, (depth, name, _) in enumerate(rows) if name == module and depth == 0), None)
+        if index is None:
+            raise RuntimeError(f"{module} did not appear in the -X importtime output")
+        # importtime lists a module's imports right before the module itself.
+        children = []
+        for depth, name, ms in reversed(rows[:index]):
+            if depth == 0:
+                break
+            if depth == 1:
+                children.append((name, ms))
+        total = rows[index][2]
+    else:
+        # Script targets: every top-level import after interpreter startup (site) belongs to the script.
+        startup = max((i for i, (depth, name, _) in enumerate(rows) if depth == 0 and name == "site"), default=-1)
+        children = [(name, ms) for depth, name, ms in rows[startup + 1 :] if depth == 0]
+        total = sum(ms for _, ms in children)
+    children.sort(key=lambda item: item[1], reverse=True)
+    return total, children
+
+
+def sample(target: ImportTarget) -> ImportSample:
+    probe = (
+        "import json, sys;"
+        f"print(json.dumps({{name: name in sys.modules for name in {list(target.forbidden)!r}}}))"
+    )
+    if target.argv is None:
+        command = [sys.executable, "-X", "importtime", "-c", f"import {target.module}; {probe}"]
+    else:
+        # Run the script, then report which forbidden modules it pulled in (--help exits via SystemExit).
+        runner = (
+            "import runpy, sys;"
+            f"sys.argv = {list(target.argv)!r};"
+            "\ntry:\n    runpy.run_path(sys.argv[0], run_name='__main__')\nexcept SystemExit:\n    pass\n"
+            f"{probe}"
+        )
+        command = [sys.executable, "-X", "importtime", "-c", runner]
+    completed = subprocess.run(command, cwd=BACKEND_ROOT, capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{target.name}: import failed\n{completed.stderr[-2000:]}")
+    total, children = _parse_importtime(completed.stderr, target.module)
+    loaded = json.loads(completed.stdout.strip().splitlines()[-1])
+    return ImportSample(total, children, loaded)
+
+
+def audit(targets: Sequence[ImportTarget], *, repeat: int, scale: float, top: int) -> List[str]:
+    breaches: List[str] = []
+    for target in targets:
+        samples = [sample(target) for _ in range(repeat)]
+        best = min(samples, key=lambda item: item.total_ms)
+        budget = target.budget_ms * scale
+        status = "ok" if best.total_ms <= budget else "OVER"
+        print(f"{target.name:<18} {best.total_ms:8.1f} ms  (budget {budget:.0f} ms)  {status}")
+        for name, ms in best.children[:top]:
+            print(f"    {ms:8.1f} ms  {name}")
+        if best.total_ms > budget:
+            breaches.append(f"{target.name}: {best.total_ms:.1f} ms exceeds {budget:.0f} ms")
+        eager = [name for name, loaded in best.loaded.items() if loaded]
+        if eager:
+            breaches.append(f"{target.name}: imports {', '.join(eager)} eagerly")
+    return breaches
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check import times against budgets.")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per target; the best run counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. for slow CI machines")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest direct imports to list per target")
+    parser.add_argument("--only", default="", help="Comma-separated target names")
+    args = parser.parse_args(argv)
+
+    selected = {name.strip() for name in args.only.split(",") if name.strip()}
+    targets = [target for target in TARGETS if not selected or target.name in selected]
+    breaches = audit(targets, repeat=args.repeat, scale=args.scale, top=args.top)
+    if breaches:
+        print("\nImport budget breaches:")
+        print("\n".join(f"  {line}" for line in breaches))
+        return 1
+    print("\nAll import budgets met.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
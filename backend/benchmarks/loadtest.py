@@ -0,0 +1,360 @@
+"""Open-loop load generator for the aggregator API.
+
+Requests are issued on a fixed schedule (``--rps``) whether or not earlier ones
+have finished. Latency is measured from each request's scheduled start, so a
+stalled server shows up in the percentiles instead of quietly lowering the
+offered load. Traffic is a weighted mix of scenarios::
+
+    # Against a running server
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --rps 50 --duration 30
+
+    # Spawn stand-in upstreams plus the aggregator, then drive them
+    python -m benchmarks.loadtest --spawn --workers 2 --rps 100 --duration 60 \\
+        --mix preset=1,search=3,series=2,quiz=1 --upstream-latency-ms 80
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from .stubs import write_twilio_stub
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_MIX = "preset=1,search=3,series=2,quiz=1"
+SEARCH_TERMS = ("Toronto", "Oshawa", "Ajax", "Scarborough", "North York", "Pickering", "Whitby")
+GTA_BOUNDS = ((43.4, 44.2), (-80.0, -78.6))
+
+RequestSpec = Tuple[str, str, Dict[str, Any]]  # method, path, httpx keyword arguments
+
+
+@dataclass
+class ScenarioStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, latency: float, status: str, ok: bool) -> None:
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        count = len(self.latencies)
+        percentiles = np.percentile(self.latencies, [50, 95, 99]) * 1000 if count else [float("nan")] * 3
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": self.errors / count if count else 0.0,
+            "p50_ms": float(percentiles[0]),
+            "p95_ms": float(percentiles[1]),
+            "p99_ms": float(percentiles[2]),
+            "statuses": dict(sorted(self.statuses.items())),
+        }
+
+
+class Scenarios:
+    """Builds requests for each traffic type from a seeded RNG."""
+
+    def __init__(self, rng: random.Random, series_keys: List[Dict[str, str]]) -> None:
+        self.rng = rng
+        self.series_keys = series_keys
+        self.builders: Dict[str, Callable[[], RequestSpec]] = {
+            "preset": self.preset,
+            "search": self.search,
+            "series": self.series,
+            "quiz": self.quiz,
+            "insights": self.insights,
+        }
+
+    def _coordinate(self) -> Tuple[float, float]:
+        (lat_low, lat_high), (lon_low, lon_high) = GTA_BOUNDS
+        return round(self.rng.uniform(lat_low, lat_high), 5), round(self.rng.uniform(lon_low, lon_high), 5)
+
+    def preset(self) -> RequestSpec:
+        return "GET", "/aqi/current/preset", {}
+
+    def search(self) -> RequestSpec:
+        return "GET", "/aqi/current", {"params": {"query": self.rng.choice(SEARCH_TERMS)}}
+
+    def series(self) -> RequestSpec:
+        keys = self.rng.sample(self.series_keys, k=min(len(self.series_keys), self.rng.randint(1, 3)))
+        return "POST", "/series", {"json": {"series": keys, "resolution": 3600}}
+
+    def quiz(self) -> RequestSpec:
+        latitude, longitude = self._coordinate()
+        payload = {
+            "healthSensitivities": self.rng.sample(["asthma", "heart_condition", "allergies"], k=self.rng.randint(0, 2)),
+            "activityType": self.rng.choice(["running", "cycling", "walking", None]),
+            "audience": self.rng.choice(["adult", "child", "senior"]),
+            "interests": ["health_alerts"],
+            "region": "GTA",
+            "latitude": latitude,
+            "longitude": longitude,
+        }
+        if self.rng.random() < 0.3:
+            payload["phoneNumber"] = f"+1555{self.rng.randint(0, 9_999_999):07d}"
+        return "POST", "/quiz/responses", {"json": payload}
+
+    def insights(self) -> RequestSpec:
+        latitude, longitude = self._coordinate()
+        return "GET", "/insights", {"params": {"latitude": latitude, "longitude": longitude}}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("Traffic mix needs at least one scenario with a positive weight")
+    return mix
+
+
+async def discover_series_keys(client: httpx.AsyncClient, limit: int = 20) -> List[Dict[str, str]]:
+    response = await client.get("/locations")
+    response.raise_for_status()
+    keys: List[Dict[str, str]] = []
+    for location_id, location in response.json().items():
+        for file_name in location.get("files", []):
+            parameter = file_name.rsplit("_", 1)[-1].split(".")[0]
+            keys.append({"source": "openaq", "location": location_id, "parameter": parameter})
+    random.Random(0).shuffle(keys)
+    return keys[:limit]
+
+
+async def run_load(
+    base_url: str,
+    *,
+    rps: float,
+    duration: float,
+    mix: Dict[str, float],
+    seed: int = 1,
+    timeout: float = 30.0,
+    max_in_flight: int = 1000,
+) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        series_keys = await discover_series_keys(client) if "series" in mix else []
+        scenarios = Scenarios(rng, series_keys)
+        unknown = set(mix) - set(scenarios.builders)
+        if unknown:
+            raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        stats: Dict[str, ScenarioStats] = {name: ScenarioStats() for name in names}
+        in_flight = 0
+        dropped = 0
+
+        async def issue(name: str, spec: RequestSpec, scheduled: float) -> None:
+            nonlocal in_flight
+            method, path, kwargs = spec
+            try:
+                response = await client.request(method, path, **kwargs)
+                await response.aread()
+                status = str(response.status_code)
+                ok = response.status_code < 400
+            except httpx.HTTPError as exc:
+                status, ok = type(exc).__name__, False
+            finally:
+                in_flight -= 1
+            stats[name].record(time.perf_counter() - scheduled, status, ok)
+
+        total = int(rps * duration)
+        started = time.perf_counter()
+        tasks: List["asyncio.Task[None]"] = []
+        for index in range(total):
+            scheduled = started + index / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if in_flight >= max_in_flight:
+                dropped += 1
+                continue
+            name = rng.choices(names, weights)[0]
+            in_flight += 1
+            tasks.append(asyncio.create_task(issue(name, scenarios.builders[name](), scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    overall = ScenarioStats()
+    for scenario in stats.values():
+        overall.latencies.extend(scenario.latencies)
+        overall.errors += scenario.errors
+        for status, count in scenario.statuses.items():
+            overall.statuses[status] = overall.statuses.get(status, 0) + count
+    return {
+        "target_rps": rps,
+        "achieved_rps": len(overall.latencies) / elapsed if elapsed else 0.0,
+        "duration_s": elapsed,
+        "dropped": dropped,
+        "overall": overall.summary(),
+        "scenarios": {name: scenario.summary() for name, scenario in stats.items()},
+    }
+
+
+def render_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"target {report['target_rps']:.1f} rps, achieved {report['achieved_rps']:.1f} rps over "
+        f"{report['duration_s']:.1f}s, dropped {report['dropped']}",
+        f"{'scenario':<10} {'requests':>8} {'errors':>7} {'err%':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses",
+    ]
+    rows = [*report["scenarios"].items(), ("overall", report["overall"])]
+    for name, summary in rows:
+        statuses = " ".join(f"{status}:{count}" for status, count in summary["statuses"].items())
+        lines.append(
+            f"{name:<10} {summary['requests']:>8} {summary['errors']:>7} {summary['error_rate'] * 100:>5.1f}%"
+            f" {summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f}  {statuses}"
+        )
+    return "\n".join(lines)
+
+
+def _wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode} before becoming ready")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout:.0f}s")
+
+
+@contextmanager
+def spawn_stack(
+    *,
+    port: int,
+    upstream_port: int,
+    workers: int,
+    upstream_latency_ms: float,
+    upstream_error_rate: float,
+    twilio_delay_ms: float,
+) -> Iterator[str]:
+    """Start the stand-in upstream server and the aggregator wired to it; yield the base URL."""
+
+    processes: List[subprocess.Popen] = []
+    with tempfile.TemporaryDirectory(prefix="aggregator-load-") as scratch:
+        workdir = Path(scratch)
+        upstream = f"http://127.0.0.1:{upstream_port}"
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(filter(None, [str(BACKEND_ROOT), os.environ.get("PYTHONPATH")])),
+            "AGGREGATOR_AQI_ENDPOINTS": f"{upstream}/v1/air-quality",
+            "AGGREGATOR_GEOCODING_ENDPOINT": f"{upstream}/v1/search",
+            "AGGREGATOR_TWILIO_CLI": str(write_twilio_stub(workdir)),
+            "AGGREGATOR_DATA_DIR": str(workdir / "data"),
+            "TWILIO_STUB_DELAY_MS": str(twilio_delay_ms),
+        }
+        try:
+            processes.append(
+                subprocess.Popen(
+                    [
+                        sys.executable, "-m", "benchmarks.upstream_server",
+                        "--port", str(upstream_port),
+                        "--latency-ms", str(upstream_latency_ms),
+                        "--error-rate", str(upstream_error_rate),
+                    ],
+                    cwd=BACKEND_ROOT,
+                    env=env,
+                )
+            )
+            _wait_until_ready(f"{upstream}/v1/search?name=ready", processes[-1])
+            processes.append(
+                subprocess.Popen(
+                    [
+                        sys.executable, "-m", "uvicorn", "aggregator.api:app",
+                        "--port", str(port),
+                        "--workers", str(workers),
+                        "--log-level", "warning",
+                    ],
+                    cwd=BACKEND_ROOT,
+                    env=env,
+                )
+            )
+            base_url = f"http://127.0.0.1:{port}"
+            _wait_until_ready(f"{base_url}/ready", processes[-1])
+            yield base_url
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+            for process in processes:
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Drive the aggregator API with a weighted traffic mix.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Aggregator base URL (ignored with --spawn)")
+    parser.add_argument("--rps", type=float, default=20.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Comma-separated scenario=weight (preset, search, series, quiz, insights)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Skip (and count) requests beyond this many outstanding")
+    parser.add_argument("--warmup", type=float, default=0.0, help="Seconds of unrecorded load before measuring")
+    parser.add_argument("--json", type=Path, default=None, help="Write the report to this file")
+    parser.add_argument("--spawn", action="store_true", help="Start stand-in upstreams and the aggregator locally")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--upstream-port", type=int, default=8900)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--upstream-latency-ms", type=float, default=50.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--twilio-delay-ms", type=float, default=300.0)
+    return parser.parse_args(argv)
+
+
+def _drive(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    options = {"mix": mix, "seed": args.seed, "timeout": args.timeout, "max_in_flight": args.max_in_flight}
+    if args.warmup > 0:
+        asyncio.run(run_load(base_url, rps=args.rps, duration=args.warmup, **options))
+    return asyncio.run(run_load(base_url, rps=args.rps, duration=args.duration, **options))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.spawn:
+        with spawn_stack(
+            port=args.port,
+            upstream_port=args.upstream_port,
+            workers=args.workers,
+            upstream_latency_ms=args.upstream_latency_ms,
+            upstream_error_rate=args.upstream_error_rate,
+            twilio_delay_ms=args.twilio_delay_ms,
+        ) as base_url:
+            report = _drive(args, base_url)
+    else:
+        report = _drive(args, args.url)
+
+    print(render_report(report))
+    if args.json is not None:
+        args.json.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"\nSaved report to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Local stand-ins for Open-Meteo (AQI and geocoding), the OpenAQ v3 API and the Twilio CLI.
+
+Payloads are deterministic functions of the request so runs are comparable.
+:func:`stub_upstreams` patches the aggregator in-process. The same payload
+builders can be served over HTTP for load tests.
+"""
+from __future__ import annotations
+
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import httpx
+
+NOT_FOUND_QUERIES = {"nowhere", "atlantis"}
+TWILIO_STUB_SOURCE = """\
+import argparse
+import os
+import time
+time.sleep(float(os.environ.get("TWILIO_STUB_DELAY_MS", "0")) / 1000)
+parser = argparse.ArgumentParser()
+parser.add_argument("--body", required=True)
+parser.add_argument("--to", required=True)
+args = parser.parse_args()
+print(f"stub: queued SMS to {args.to}")
+"""
+
+
+def _unit_interval(text: str) -> float:
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64
+
+
+def aqi_payload(latitude: float, longitude: float) -> Dict[str, Any]:
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "current_units": {"time": "iso8601", "interval": "seconds", "us_aqi": "USAQI"},
+        "current": {
+            "time": "2025-10-04T12:00",
+            "interval": 3600,
+            "us_aqi": int(20 + 80 * _unit_interval(f"{latitude:.4f},{longitude:.4f}")),
+        },
+    }
+
+
+def aqi_response(params: Dict[str, str]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+    latitudes = [float(value) for value in params["latitude"].split(",")]
+    longitudes = [float(value) for value in params["longitude"].split(",")]
+    payloads = [aqi_payload(lat, lon) for lat, lon in zip(latitudes, longitudes)]
+    # Open-Meteo answers a single coordinate with an object, several with an array.
+    return payloads[0] if len(payloads) == 1 else payloads
+
+
+def geocode_response(name: str) -> Dict[str, Any]:
+    if name.strip().lower() in NOT_FOUND_QUERIES:
+        return {"generationtime_ms": 0.1}
+    fraction = _unit_interval(name.lower())
+    return {
+        "results": [
+            {
+                "name": name.title(),
+                "latitude": round(43.4 + 0.8 * fraction, 5),
+                "longitude": round(-80.0 + 1.4 * fraction, 5),
+                "country": "Canada",
+                "admin1": "Ontario",
+            }
+        ]
+    }
+
+
+# Every stub location reports these sensors; ingest only uses the ones it has CSVs for.
+OPENAQ_PARAMETERS = (
+    ("co", "ppm"),
+    ("no", "ppm"),
+    ("no2", "ppm"),
+    ("nox", "ppm"),
+    ("o3", "ppm"),
+    ("pm1", "µg/m³"),
+    ("pm10", "µg/m³"),
+    ("pm25", "µg/m³"),
+    ("relativehumidity", "%"),
+    ("so2", "ppm"),
+    ("temperature", "c"),
+    ("um003", "particles/cm³"),
+)
+OPENAQ_LOCAL_OFFSET = timezone(timedelta(hours=-4))
+
+
+def openaq_location_response(location_id: int) -> Dict[str, Any]:
+    sensors = [
+        {"id": location_id * 100 + index, "name": f"{name} {units}", "parameter": {"name": name, "units": units}}
+        for index, (name, units) in enumerate(OPENAQ_PARAMETERS)
+    ]
+    return {"meta": {"found": 1}, "results": [{"id": location_id, "sensors": sensors}]}
+
+
+def openaq_measurements_response(
+    sensor_id: int,
+    datetime_from: Optional[str] = None,
+    limit: int = 100,
+    page: int = 1,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Hourly readings after ``datetime_from`` up to ``now``, oldest first like the real API."""
+
+    index = sensor_id % 100
+    if index >= len(OPENAQ_PARAMETERS):
+        return {"meta": {"found": 0}, "results": []}
+    name, units = OPENAQ_PARAMETERS[index]
+    scale = 50.0 if units.startswith("µg") or units == "%" else 0.05
+    end = (now or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=2)
+    if datetime_from:
+        start = datetime.fromisoformat(datetime_from.replace("Z", "+00:00"))
+    first = start.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    hours = max(0, int((end - first).total_seconds() // 3600) + 1)
+    offset = (page - 1) * limit
+    results = []
+    for hour in range(offset, min(hours, offset + limit)):
+        moment = first + timedelta(hours=hour)
+        stamp = moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+        results.append(
+            {
+                "value": round(scale * _unit_interval(f"{sensor_id}:{stamp}"), 3),
+                "parameter": {"name": name, "units": units},
+                "period": {
+                    "label": "1hour",
+                    "interval": "01:00:00",
+                    "datetimeFrom": {"utc": (moment - timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ")},
+                    "datetimeTo": {"utc": stamp, "local": moment.astimezone(OPENAQ_LOCAL_OFFSET).isoformat()},
+                },
+            }
+        )
+    return {"meta": {"found": hours, "page": page, "limit": limit}, "results": results}
+
+
+def handle_request(request: httpx.Request) -> httpx.Response:
+    params = dict(request.url.params)
+    if request.url.path.endswith("/air-quality"):
+        return httpx.Response(200, json=aqi_response(params))
+    if request.url.path.endswith("/search"):
+        return httpx.Response(200, json=geocode_response(params.get("name", "")))
+    parts = request.url.path.strip("/").split("/")
+    if parts[:2] == ["v3", "locations"] and len(parts) == 3:
+        return httpx.Response(200, json=openaq_location_response(int(parts[2])))
+    if parts[:2] == ["v3", "sensors"] and parts[3:] == ["measurements"]:
+        return httpx.Response(
+            200,
+            json=openaq_measurements_response(
+                int(parts[2]),
+                params.get("datetime_from"),
+                int(params.get("limit", "100")),
+                int(params.get("page", "1")),
+            ),
+        )
+    return httpx.Response(404, json={"error": True, "reason": f"No stub for {request.url.path}"})
+
+
+def write_twilio_stub(directory: Path) -> Path:
+    script = directory / "twilio_stub.py"
+    script.write_text(TWILIO_STUB_SOURCE, encoding="utf-8")
+    return script
+
+
+@contextmanager
+def stub_upstreams(directory: Optional[Path] = None) -> Iterator[Path]:
+    """Route upstream HTTP to :func:`handle_request` and Twilio/quiz writes to a scratch dir."""
+
+    # Imported here so the HTTP stand-in server does not load the whole app.
+    from aggregator import api, http_client
+
+    with tempfile.TemporaryDirectory(prefix="aggregator-stubs-") as scratch:
+        workdir = Path(directory or scratch)
+        saved = (
+            http_client._client,
+            api.TWILIO_CLI_PATH,
+            api.TWILIO_COUNT_PATH,
+            api.QUIZ_DATA_PATH,
+        )
+        http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handle_request))
+        api.TWILIO_CLI_PATH = write_twilio_stub(workdir)
+        api.TWILIO_COUNT_PATH = workdir / "twilio_send_count.json"
+        api.QUIZ_DATA_PATH = workdir / "quiz_responses.json"
+        try:
+            yield workdir
+        finally:
+            (
+                http_client._client,
+                api.TWILIO_CLI_PATH,
+                api.TWILIO_COUNT_PATH,
+                api.QUIZ_DATA_PATH,
+            ) = saved
+
+
+__all__ = [
+    "aqi_payload",
+    "aqi_response",
+    "geocode_response",
+    "handle_request",
+    "openaq_location_response",
+    "openaq_measurements_response",
+    "stub_upstreams",
+    "write_twilio_stub",
+]
@@ -0,0 +1,165 @@
+"""Benchmark definitions for data access, insights and the HTTP routes."""
+from __future__ import annotations
+
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from aggregator import insights, serialization
+from aggregator.http_cache import RESPONSE_CACHE
+from aggregator.openaq import data_access as openaq_dao
+from aggregator.openmeteo import data_access as openmeteo_dao
+from aggregator.records import filter_records_by_date
+
+from .harness import Benchmark
+from .synthetic import Dataset
+
+PROFILE = {
+    "health_sensitivity": ["asthma"],
+    "activity_type": "running",
+    "audience": "adult",
+    "interest": ["health_alerts", "best_time_outdoors"],
+}
+# Inside the synthetic series (which end 2025-10-04) for every scale.
+SAMPLE_DATE = "2025-10-02"
+
+
+def _drop_openaq_cache() -> None:
+    openaq_dao.FRAME_CACHE.invalidate()
+
+
+def _drop_openmeteo_cache() -> None:
+    openmeteo_dao.FRAME_CACHE.invalidate()
+    openmeteo_dao._METADATA_STATE = None
+    openmeteo_dao._METADATA_INDEX = []
+
+
+def _largest_openaq_file() -> str:
+    files = [file_name for location in openaq_dao.load_locations().values() for file_name in location.get("files", [])]
+    return max(files, key=lambda file_name: (openaq_dao.TRANSFORMED_DIR / file_name).stat().st_size)
+
+
+def _legacy_records_body(file_name: str) -> bytes:
+    # What the records routes did before encoding from columns.
+    return JSONResponse(jsonable_encoder(openaq_dao.load_parameter_records(file_name))).body
+
+
+def _stdlib_records_body(file_name: str) -> bytes:
+    fast, serialization.orjson = serialization.orjson, None
+    try:
+        return openaq_dao.load_parameter_json(file_name)
+    finally:
+        serialization.orjson = fast
+
+
+def _get(client: TestClient, path: str, **params: object) -> Callable[[], None]:
+    def request() -> None:
+        response = client.get(path, params=params or None)
+        response.raise_for_status()
+        response.content  # read the whole body
+
+    return request
+
+
+def build_suite(dataset: Dataset, client: TestClient) -> List[Benchmark]:
+    location_id = dataset.deep_location_ids[0]
+    location = openaq_dao.load_locations()[location_id]
+    file_name = openaq_dao.resolve_parameter_file(location, "no2")
+    records = openaq_dao.load_parameter_records(file_name)
+    slug = dataset.deep_openmeteo_slugs[0]
+    latitude, longitude = float(location["latitude"]) + 0.01, float(location["longitude"]) - 0.01
+    largest = _largest_openaq_file()
+
+    return [
+        # OpenAQ data access
+        Benchmark(
+            "openaq.load_parameter_records[cold]",
+            lambda: openaq_dao.load_parameter_records(file_name),
+            setup=_drop_openaq_cache,
+            group="data_access",
+        ),
+        Benchmark(
+            "openaq.load_parameter_records[warm]",
+            lambda: openaq_dao.load_parameter_records(file_name),
+            group="data_access",
+        ),
+        Benchmark(
+            "openaq.filter_records_by_date",
+            lambda: filter_records_by_date(records, SAMPLE_DATE),
+            group="data_access",
+        ),
+        # Records serialization on the largest OpenAQ series
+        Benchmark(
+            "serialize.records[to_dict+jsonable_encoder]",
+            lambda: _legacy_records_body(largest),
+            group="serialization",
+        ),
+        Benchmark(
+            "serialize.records[columns+json]",
+            lambda: _stdlib_records_body(largest),
+            group="serialization",
+        ),
+        Benchmark(
+            "serialize.records[columns+orjson]",
+            lambda: openaq_dao.load_parameter_json(largest),
+            group="serialization",
+        ),
+        # Open-Meteo data access
+        Benchmark(
+            "openmeteo.load_location_metadata[cold]",
+            openmeteo_dao.load_location_metadata,
+            setup=_drop_openmeteo_cache,
+            group="data_access",
+        ),
+        Benchmark("openmeteo.load_location_metadata[warm]", openmeteo_dao.load_location_metadata, group="data_access"),
+        # Insights
+        Benchmark(
+            "insights._nearest_openaq_sensor",
+            lambda: insights._nearest_openaq_sensor(latitude, longitude),
+            group="insights",
+        ),
+        Benchmark(
+            "insights.generate_insights[cold]",
+            lambda: insights.generate_insights(latitude=latitude, longitude=longitude, user_profile=PROFILE),
+            setup=_drop_openaq_cache,
+            group="insights",
+        ),
+        Benchmark(
+            "insights.generate_insights[warm]",
+            lambda: insights.generate_insights(latitude=latitude, longitude=longitude, user_profile=PROFILE),
+            group="insights",
+        ),
+        # Routes, in-process
+        Benchmark("GET /locations", _get(client, "/locations"), group="routes"),
+        Benchmark("GET /locations/{location_id}", _get(client, f"/locations/{location_id}"), group="routes"),
+        Benchmark(
+            "GET /locations/{location_id}/{parameter}",
+            _get(client, f"/locations/{location_id}/no2"),
+            group="routes",
+        ),
+        Benchmark(
+            "GET /locations/{location_id}/{parameter}[uncached]",
+            _get(client, f"/locations/{location_id}/no2"),
+            setup=RESPONSE_CACHE.clear,
+            group="routes",
+        ),
+        Benchmark(
+            "GET /locations/{location_id}/{parameter}/{date}",
+            _get(client, f"/locations/{location_id}/no2/{SAMPLE_DATE}"),
+            group="routes",
+        ),
+        Benchmark("GET /openmeteo/locations", _get(client, "/openmeteo/locations"), group="routes"),
+        Benchmark(
+            "GET /openmeteo/locations/{slug}/parameters/{parameter}",
+            _get(client, f"/openmeteo/locations/{slug}/parameters/pm2_5"),
+            group="routes",
+        ),
+        # Routes backed by stubbed upstreams
+        Benchmark("GET /aqi/current/preset", _get(client, "/aqi/current/preset"), group="upstream"),
+        Benchmark("GET /aqi/current?query", _get(client, "/aqi/current", query="Toronto"), group="upstream"),
+    ]
+
+
+__all__ = ["PROFILE", "SAMPLE_DATE", "build_suite"]
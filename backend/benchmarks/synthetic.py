@@ -0,0 +1,233 @@
+"""Synthetic OpenAQ and Open-Meteo datasets shaped like the committed exports.
+
+Most locations get a short recent history. A few "deep" locations get
+multi-year hourly series, so per-location loads can be measured at realistic
+file sizes without writing gigabytes. Output is deterministic for a given
+:class:`Scale`, and a dataset is reused when its marker file matches.
+"""
+from __future__ import annotations
+
+import json
+import shutil
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+
+from aggregator.openaq import data_access as openaq_dao
+from aggregator.openmeteo import data_access as openmeteo_dao
+from aggregator.series import engine as series_engine
+from aggregator.units import to_canonical
+
+OPENAQ_HEADER = (
+    "location_id,location_name,parameter,value,unit,datetimeUtc,datetimeLocal,timezone,latitude,longitude,"
+    "country_iso,isMobile,isMonitor,owner_name,provider,value_canonical,unit_canonical"
+)
+OPENAQ_PARAMETERS: Dict[str, tuple] = {
+    # parameter: (unit, typical level, spread)
+    "no2": ("ppm", 0.012, 0.008),
+    "o3": ("ppm", 0.030, 0.012),
+    "pm25": ("µg/m³", 9.0, 6.0),
+    "so2": ("ppm", 0.001, 0.001),
+    "temperature": ("c", 12.0, 9.0),
+    "relativehumidity": ("%", 65.0, 15.0),
+}
+OPENMETEO_COLUMNS: Dict[str, tuple] = {
+    "temperature_2m": (12.0, 9.0),
+    "relative_humidity_2m": (65.0, 15.0),
+    "rain": (0.1, 0.4),
+    "wind_speed_10m": (12.0, 6.0),
+    "pm10": (14.0, 8.0),
+    "pm2_5": (9.0, 6.0),
+    "ozone": (60.0, 20.0),
+    "nitrogen_dioxide": (18.0, 10.0),
+    "sulphur_dioxide": (2.0, 1.5),
+}
+# Bounding box around the Greater Toronto Area, where the real sensors are.
+LAT_RANGE = (43.4, 44.2)
+LON_RANGE = (-80.0, -78.6)
+END_TIME = datetime(2025, 10, 4, tzinfo=timezone.utc)
+UTC_OFFSET_HOURS = -4
+SHALLOW_HOURS = 48
+
+
+@dataclass(frozen=True)
+class Scale:
+    name: str
+    locations: int
+    deep_locations: int
+    years: float
+    openmeteo_locations: int
+    seed: int = 2025
+
+    @property
+    def deep_hours(self) -> int:
+        return int(self.years * 365 * 24)
+
+
+SCALES: Dict[str, Scale] = {
+    "small": Scale("small", locations=100, deep_locations=2, years=0.5, openmeteo_locations=20),
+    "medium": Scale("medium", locations=1_000, deep_locations=3, years=1.0, openmeteo_locations=100),
+    "large": Scale("large", locations=10_000, deep_locations=5, years=3.0, openmeteo_locations=500),
+}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    root: Path
+    scale: Scale
+    location_ids: List[str]
+    deep_location_ids: List[str]
+    openmeteo_slugs: List[str]
+    deep_openmeteo_slugs: List[str]
+
+    @property
+    def openaq_dir(self) -> Path:
+        return self.root / "openaq" / "transformed"
+
+    @property
+    def openmeteo_dir(self) -> Path:
+        return self.root / "openmeteo" / "data"
+
+
+def _hourly_values(rng: np.random.Generator, hours: int, level: float, spread: float) -> np.ndarray:
+    # Diurnal cycle plus noise, clipped at zero like real concentrations.
+    phase = np.arange(hours) * (2 * np.pi / 24)
+    values = level + spread * 0.6 * np.sin(phase) + rng.normal(0.0, spread * 0.4, hours)
+    return np.round(np.clip(values, 0.0, None), 4)
+
+
+def _write_openaq_file(
+    path: Path,
+    location_id: str,
+    name: str,
+    parameter: str,
+    latitude: float,
+    longitude: float,
+    hours: int,
+    rng: np.random.Generator,
+) -> None:
+    unit, level, spread = OPENAQ_PARAMETERS[parameter]
+    values = _hourly_values(rng, hours, level, spread)
+    canonical, canonical_unit = to_canonical(parameter, values, unit)
+    local_offset = timedelta(hours=UTC_OFFSET_HOURS)
+    lines = [OPENAQ_HEADER]
+    # Newest first, matching openaq/transform.py.
+    for offset, value, converted in zip(range(hours), values.tolist(), canonical.tolist()):
+        moment = END_TIME - timedelta(hours=offset)
+        local = (moment + local_offset).strftime("%Y-%m-%dT%H:%M:%S") + f"{UTC_OFFSET_HOURS:+03d}:00"
+        lines.append(
+            f"{location_id},{name},{parameter},{value},{unit},{moment:%Y-%m-%dT%H:%M:%SZ},{local},"
+            f"America/Toronto,{latitude},{longitude},,,,Synthetic,Synthetic,{converted:.6g},{canonical_unit}"
+        )
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _write_openmeteo_file(path: Path, name: str, hours: int, rng: np.random.Generator) -> None:
+    start = (END_TIME + timedelta(hours=UTC_OFFSET_HOURS)).replace(tzinfo=None) - timedelta(hours=hours - 1)
+    times = [(start + timedelta(hours=offset)).strftime("%Y-%m-%dT%H:%M") for offset in range(hours)]
+    columns = [_hourly_values(rng, hours, level, spread).tolist() for level, spread in OPENMETEO_COLUMNS.values()]
+    lines = [",".join(("location_name", "time", *OPENMETEO_COLUMNS))]
+    for index, moment in enumerate(times):
+        lines.append(",".join([name, moment, *(str(column[index]) for column in columns)]))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _marker(scale: Scale) -> str:
+    return json.dumps({"format": 1, **asdict(scale)}, sort_keys=True)
+
+
+def _deep_ids(ids: Sequence[str], count: int) -> List[str]:
+    if count <= 0 or not ids:
+        return []
+    step = max(1, len(ids) // count)
+    return list(ids[::step][:count])
+
+
+def generate(root: Path, scale: Scale, force: bool = False) -> Dataset:
+    """Write (or reuse) the dataset for ``scale`` under ``root``."""
+
+    location_ids = [str(1_000_000 + index) for index in range(scale.locations)]
+    slugs = [f"synthetic_{index:05d}" for index in range(scale.openmeteo_locations)]
+    dataset = Dataset(
+        root=root,
+        scale=scale,
+        location_ids=location_ids,
+        deep_location_ids=_deep_ids(location_ids, scale.deep_locations),
+        openmeteo_slugs=slugs,
+        deep_openmeteo_slugs=_deep_ids(slugs, scale.deep_locations),
+    )
+
+    marker_path = root / "dataset.json"
+    if not force and marker_path.exists() and marker_path.read_text(encoding="utf-8") == _marker(scale):
+        return dataset
+
+    if root.exists():
+        shutil.rmtree(root)
+    dataset.openaq_dir.mkdir(parents=True)
+    dataset.openmeteo_dir.mkdir(parents=True)
+    rng = np.random.default_rng(scale.seed)
+
+    deep = set(dataset.deep_location_ids)
+    parameters = list(OPENAQ_PARAMETERS)
+    locations: Dict[str, Dict[str, object]] = {}
+    for index, location_id in enumerate(location_ids):
+        latitude = round(float(rng.uniform(*LAT_RANGE)), 6)
+        longitude = round(float(rng.uniform(*LON_RANGE)), 6)
+        # Every sensor reports NO2; others carry a rotating subset like real monitors.
+        tracked = ["no2"] + [parameter for offset, parameter in enumerate(parameters[1:]) if (index + offset) % 3 != 0]
+        hours = scale.deep_hours if location_id in deep else SHALLOW_HOURS
+        files = []
+        for parameter in tracked:
+            file_name = f"{location_id}_{parameter}.csv"
+            _write_openaq_file(
+                dataset.openaq_dir / file_name,
+                location_id,
+                f"Synthetic Station {index}",
+                parameter,
+                latitude,
+                longitude,
+                hours,
+                rng,
+            )
+            files.append(file_name)
+        locations[location_id] = {"latitude": latitude, "longitude": longitude, "files": files}
+    (dataset.openaq_dir / "locations.json").write_text(json.dumps(locations, indent=4), encoding="utf-8")
+
+    deep_slugs = set(dataset.deep_openmeteo_slugs)
+    for index, slug in enumerate(slugs):
+        hours = scale.deep_hours if slug in deep_slugs else 72
+        _write_openmeteo_file(dataset.openmeteo_dir / f"{slug}.csv", f"Synthetic Town {index}", hours, rng)
+
+    marker_path.write_text(_marker(scale), encoding="utf-8")
+    return dataset
+
+
+def _reset_caches() -> None:
+    openaq_dao.FRAME_CACHE.invalidate()
+    openmeteo_dao.FRAME_CACHE.invalidate()
+    openmeteo_dao._METADATA_STATE = None
+    openmeteo_dao._METADATA_INDEX = []
+    series_engine.clear_cache()
+
+
+@contextmanager
+def use_dataset(dataset: Dataset) -> Iterator[Dataset]:
+    """Point the aggregator's data-access modules at ``dataset`` for the duration."""
+
+    saved = (openaq_dao.TRANSFORMED_DIR, openaq_dao.LOCATIONS_PATH, openmeteo_dao.DATA_DIR)
+    openaq_dao.TRANSFORMED_DIR = dataset.openaq_dir
+    openaq_dao.LOCATIONS_PATH = dataset.openaq_dir / "locations.json"
+    openmeteo_dao.DATA_DIR = dataset.openmeteo_dir
+    _reset_caches()
+    try:
+        yield dataset
+    finally:
+        openaq_dao.TRANSFORMED_DIR, openaq_dao.LOCATIONS_PATH, openmeteo_dao.DATA_DIR = saved
+        _reset_caches()
+
+
+__all__ = ["SCALES", "Dataset", "Scale", "generate", "use_dataset"]
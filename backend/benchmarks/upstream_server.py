@@ -0,0 +1,100 @@
+"""Stand-in Open-Meteo AQI, geocoding and OpenAQ v3 server for load tests.
+
+Serves the deterministic payloads from :mod:`benchmarks.stubs` on
+``/v1/air-quality``, ``/v1/search``, ``/v3/locations/{id}`` and
+``/v3/sensors/{id}/measurements``. It can add latency and fail a share of
+requests, so pooling, fallback and overload behaviour can be exercised. The
+OpenAQ routes feed the ingest service (``AGGREGATOR_OPENAQ_API_URL``)::
+
+    python -m benchmarks.upstream_server --port 8900 --latency-ms 80 --error-rate 0.02
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+from typing import Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from .stubs import aqi_response, geocode_response, openaq_location_response, openaq_measurements_response
+
+
+def create_app(latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = 7) -> Starlette:
+    rng = random.Random(seed)
+
+    async def _delay() -> Optional[JSONResponse]:
+        delay = max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        if error_rate and rng.random() < error_rate:
+            return JSONResponse({"error": True, "reason": "Injected failure"}, status_code=503)
+        return None
+
+    async def air_quality(request: Request) -> JSONResponse:
+        failure = await _delay()
+        if failure is not None:
+            return failure
+        params = dict(request.query_params)
+        if "latitude" not in params or "longitude" not in params:
+            return JSONResponse({"error": True, "reason": "latitude and longitude are required"}, status_code=400)
+        return JSONResponse(aqi_response(params))
+
+    async def search(request: Request) -> JSONResponse:
+        failure = await _delay()
+        if failure is not None:
+            return failure
+        return JSONResponse(geocode_response(request.query_params.get("name", "")))
+
+    async def openaq_location(request: Request) -> JSONResponse:
+        failure = await _delay()
+        if failure is not None:
+            return failure
+        return JSONResponse(openaq_location_response(int(request.path_params["location_id"])))
+
+    async def openaq_measurements(request: Request) -> JSONResponse:
+        failure = await _delay()
+        if failure is not None:
+            return failure
+        params = request.query_params
+        return JSONResponse(
+            openaq_measurements_response(
+                int(request.path_params["sensor_id"]),
+                params.get("datetime_from"),
+                int(params.get("limit", "100")),
+                int(params.get("page", "1")),
+            )
+        )
+
+    return Starlette(
+        routes=[
+            Route("/v1/air-quality", air_quality),
+            Route("/v1/search", search),
+            Route("/v3/locations/{location_id:int}", openaq_location),
+            Route("/v3/sensors/{sensor_id:int}/measurements", openaq_measurements),
+        ]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve stand-in Open-Meteo AQI, geocoding and OpenAQ v3 endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added delay per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(args.latency_ms, args.jitter_ms, args.error_rate),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
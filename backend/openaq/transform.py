@@ -2,6 +2,8 @@
 import json
 import pandas as pd
 import os
+import subprocess
+import sys
 
 # Create the output directory if it doesn't exist
 if not os.path.exists("transformed"):
@@ -32,3 +34,9 @@ for filename in headers_data["files"]:
         
         # Write to new CSV
         param_df.to_csv(os.path.join("transformed", new_filename), index=False)
+
+# Summarise every location (names, coverage, latest readings) for the aggregator's /locations.
+# The aggregator owns the catalog format, so its writer runs in its own process from backend/.
+if os.path.exists(os.path.join("transformed", "locations.json")):
+    backend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    subprocess.run([sys.executable, "-m", "aggregator.openaq.build_catalog"], cwd=backend_dir, check=True)
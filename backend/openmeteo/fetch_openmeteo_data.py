@@ -4,10 +4,14 @@ from __future__ import annotations
 import csv
 import sys
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import requests
 
+# Coordinates per multi-location request; keep in step with MAX_BATCH_SIZE in
+# aggregator/openmeteo/batching.py, which serves the same upstream.
+MAX_BATCH_SIZE = 50
+
 FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
 FORECAST_PARAMS = {
     "hourly": (
@@ -91,21 +95,12 @@ AIR_QUALITY_FIELDS = (
 ALL_FIELDS = (TIME_FIELD,) + FORECAST_FIELDS + AIR_QUALITY_FIELDS
 
 
-def _fetch_hourly_dataset(
-    url: str,
-    base_params: Dict[str, object],
+def _validate_hourly(
+    payload: Dict[str, Any],
     location: Dict[str, Any],
     required_fields: Tuple[str, ...],
     dataset_label: str,
 ) -> Dict[str, List[Any]]:
-    params = {
-        "latitude": location["latitude"],
-        "longitude": location["longitude"],
-        **base_params,
-    }
-    response = requests.get(url, params=params, timeout=60)
-    response.raise_for_status()
-    payload = response.json()
     hourly = payload.get("hourly")
     if not hourly:
         raise ValueError(f"No hourly data returned for {location['location_name']} ({dataset_label})")
@@ -121,22 +116,106 @@ def _fetch_hourly_dataset(
     return hourly
 
 
-def fetch_location_hourly(location: Dict[str, Any]) -> Tuple[Dict[str, List[Any]], Dict[str, List[Any]]]:
-    forecast_hourly = _fetch_hourly_dataset(
-        FORECAST_URL,
-        FORECAST_PARAMS,
-        location,
-        FORECAST_FIELDS,
-        "forecast",
-    )
-    air_quality_hourly = _fetch_hourly_dataset(
-        AIR_QUALITY_URL,
-        AIR_QUALITY_PARAMS,
-        location,
-        AIR_QUALITY_FIELDS,
-        "air_quality",
-    )
-    return forecast_hourly, air_quality_hourly
+def _fetch_hourly_dataset(
+    url: str,
+    base_params: Dict[str, object],
+    location: Dict[str, Any],
+    required_fields: Tuple[str, ...],
+    dataset_label: str,
+) -> Dict[str, List[Any]]:
+    params = {
+        "latitude": location["latitude"],
+        "longitude": location["longitude"],
+        **base_params,
+    }
+    response = requests.get(url, params=params, timeout=60)
+    response.raise_for_status()
+    return _validate_hourly(response.json(), location, required_fields, dataset_label)
+
+
+def _fetch_hourly_batch(
+    url: str,
+    base_params: Dict[str, object],
+    locations: Sequence[Dict[str, Any]],
+    required_fields: Tuple[str, ...],
+    dataset_label: str,
+) -> List[Optional[Dict[str, List[Any]]]]:
+    """Fetch hourly data for several locations in one multi-coordinate request.
+
+    Open-Meteo answers a comma-separated coordinate list with one payload per
+    location, in request order. If the combined request fails or cannot be
+    matched back to the locations, each location is fetched on its own. A
+    location that still fails is reported and returned as ``None`` so a single
+    bad entry does not abort the whole backfill.
+    """
+
+    if len(locations) == 1:
+        return [_fetch_hourly_single(url, base_params, locations[0], required_fields, dataset_label)]
+
+    params = {
+        "latitude": ",".join(str(location["latitude"]) for location in locations),
+        "longitude": ",".join(str(location["longitude"]) for location in locations),
+        **base_params,
+    }
+    try:
+        response = requests.get(url, params=params, timeout=60)
+        response.raise_for_status()
+        payload = response.json()
+        if not isinstance(payload, list) or len(payload) != len(locations):
+            raise ValueError(f"Expected {len(locations)} location payloads from {dataset_label} batch")
+        return [
+            _validate_hourly(item, location, required_fields, dataset_label)
+            for item, location in zip(payload, locations)
+        ]
+    except (requests.RequestException, ValueError) as exc:
+        sys.stderr.write(f"Warning: batched {dataset_label} request failed ({exc}); retrying per location.\n")
+
+    return [
+        _fetch_hourly_single(url, base_params, location, required_fields, dataset_label)
+        for location in locations
+    ]
+
+
+def _fetch_hourly_single(
+    url: str,
+    base_params: Dict[str, object],
+    location: Dict[str, Any],
+    required_fields: Tuple[str, ...],
+    dataset_label: str,
+) -> Optional[Dict[str, List[Any]]]:
+    try:
+        return _fetch_hourly_dataset(url, base_params, location, required_fields, dataset_label)
+    except (requests.RequestException, ValueError) as exc:
+        sys.stderr.write(f"Warning: {dataset_label} request for {location['location_name']} failed ({exc}); skipping it.\n")
+        return None
+
+
+HourlyPair = Tuple[Optional[Dict[str, List[Any]]], Optional[Dict[str, List[Any]]]]
+
+
+def fetch_location_hourly(location: Dict[str, Any]) -> HourlyPair:
+    return fetch_locations_hourly([location])[0]
+
+
+def fetch_locations_hourly(
+    locations: Sequence[Dict[str, Any]],
+    max_batch_size: int = MAX_BATCH_SIZE,
+) -> List[HourlyPair]:
+    """Forecast and air-quality data per location; either side is ``None`` when its request failed."""
+
+    results: List[HourlyPair] = []
+    for start in range(0, len(locations), max_batch_size):
+        chunk = locations[start : start + max_batch_size]
+        forecast = _fetch_hourly_batch(FORECAST_URL, FORECAST_PARAMS, chunk, FORECAST_FIELDS, "forecast")
+        air_quality = _fetch_hourly_batch(
+            AIR_QUALITY_URL,
+            AIR_QUALITY_PARAMS,
+            chunk,
+            AIR_QUALITY_FIELDS,
+            "air_quality",
+        )
+        results.extend(zip(forecast, air_quality))
+    return results
 
 
 def iter_hourly_rows(
@@ -198,12 +277,19 @@ def filename_for_location(location: Dict[str, Any]) -> str:
 def main() -> None:
     base_dir = Path(__file__).resolve().parent
     output_dir = base_dir / OUTPUT_DIRNAME
-    for location in LOCATIONS:
-        forecast_hourly, air_quality_hourly = fetch_location_hourly(location)
+    skipped: List[str] = []
+    for location, (forecast_hourly, air_quality_hourly) in zip(LOCATIONS, fetch_locations_hourly(LOCATIONS)):
+        if forecast_hourly is None or air_quality_hourly is None:
+            skipped.append(location["location_name"])
+            continue
         rows = list(iter_hourly_rows(location, forecast_hourly, air_quality_hourly))
         output_path = output_dir / filename_for_location(location)
         write_csv(rows, output_path)
         print(f"Wrote {len(rows)} rows to {output_path}")
+    if skipped:
+        # Keep the files that were written, but let schedulers notice the gap.
+        sys.stderr.write(f"Skipped {len(skipped)} location(s): {', '.join(skipped)}\n")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
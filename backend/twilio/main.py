@@ -7,12 +7,6 @@ python twilio.py --body "hello world" --to "+14162345234"
 
 import argparse
 import os
-from twilio.rest import Client
-
-# Twilio API keys
-account_sid = os.environ.get("TWILIO_ACCOUNT_SID")
-auth_token = os.environ.get("TWILIO_AUTH_TOKEN")
-client = Client(account_sid, auth_token)
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--body", type=str, help="Message to send")
@@ -20,6 +14,14 @@ parser.add_argument("--to", type=str, help="Phone number and country code, i.e.
 
 args = parser.parse_args()
 
+# Imported after argument parsing so --help and usage errors skip the SDK's import cost
+from twilio.rest import Client
+
+# Twilio API keys
+account_sid = os.environ.get("TWILIO_ACCOUNT_SID")
+auth_token = os.environ.get("TWILIO_AUTH_TOKEN")
+client = Client(account_sid, auth_token)
+
 # Sends body message. Will automatically be prepended with "Sent from your Twilio trial account - "
 message = client.messages.create(
     body = args.body,